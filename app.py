@@ -1,18 +1,26 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
 import warnings
-import io
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.lib import colors
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+import os
+import time
+from contextlib import contextmanager
+from dados import formatar_moeda_br, CarregadorDados, GrupoCarregadores, consolidar_resultados, ativar_copy_on_write, VALOR_PATROCINIO
+from fontes import criar_fonte, url_exportacao_google, carregar_config_fontes
+from cubo import CuboAgregado
+from filtros import MotorFiltros, IndiceTexto, IndiceConsultas, chave_filtros
+from exportacao import FORMATOS_EXPORTACAO, gerar_exportacao
+from relatorio import gerar_pdf_relatorio, montar_resumo_exec
+from exibicao import montar_resumo_display, montar_patrocinios_display, montar_dados_brutos_display
+from exibicao import montar_eventos_display, montar_resumo_consolidado_display
+from desempenho import COLETOR
+from graficos import CacheFiguras, figura_distribuicao_classificacao, figura_valor_por_classificacao, figura_top_responsaveis
+from graficos import figura_evolucao_totais, figura_recebimentos_acumulados
+from historico import HistoricoSnapshots
 warnings.filterwarnings('ignore')
+ativar_copy_on_write()
 
 # ==============================================================================
 # 1. CONFIGURAÇÕES GLOBAIS E CREDENCIAIS
@@ -22,6 +30,40 @@ warnings.filterwarnings('ignore')
 GOOGLE_SHEETS_ID = '1bKyxuaOkGHKkVx2e5gdYISMi7zckmyjy'
 SHEET_NAME = 'Mesas'
 
+# Formato de leitura da planilha: 'xlsx' (padrão) ou 'csv' (mais leve, exige o gid da aba)
+TIPO_FONTE = os.environ.get('BAILE_TIPO_FONTE', 'xlsx')
+SHEET_GID = os.environ.get('BAILE_SHEET_GID')
+
+# Origem da planilha: URL de exportação ou caminho de arquivo local/URL file:// (uso offline/testes)
+URL_PLANILHA = os.environ.get('BAILE_URL_PLANILHA', url_exportacao_google(GOOGLE_SHEETS_ID, TIPO_FONTE, SHEET_GID))
+
+# Eventos (planilhas/abas) acompanhados pelo dashboard. Por padrão, só a aba SHEET_NAME da planilha acima;
+# para acompanhar vários eventos, aponte BAILE_FONTES para um arquivo JSON com a lista, por exemplo:
+# [{"nome": "Baile 2025", "origem": "https://...", "aba": "Mesas"}, {"nome": "Jantar", "planilha": "<id>", "tipo": "csv", "gid": "0"}]
+FONTES = carregar_config_fontes(os.environ.get('BAILE_FONTES'), {'nome': SHEET_NAME, 'origem': URL_PLANILHA, 'aba': SHEET_NAME, 'tipo': TIPO_FONTE})
+
+# Máximo de planilhas baixadas ao mesmo tempo pela thread agendadora
+MAX_DOWNLOADS_SIMULTANEOS = int(os.environ.get('BAILE_MAX_DOWNLOADS', '4'))
+
+# Opção da sidebar que soma todos os eventos (só aparece com mais de uma fonte)
+EVENTO_CONSOLIDADO = '📊 Consolidado'
+
+# Intervalo (em segundos) entre as consultas da thread agendadora à planilha
+INTERVALO_ATUALIZACAO_SEGUNDOS = int(os.environ.get('BAILE_INTERVALO_ATUALIZACAO', os.environ.get('BAILE_CACHE_TTL', '60')))
+
+# Timeout e número de tentativas de cada download da planilha
+TIMEOUT_DOWNLOAD_SEGUNDOS = 15
+TENTATIVAS_DOWNLOAD = 3
+
+# Arquivo local com o último snapshot publicado
+CAMINHO_SNAPSHOT = os.environ.get('BAILE_CAMINHO_SNAPSHOT', os.path.join('.cache', 'snapshot_mesas.pkl'))
+
+# Banco SQLite com o histórico das versões publicadas (aba Evolução)
+CAMINHO_HISTORICO = os.environ.get('BAILE_CAMINHO_HISTORICO', os.path.join('.cache', 'historico_mesas.sqlite3'))
+
+# Arquivo (JSON Lines) para onde o painel de desempenho exporta as métricas coletadas
+CAMINHO_METRICAS = os.environ.get('BAILE_CAMINHO_METRICAS', os.path.join('.cache', 'metricas_desempenho.jsonl'))
+
 # Credenciais de login para autenticação
 USUARIOS_PERMITIDOS = {
     'baile': 'baile2025',  # usuario: baile, senha: baile2025
@@ -29,6 +71,12 @@ USUARIOS_PERMITIDOS = {
     'admin': 'admin2025'    # usuario: admin, senha: admin2025
 }
 
+# Opções de linhas por página na aba Dados Brutos
+TAMANHOS_PAGINA = [50, 100, 500]
+
+# Usuários que veem o painel de desempenho
+USUARIOS_ADMIN = {'admin'}
+
 # Configuração da página Streamlit
 st.set_page_config(
     page_title='Dashboard Baile 2025',
@@ -41,184 +89,141 @@ st.set_page_config(
 # 2. FUNÇÕES AUXILIARES
 # ==============================================================================
 
-def formatar_moeda_br(valor):
-    """Formata um valor numérico para o padrão de moeda brasileira (R$ X.XXX,XX)."""
-    if pd.isna(valor):
-        return 'R$ 0,00'
-    return f'R$ {valor:,.2f}'.replace(',', 'X').replace('.', ',').replace('X', '.')
-
-def classificar_mesa(row):
-    """Classifica uma mesa com base no seu valor."""
-    valor = row['VALOR']
-    if pd.isna(valor) or valor == 0:
-        return 'PENDENTE'
-    elif valor == 600:
-        return 'MESA PAGA'
-    elif valor == 300:
-        return 'MEIA ENTRADA'
-    elif valor >= 1000:
-        return 'PATROCÍNIO'
-    else:
-        return 'OUTRO'
+def caminho_da_fonte(caminho, fonte):
+    """Arquivo local de uma fonte: o próprio `caminho` com uma única fonte, ou com o id da fonte antes da extensão."""
+    if len(FONTES) == 1:
+        return caminho
+    base, extensao = os.path.splitext(caminho)
+    return f'{base}_{fonte["id"]}{extensao}'
+
+@st.cache_resource(show_spinner=False)
+def obter_grupo_carregadores():
+    """
+    Cria um único carregador de dados por fonte e a thread agendadora que os atualiza em paralelo,
+    uma vez por processo e compartilhados por todas as sessões.
+    """
+    carregadores = {}
+    for fonte in FONTES:
+        try:
+            historico = HistoricoSnapshots(caminho_da_fonte(CAMINHO_HISTORICO, fonte))
+        except Exception: # Sem histórico (ex.: disco somente leitura) o dashboard funciona, só sem a aba Evolução
+            historico = None
+        carregadores[fonte['nome']] = CarregadorDados(
+            criar_fonte(fonte['origem'], fonte['aba'], fonte['tipo']), caminho_da_fonte(CAMINHO_SNAPSHOT, fonte), intervalo=INTERVALO_ATUALIZACAO_SEGUNDOS,
+            timeout=TIMEOUT_DOWNLOAD_SEGUNDOS, tentativas=TENTATIVAS_DOWNLOAD, historico=historico
+        )
+    grupo = GrupoCarregadores(carregadores, intervalo=INTERVALO_ATUALIZACAO_SEGUNDOS, max_simultaneas=MAX_DOWNLOADS_SIMULTANEOS)
+    grupo.iniciar()
+    return grupo
+
+def formatar_idade(segundos):
+    """Formata a idade dos dados de forma legível (ex.: 'há 5 min')."""
+    if segundos is None:
+        return '-'
+    if segundos < 60:
+        return f'há {int(segundos)} s'
+    if segundos < 3600:
+        return f'há {int(segundos // 60)} min'
+    return f'há {int(segundos // 3600)} h'
+
+@st.cache_resource(max_entries=2 * len(FONTES), show_spinner=False)
+def obter_cubo(versao_dados, _df_limpo):
+    """Constrói o cubo de agregados uma única vez por evento e versão dos dados (compartilhado entre sessões)."""
+    return CuboAgregado(_df_limpo)
+
+@st.cache_resource(max_entries=2 * len(FONTES), show_spinner=False)
+def obter_motor_filtros(versao_dados, _df_limpo):
+    """Constrói os índices dos filtros uma única vez por evento e versão dos dados (compartilhados entre sessões)."""
+    return MotorFiltros(_df_limpo)
+
+@st.cache_resource(max_entries=2 * len(FONTES), show_spinner=False)
+def obter_indice_busca(versao_dados, _df_limpo):
+    """Constrói o índice de busca por NOME/Cliente uma única vez por evento e versão dos dados, na primeira busca."""
+    return IndiceTexto(_df_limpo)
+
+@st.cache_resource(max_entries=2 * len(FONTES), show_spinner=False)
+def obter_indice_consultas(versao_dados, _resultado):
+    """Constrói os índices de NOME, MESA e ORD e os saldos por responsável uma única vez por evento e versão dos dados."""
+    return IndiceConsultas(_resultado.df_limpo, _resultado.resumo_responsavel)
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def obter_consolidado(versoes, _snapshots):
+    """
+    Soma os eventos com dados uma única vez por combinação de versões (tupla de pares evento, versão).
+    Retorna os totais e as tabelas por evento e por responsável já formatadas para exibição.
+    """
+    consolidado = consolidar_resultados({evento: snapshot.resultado for evento, snapshot in _snapshots.items() if snapshot is not None})
+    return {
+        'totais': consolidado['totais'],
+        'por_evento': montar_eventos_display(consolidado['por_evento']),
+        'resumo_responsavel': montar_resumo_consolidado_display(consolidado['resumo_responsavel'])
+    }
+
+@st.cache_resource(show_spinner=False)
+def obter_cache_figuras():
+    """Cache de figuras Plotly único por processo, compartilhado entre sessões."""
+    return CacheFiguras()
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def obter_exibicao(chave, nome, _montar, _dados):
+    """
+    Monta uma tabela de exibição (valores já formatados) uma única vez por chave de filtros
+    e versão dos dados. O resultado é compartilhado e deve ser tratado como somente leitura.
+    """
+    return _montar(_dados)
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def gerar_pdf_em_cache(chave, _df_filtrado, _resumo_exec):
+    """
+    Gera o PDF uma única vez por `chave` (hash dos filtros + versão dos dados).
+    Retorna os bytes do PDF e o tempo de geração em segundos.
+    """
+    inicio = time.perf_counter()
+    pdf = gerar_pdf_relatorio(_df_filtrado, _resumo_exec).getvalue()
+    segundos = time.perf_counter() - inicio
+    COLETOR.registrar('pdf', segundos)
+    COLETOR.incrementar('pdfs_gerados')
+    return pdf, segundos
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def consultar_evolucao(evento, versao_historico, responsavel, _historico):
+    """
+    Consulta o histórico do evento uma única vez por versão registrada e responsável ('Todos' = evento inteiro).
+    Retorna (evolução dos totais por versão, recebimentos por dia).
+    """
+    nome = None if responsavel == 'Todos' else responsavel
+    return _historico.evolucao_totais(nome), _historico.recebimentos_por_dia(nome)
 
 def carregar_e_processar_dados():
     """
-    Carrega os dados da planilha do Google Sheets, limpa e processa-os.
-    Retorna o DataFrame processado e métricas importantes.
-    NÃO POSSUI CACHE - ATUALIZA SEMPRE!
+    Retorna os snapshots publicados pela thread agendadora (evento -> versão, DataFrame processado e
+    métricas). A sessão usa os mesmos snapshots do início ao fim do rerun, mesmo que outra versão seja
+    publicada. Para cada evento sem nenhum dado disponível, exibe o erro (o snapshot do evento é None).
     """
-    try:
-        url = f'https://docs.google.com/spreadsheets/d/{GOOGLE_SHEETS_ID}/export?format=xlsx'
-        df = pd.read_excel(url, sheet_name=SHEET_NAME, header=3)
-        
-        # Limpeza inicial: remover colunas e linhas totalmente vazias
-        df = df.dropna(axis=1, how='all')
-        df = df.dropna(how='all')
-        df.columns = df.columns.str.strip() # Remover espaços em branco dos nomes das colunas
-        
-        # Selecionar colunas desejadas para evitar dados extras
-        colunas_desejadas = ['ORD', 'NOME', 'Cliente', 'MESA', 'VALOR', 'DATA_REC']
-        df_limpo = df[colunas_desejadas].copy()
-        
-        # Converter tipos de dados e tratar valores ausentes
-        df_limpo['ORD'] = pd.to_numeric(df_limpo['ORD'], errors='coerce')
-        df_limpo['MESA'] = pd.to_numeric(df_limpo['MESA'], errors='coerce')
-        df_limpo = df_limpo[df_limpo['ORD'].notna()].copy() # Remover linhas sem ORD
-        
-        df_limpo['VALOR'] = pd.to_numeric(df_limpo['VALOR'], errors='coerce')
-        df_limpo['VALOR_CALCULADO'] = df_limpo['VALOR'].fillna(0) # Usar 0 para valores nulos de VALOR
-        
-        # Preencher valores ausentes em colunas de texto/identificação
-        df_limpo['NOME'] = df_limpo['NOME'].fillna('-')
-        df_limpo['Cliente'] = df_limpo['Cliente'].fillna('-')
-        df_limpo['MESA'] = df_limpo['MESA'].fillna(-1) # -1 para mesas não atribuídas
-        df_limpo['DATA_REC'] = df_limpo['DATA_REC'].fillna('-')
-        
-        # Aplicar classificação das mesas
-        df_limpo['CLASSIFICACAO'] = df_limpo.apply(classificar_mesa, axis=1)
-        
-        # Calcular métricas gerais
-        TOTAL_ATUALMENTE_ESPERADO = int(df_limpo['ORD'].max()) if not df_limpo.empty else 0
-        ord_distribuidos = sorted(df_limpo['ORD'].astype(int).unique()) if not df_limpo.empty else []
-        mesas_esperadas = set(range(1, TOTAL_ATUALMENTE_ESPERADO + 1))
-        ord_faltantes = sorted(mesas_esperadas - set(ord_distribuidos))
-        
-        df_patrocinios = df_limpo[df_limpo['CLASSIFICACAO'] == 'PATROCÍNIO'].copy()
-        total_patrocinios = len(df_patrocinios)
-        valor_patrocinios_total = df_patrocinios['VALOR_CALCULADO'].sum()
-        valor_patrocinios_extra = valor_patrocinios_total - (total_patrocinios * 1000)
-        
-        mesas_pagas = len(df_limpo[df_limpo['CLASSIFICACAO'] == 'MESA PAGA'])
-        total_mesas_pagas = df_limpo[df_limpo['CLASSIFICACAO'] == 'MESA PAGA']['VALOR_CALCULADO'].sum()
-        meia_entrada = len(df_limpo[df_limpo['CLASSIFICACAO'] == 'MEIA ENTRADA'])
-        total_meia_entrada = df_limpo[df_limpo['CLASSIFICACAO'] == 'MEIA ENTRADA']['VALOR_CALCULADO'].sum()
-        mesas_pendentes_com_dados = len(df_limpo[df_limpo['CLASSIFICACAO'] == 'PENDENTE'])
-        total_mesas_pendentes = mesas_pendentes_com_dados + len(ord_faltantes)
-        total_recebido = df_limpo[df_limpo['VALOR_CALCULADO'] > 0]['VALOR_CALCULADO'].sum()
-        previsao = (TOTAL_ATUALMENTE_ESPERADO * 600) + (total_patrocinios * 400)
-        saldo_a_receber = previsao - total_recebido
-        
-        # Resumo por responsável
-        resumo_responsavel = df_limpo.groupby('NOME').agg(Mesas_Distribuidas=('ORD', 'count'), Total_Recebido=('VALOR_CALCULADO', 'sum')).reset_index()
-        patrocinios_por_responsavel = df_limpo[df_limpo['CLASSIFICACAO'] == 'PATROCÍNIO'].groupby('NOME').size().reset_index(name='Patrocinios')
-        resumo_responsavel = pd.merge(resumo_responsavel, patrocinios_por_responsavel, on='NOME', how='left').fillna(0)
-        resumo_responsavel['Patrocinios'] = resumo_responsavel['Patrocinios'].astype(int)
-        resumo_responsavel['Previsao_por_Responsavel'] = (resumo_responsavel['Mesas_Distribuidas'] * 600) + (resumo_responsavel['Patrocinios'] * 400)
-        resumo_responsavel['A_Receber'] = resumo_responsavel['Previsao_por_Responsavel'] - resumo_responsavel['Total_Recebido']
-        resumo_responsavel = resumo_responsavel.sort_values('Mesas_Distribuidas', ascending=False)
-        
-        # Versão formatada para exibição
-        resumo_responsavel_display = resumo_responsavel.copy()
-        resumo_responsavel_display['Total_Recebido'] = resumo_responsavel_display['Total_Recebido'].apply(formatar_moeda_br)
-        resumo_responsavel_display['A_Receber'] = resumo_responsavel_display['A_Receber'].apply(formatar_moeda_br)
-        resumo_responsavel_display['Previsao_por_Responsavel'] = resumo_responsavel_display['Previsao_por_Responsavel'].apply(formatar_moeda_br)
-        
-        return df_limpo, TOTAL_ATUALMENTE_ESPERADO, ord_faltantes, df_patrocinios, total_patrocinios, valor_patrocinios_total, valor_patrocinios_extra, mesas_pagas, total_mesas_pagas, meia_entrada, total_meia_entrada, mesas_pendentes_com_dados, total_mesas_pendentes, total_recebido, previsao, saldo_a_receber, resumo_responsavel, resumo_responsavel_display
-    except Exception as e:
-        st.error(f'❌ Erro ao carregar os dados: {e}')
-        return None, None, None, None, None, None, None, None, None, None, None, None, None, None, None, None, None, None
-
-def gerar_pdf_relatorio(df_filtrado, resumo_exec):
-    """Gera um relatório em PDF com os dados filtrados e um resumo executivo."""
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch, bottomMargin=0.5*inch)
-    elements = []
-    styles = getSampleStyleSheet()
-    
-    # Estilos personalizados para o PDF
-    title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=24, textColor=colors.HexColor('#1a1a1a'), spaceAfter=6, alignment=TA_CENTER, fontName='Helvetica-Bold')
-    subtitle_style = ParagraphStyle('CustomSubtitle', parent=styles['Normal'], fontSize=10, textColor=colors.HexColor('#666666'), alignment=TA_CENTER)
-    header2_style = ParagraphStyle('Header2', parent=styles['Heading2'], fontSize=16, textColor=colors.HexColor('#2c3e50'), spaceBefore=12, spaceAfter=6)
-    normal_style = styles['Normal']
-    footer_style = ParagraphStyle('Footer', parent=styles['Normal'], fontSize=9, textColor=colors.HexColor('#999999'), alignment=TA_CENTER)
-
-    # Título e data de geração
-    elements.append(Paragraph('BAILE 2025 - RELATÓRIO FILTRADO', title_style))
-    elements.append(Spacer(1, 0.2*inch))
-    data_geracao = datetime.now().strftime('%d/%m/%Y às %H:%M:%S')
-    elements.append(Paragraph(f'Gerado em: {data_geracao}', subtitle_style))
-    elements.append(Spacer(1, 0.3*inch))
-
-    # Resumo Executivo
-    elements.append(Paragraph('📊 RESUMO EXECUTIVO', header2_style))
-    elements.append(Spacer(1, 0.1*inch))
-    resumo_data = [['Métrica', 'Valor']]
-    for _, row in resumo_exec.iterrows():
-        resumo_data.append([str(row.get('Métrica', '')), str(row.get('Valor', ''))])
-    resumo_table = Table(resumo_data, colWidths=[3*inch, 2*inch])
-    resumo_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c3e50')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 11),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f0f0f0')])
-    ]))
-    elements.append(resumo_table)
-    elements.append(Spacer(1, 0.3*inch))
-
-    # Dados Brutos Filtrados
-    elements.append(Paragraph('📋 DADOS BRUTOS FILTRADOS', header2_style))
-    elements.append(Spacer(1, 0.1*inch))
-    if not df_filtrado.empty:
-        df_pdf = df_filtrado[['ORD', 'NOME', 'Cliente', 'MESA', 'VALOR_CALCULADO', 'CLASSIFICACAO', 'DATA_REC']].copy()
-        df_pdf['MESA'] = df_pdf['MESA'].apply(lambda x: str(int(x)) if x != -1 else '-')
-        df_pdf['VALOR_CALCULADO'] = df_pdf['VALOR_CALCULADO'].apply(formatar_moeda_br)
-        df_pdf = df_pdf.rename(columns={
-            'VALOR_CALCULADO': 'VALOR',
-            'CLASSIFICACAO': 'CLASSE',
-            'DATA_REC': 'DATA'
-        })
-        data_bruta = [df_pdf.columns.tolist()] + df_pdf.values.tolist()
-        col_widths = [0.5*inch, 1.5*inch, 1.5*inch, 0.6*inch, 0.8*inch, 1*inch, 0.8*inch]
-        table_bruta = Table(data_bruta, colWidths=col_widths)
-        table_bruta.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c3e50')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('ALIGN', (1, 1), (1, -1), 'LEFT'), # Alinhar NOME à esquerda
-            ('ALIGN', (2, 1), (2, -1), 'LEFT'), # Alinhar Cliente à esquerda
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 8),
-            ('FONTSIZE', (0, 1), (-1, -1), 6),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#ecf0f1')]),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE')
-        ]))
-        elements.append(table_bruta)
-    else:
-        elements.append(Paragraph('Nenhum dado encontrado com os filtros aplicados.', normal_style))
-    elements.append(Spacer(1, 0.3*inch))
+    grupo = obter_grupo_carregadores()
+    snapshots = grupo.obter()
+    for evento, snapshot in snapshots.items():
+        if snapshot is None:
+            origem = f' de {evento}' if len(snapshots) > 1 else ''
+            st.error(f'❌ Erro ao carregar os dados{origem}: {grupo.carregadores[evento].ultimo_erro}')
+    return snapshots
 
-    # Rodapé
-    elements.append(Paragraph('Relatório gerado automaticamente - Dashboard Baile 2025 v4.3', footer_style))
-    doc.build(elements)
-    buffer.seek(0)
-    return buffer
+@st.fragment(run_every=INTERVALO_ATUALIZACAO_SEGUNDOS)
+def observar_versao(versoes_exibidas):
+    """
+    Reexecuta o app apenas quando a thread agendadora publica, para algum dos eventos exibidos
+    (tupla de pares evento, versão), uma versão mais nova que a exibida.
+    """
+    grupo = obter_grupo_carregadores()
+    for evento, versao_exibida in versoes_exibidas:
+        versao = grupo.carregadores[evento].versao
+        if versao is not None and (versao_exibida is None or versao > versao_exibida):
+            st.rerun()
+    if len(versoes_exibidas) == 1:
+        evento, versao_exibida = versoes_exibidas[0]
+        st.caption(f'Versão dos dados: {versao_exibida} | Verificada {formatar_idade(grupo.carregadores[evento].idade_segundos())}')
+    else:
+        st.caption(' | '.join(f'{evento}: versão {versao_exibida or "-"}, verificada {formatar_idade(grupo.carregadores[evento].idade_segundos())}' for evento, versao_exibida in versoes_exibidas))
 
 # ==============================================================================
 # 3. FUNÇÕES DE AUTENTICAÇÃO
@@ -286,7 +291,281 @@ def tela_login():
         st.markdown("<p style='text-align: center; color: #95a5a6; font-size: 12px;'>Dashboard Baile 2025 v4.3 - Protegido por Senha</p>", unsafe_allow_html=True)
 
 # ==============================================================================
-# 4. LÓGICA PRINCIPAL DO APP STREAMLIT
+# 4. ABAS DO DASHBOARD (FRAGMENTOS)
+# ==============================================================================
+# Cada aba é um st.fragment com dependências explícitas (chave dos filtros e dados filtrados):
+# interações dentro de uma aba reexecutam só aquela aba, e não o script inteiro.
+
+@contextmanager
+def cronometro(nome):
+    """
+    Mede o tempo de execução de um trecho e o guarda em st.session_state.tempos_execucao[nome] (ms)
+    e no coletor de desempenho compartilhado entre as sessões.
+    """
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        segundos = time.perf_counter() - inicio
+        st.session_state.setdefault('tempos_execucao', {})[nome] = segundos * 1000
+        COLETOR.registrar(f'aba: {nome}', segundos)
+
+@st.fragment
+def renderizar_visao_geral(cubo_filtrado):
+    """Aba Visão Geral: gráficos de classificação e Top 10 responsáveis."""
+    with cronometro('Visão Geral'):
+        st.header('Visão Geral')
+        cache_figuras = obter_cache_figuras()
+        col_chart1, col_chart2 = st.columns(2)
+
+        # Gráfico de Distribuição por Classificação (Pie Chart)
+        with col_chart1:
+            fig = cache_figuras.obter('distribuicao_classificacao', cubo_filtrado.contagem_por_classificacao(), figura_distribuicao_classificacao)
+            st.plotly_chart(fig, use_container_width=True)
+
+        # Gráfico de Valor por Classificação (Bar Chart Horizontal)
+        with col_chart2:
+            fig = cache_figuras.obter('valor_por_classificacao', cubo_filtrado.valor_por_classificacao(), figura_valor_por_classificacao)
+            st.plotly_chart(fig, use_container_width=True)
+
+        # Gráfico Top 10 Responsáveis por Valor Recebido
+        fig = cache_figuras.obter('top_responsaveis', cubo_filtrado.top_responsaveis(10), figura_top_responsaveis)
+        st.plotly_chart(fig, use_container_width=True)
+    estatisticas = cache_figuras.estatisticas()
+    st.caption(f'⏱️ Visão Geral: {st.session_state.tempos_execucao["Visão Geral"]:.0f} ms | Cache de gráficos: {estatisticas["acertos"]} acertos, {estatisticas["falhas"]} falhas')
+
+@st.fragment
+def renderizar_responsaveis(chave_filtro, cubo_filtrado):
+    """Aba Responsáveis: resumo por responsável."""
+    with cronometro('Responsáveis'):
+        st.header('Detalhes por Responsável')
+        # Tabela de responsáveis
+        resumo_display = obter_exibicao(chave_filtro, 'responsaveis', lambda cubo: montar_resumo_display(cubo.resumo_por_responsavel()), cubo_filtrado)
+        st.dataframe(resumo_display, use_container_width=True, hide_index=True)
+    st.caption(f'⏱️ Responsáveis: {st.session_state.tempos_execucao["Responsáveis"]:.0f} ms')
+
+@st.fragment
+def renderizar_patrocinios(chave_filtro, df_filtrado):
+    """Aba Patrocínios: lista de patrocínios e valores extras."""
+    with cronometro('Patrocínios'):
+        st.header('Análise de Patrocínios')
+
+        patrocinios = obter_exibicao(chave_filtro, 'patrocinios', montar_patrocinios_display, df_filtrado)
+
+        st.write(f'**Total de Patrocínios (VALOR >= {VALOR_PATROCINIO}):** {patrocinios["quantidade"]}')
+
+        if patrocinios['quantidade'] > 0:
+            st.write(f'**Valor Total em Patrocínios:** {formatar_moeda_br(patrocinios["valor_total"])}')
+
+            # Tabela de Patrocínios
+            st.subheader('📋 Lista de Patrocínios')
+            st.dataframe(patrocinios['lista'], use_container_width=True, hide_index=True)
+
+            # Seção de Patrocínios com Valor Extra
+            if len(patrocinios['extra']) > 0:
+                st.subheader(f'🎁 Patrocínios com Valor Extra (Acima de {formatar_moeda_br(VALOR_PATROCINIO)})')
+                st.dataframe(patrocinios['extra'], use_container_width=True, hide_index=True)
+        else:
+            st.info('❌ Nenhum patrocínio encontrado com os filtros aplicados.')
+    st.caption(f'⏱️ Patrocínios: {st.session_state.tempos_execucao["Patrocínios"]:.0f} ms')
+
+@st.fragment
+def renderizar_dados_brutos(chave_filtro, versao_dados, df_limpo, posicoes_filtradas, df_filtrado, metricas_filtradas):
+    """
+    Aba Dados Brutos: tabela paginada no servidor (só a página visível é formatada e enviada ao
+    navegador), busca por responsável ou cliente e downloads em CSV/Parquet/Excel/PDF.
+    """
+    with cronometro('Dados Brutos'):
+        st.header('Dados Brutos')
+        col_busca, col_tamanho = st.columns([3, 1])
+        with col_busca:
+            busca = st.text_input('🔎 Buscar por responsável ou cliente:', key='busca_dados_brutos')
+        with col_tamanho:
+            tamanho_pagina = st.selectbox('Linhas por página:', options=TAMANHOS_PAGINA, key='tamanho_pagina_dados_brutos')
+
+        # Linhas filtradas que atendem à busca, pelo índice de palavras (posições em df_limpo)
+        posicoes = posicoes_filtradas
+        encontradas = None
+        if busca.strip():
+            with COLETOR.medir('busca'):
+                encontradas = obter_indice_busca(versao_dados, df_limpo).buscar(busca) # None: nenhum termo pesquisável (ex.: só símbolos)
+                if encontradas is not None:
+                    posicoes = np.intersect1d(posicoes_filtradas, encontradas, assume_unique=True)
+        total_linhas = len(posicoes)
+        total_paginas = max(1, -(-total_linhas // tamanho_pagina))
+
+        # Filtros, busca ou tamanho da página diferentes voltam para a primeira página
+        consulta = (chave_filtro, busca, tamanho_pagina)
+        if st.session_state.get('consulta_dados_brutos') != consulta or st.session_state.get('pagina_dados_brutos', 1) > total_paginas:
+            st.session_state.consulta_dados_brutos = consulta
+            st.session_state.pagina_dados_brutos = 1
+        pagina = st.number_input(f'Página (de {total_paginas}):', min_value=1, max_value=total_paginas, step=1, key='pagina_dados_brutos')
+        inicio = (pagina - 1) * tamanho_pagina
+        df_display = montar_dados_brutos_display(df_limpo.iloc[posicoes[inicio:inicio + tamanho_pagina]])
+
+        # Exibe a página sem o índice padrão
+        st.dataframe(df_display, use_container_width=True, hide_index=True)
+        if total_linhas:
+            st.caption(f'Linhas {inicio + 1} a {inicio + len(df_display)} de {total_linhas}')
+        else:
+            st.caption('Nenhuma linha encontrada.')
+
+        st.markdown('---')
+        st.subheader('Opções de Download')
+
+        # Os arquivos só são gerados quando o botão é clicado (em outra thread, sem reexecutar a página)
+        momento = datetime.now().strftime("%Y%m%d_%H%M%S")
+        colunas_download = st.columns(len(FORMATOS_EXPORTACAO))
+        for coluna, (formato, (rotulo, extensao, mime)) in zip(colunas_download, FORMATOS_EXPORTACAO.items()):
+            with coluna:
+                st.download_button(label=f'📥 Baixar {rotulo}', data=lambda formato=formato: gerar_exportacao(df_limpo.iloc[posicoes], formato),
+                                   file_name=f'baile_{momento}.{extensao}', mime=mime, on_click='ignore', use_container_width=True)
+        st.caption(f'Os arquivos trazem as {total_linhas} linhas filtradas{" encontradas na busca" if encontradas is not None else ""}.')
+
+        # Botão para download PDF
+        resumo_pdf = montar_resumo_exec(metricas_filtradas)
+        # O PDF só é gerado quando solicitado e fica em cache para o mesmo filtro e versão dos dados
+        if st.button('📄 Gerar PDF'):
+            st.session_state.pdf_solicitado = chave_filtro
+            COLETOR.incrementar('pdfs_solicitados') # Um por clique (os reruns seguintes só reexibem o botão)
+        if st.session_state.get('pdf_solicitado') == chave_filtro:
+            with st.spinner('Gerando PDF...'):
+                pdf_bytes, segundos_pdf = gerar_pdf_em_cache(chave_filtro, df_filtrado, resumo_pdf)
+            st.caption(f'PDF gerado em {segundos_pdf:.2f} s ({len(df_filtrado)} linhas)')
+            st.download_button(label='📄 Baixar PDF', data=pdf_bytes, file_name=f'baile_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf', mime='application/pdf')
+    st.caption(f'⏱️ Dados Brutos: {st.session_state.tempos_execucao["Dados Brutos"]:.0f} ms')
+
+@st.fragment
+def renderizar_evolucao(evento, historico, responsavel):
+    """Aba Evolução: recebido e saldo ao longo das versões da planilha e recebimentos por dia, lidos do histórico local do evento."""
+    with cronometro('Evolução'):
+        st.header('Evolução' if responsavel == 'Todos' else f'Evolução: {responsavel}')
+        versao_historico = historico.ultima_versao() if historico is not None else None
+        if versao_historico is None:
+            st.info('O histórico ainda não tem versões registradas.')
+        else:
+            evolucao, recebimentos = consultar_evolucao(evento, versao_historico, responsavel, historico)
+            cache_figuras = obter_cache_figuras()
+            st.plotly_chart(cache_figuras.obter('evolucao_totais', evolucao, figura_evolucao_totais), use_container_width=True)
+            if recebimentos.empty:
+                st.info('Nenhum recebimento com data (DATA_REC) preenchida.')
+            else:
+                st.plotly_chart(cache_figuras.obter('recebimentos_acumulados', recebimentos, figura_recebimentos_acumulados), use_container_width=True)
+            estatisticas = historico.estatisticas()
+            st.caption(f'Histórico: {estatisticas["versoes"]} versões, {estatisticas["linhas"]} linhas gravadas, {estatisticas["bytes"] / 2**20:.1f} MB')
+    st.caption(f'⏱️ Evolução: {st.session_state.tempos_execucao["Evolução"]:.0f} ms')
+
+@st.fragment
+def renderizar_consulta(versao_dados, resultado):
+    """
+    Aba Consulta: saldo e linhas de um responsável, e quem está com uma mesa ou ORD, pelos índices
+    da versão dos dados (cada consulta é uma busca direta, sem refazer os filtros).
+    """
+    with cronometro('Consulta'):
+        st.header('Consulta Rápida')
+        st.caption('Busca direta em todos os dados da planilha, sem os filtros da barra lateral.')
+        indice = obter_indice_consultas(versao_dados, resultado)
+        col_nome, col_numero = st.columns(2)
+        with col_nome:
+            nome = st.selectbox('Responsável:', options=indice.nomes, index=None, placeholder='Digite ou escolha um responsável', key='consulta_responsavel')
+        with col_numero:
+            numero = st.text_input('Mesa ou ORD:', key='consulta_numero').strip()
+
+        if nome is not None:
+            with COLETOR.medir('consulta'):
+                saldo = indice.saldo_responsavel(nome)
+                linhas = resultado.df_limpo.iloc[indice.posicoes_responsavel(nome)]
+            st.subheader(f'👤 {nome}')
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric(label='Mesas', value=saldo['mesas'], help=f'{saldo["patrocinios"]} patrocínios')
+            with col2:
+                st.metric(label='Recebido', value=formatar_moeda_br(saldo['recebido']))
+            with col3:
+                st.metric(label='Previsão', value=formatar_moeda_br(saldo['previsao']))
+            with col4:
+                st.metric(label='A Receber', value=formatar_moeda_br(saldo['saldo']))
+            st.dataframe(montar_dados_brutos_display(linhas), use_container_width=True, hide_index=True)
+
+        if numero:
+            if not (numero.isascii() and numero.isdigit()):
+                st.warning('Digite apenas o número da mesa ou do ORD.')
+            else:
+                with COLETOR.medir('consulta'):
+                    consulta = indice.consultar(numero)
+                for titulo, posicoes in [(f'🪑 Mesa {numero}', consulta['linhas_mesa']), (f'🔢 ORD {numero}', consulta['linhas_ord'])]:
+                    st.subheader(titulo)
+                    if len(posicoes):
+                        st.dataframe(montar_dados_brutos_display(resultado.df_limpo.iloc[posicoes]), use_container_width=True, hide_index=True)
+                    else:
+                        st.info('Nenhuma linha encontrada.')
+    st.caption(f'⏱️ Consulta: {st.session_state.tempos_execucao["Consulta"]:.0f} ms')
+
+def renderizar_consolidado(snapshots):
+    """Visão consolidada (mais de um evento): totais somados, uma linha por evento e o resumo por responsável de todos os eventos."""
+    with cronometro('Consolidado'):
+        grupo = obter_grupo_carregadores()
+        versoes = tuple((evento, snapshot.versao if snapshot is not None else None) for evento, snapshot in snapshots.items())
+        st.title('📊 Dashboard Baile 2025 - Consolidado')
+        st.markdown(f'👤 Logado como: **{st.session_state.usuario_atual}** | Eventos: {", ".join(snapshots)}')
+        observar_versao(versoes)
+        for evento, snapshot in snapshots.items():
+            erro = grupo.carregadores[evento].ultimo_erro
+            if snapshot is not None and erro is not None:
+                st.warning(f'⚠️ {evento}: exibindo os últimos dados válidos. Falha ao atualizar a planilha: {erro}')
+        sem_dados = [evento for evento, snapshot in snapshots.items() if snapshot is None]
+        if sem_dados:
+            st.info(f'Eventos sem dados, fora do consolidado: {", ".join(sem_dados)}')
+
+        consolidado = obter_consolidado(versoes, snapshots)
+        totais = consolidado['totais']
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric(label='Total Recebido', value=formatar_moeda_br(totais['recebido']))
+        with col2:
+            st.metric(label='Previsão', value=formatar_moeda_br(totais['previsao']))
+        with col3:
+            st.metric(label='Saldo a Receber', value=formatar_moeda_br(totais['saldo']))
+        with col4:
+            st.metric(label='Percentual', value=f'{totais["percentual"]:.1f}%')
+
+        st.markdown('---')
+        st.header('Por Evento')
+        st.dataframe(consolidado['por_evento'], use_container_width=True, hide_index=True)
+        st.header('Responsáveis em Todos os Eventos')
+        st.dataframe(consolidado['resumo_responsavel'], use_container_width=True, hide_index=True)
+    st.caption(f'⏱️ Consolidado: {st.session_state.tempos_execucao["Consolidado"]:.0f} ms')
+
+@st.fragment
+def renderizar_desempenho(motor_filtros):
+    """Painel de desempenho (somente administradores): tempos por etapa e contadores de todas as sessões."""
+    st.header('Desempenho')
+    st.caption(f'Métricas agregadas de todas as sessões desde {COLETOR.iniciado_em.strftime("%d/%m/%Y %H:%M:%S")}')
+    contadores = COLETOR.contadores()
+    figuras = obter_cache_figuras().estatisticas()
+    filtros = motor_filtros.estatisticas()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric(label='Reruns', value=contadores.get('reruns', 0))
+    with col2:
+        st.metric(label='Dados baixados', value=f'{contadores.get("bytes_baixados", 0) / 2**20:.2f} MB')
+    with col3:
+        st.metric(label='Cache de gráficos', value=f'{figuras["acertos"]} / {figuras["falhas"]}', help='Acertos / falhas')
+    with col4:
+        st.metric(label='Memória dos filtros', value=f'{filtros["acertos"]} / {filtros["falhas"]}', help='Acertos / falhas (versão atual dos dados)')
+
+    st.subheader('Tempo por etapa')
+    st.dataframe(COLETOR.resumo_etapas(), use_container_width=True, hide_index=True,
+                 column_config={coluna: st.column_config.NumberColumn(coluna, format='%.1f') for coluna in ['p50 (ms)', 'p95 (ms)', 'Máximo (ms)']})
+    st.subheader('Contadores')
+    st.dataframe(pd.DataFrame(sorted(contadores.items()), columns=['Contador', 'Valor']), use_container_width=True, hide_index=True)
+
+    if st.button('💾 Exportar métricas'):
+        COLETOR.exportar(CAMINHO_METRICAS)
+        st.success(f'Métricas exportadas para {CAMINHO_METRICAS}')
+
+# ==============================================================================
+# 5. LÓGICA PRINCIPAL DO APP STREAMLIT
 # ==============================================================================
 
 # Inicializa o estado de autenticação
@@ -298,12 +577,54 @@ if not st.session_state.autenticado:
     tela_login()
 else:
     # Se autenticado, carrega os dados e exibe o dashboard
+    inicio_execucao = time.perf_counter()
+    COLETOR.incrementar('reruns')
     with st.spinner('Carregando dados...'):
-        resultado = carregar_e_processar_dados()
-        if resultado[0] is None:
+        snapshots = carregar_e_processar_dados()
+
+        # ==============================================================================
+        # 5.1. SIDEBAR E FILTROS
+        # ==============================================================================
+        st.sidebar.header('Filtros')
+        
+        # Botões de Logout e Resetar Filtros
+        col_logout, col_reset = st.sidebar.columns(2)
+        with col_logout:
+            if st.button('🚪 Sair', use_container_width=True):
+                st.session_state.autenticado = False
+                st.session_state.usuario_atual = None
+                st.rerun()
+        with col_reset:
+            if st.button('Resetar Filtros', use_container_width=True):
+                st.session_state.clear()
+                st.rerun()
+        
+        # Botão para forçar o download imediato das planilhas (todas em paralelo), ignorando o cache
+        if st.sidebar.button('🔄 Atualizar Dados Agora', use_container_width=True):
+            with st.spinner('Atualizando dados...'):
+                obter_grupo_carregadores().revalidar()
+            st.rerun()
+        
+        # Seleção do evento (só com mais de uma fonte configurada)
+        evento = next(iter(snapshots))
+        if len(snapshots) > 1:
+            evento = st.sidebar.selectbox('Evento:', options=[EVENTO_CONSOLIDADO] + list(snapshots), key='evento_selectbox')
+        
+        if evento == EVENTO_CONSOLIDADO:
+            renderizar_consolidado(snapshots)
+        elif snapshots[evento] is None:
             st.error('Não foi possível carregar os dados. Verifique a conexão com a planilha.')
         else:
-            df_limpo, TOTAL_ATUALMENTE_ESPERADO, ord_faltantes, df_patrocinios, total_patrocinios, valor_patrocinios_total, valor_patrocinios_extra, mesas_pagas, total_mesas_pagas, meia_entrada, total_meia_entrada, mesas_pendentes_com_dados, total_mesas_pendentes, total_recebido, previsao, saldo_a_receber, resumo_responsavel, resumo_responsavel_display = resultado
+            snapshot = snapshots[evento]
+            carregador = obter_grupo_carregadores().carregadores[evento]
+            versao_dados = (evento, snapshot.versao) # Identifica os dados nos caches compartilhados
+            df_limpo = snapshot.resultado.df_limpo
+            
+            # Os filtros de classificação e valor dependem dos dados do evento: ao trocar de evento, voltam ao padrão
+            if st.session_state.get('evento_filtros') != evento:
+                for chave in ['classificacao_selecionada', 'valor_range', 'classificacao_multiselect', 'valor_slider', 'responsavel_selectbox']:
+                    st.session_state.pop(chave, None)
+                st.session_state.evento_filtros = evento
             
             # Inicializa estados dos filtros se não existirem
             if 'classificacao_selecionada' not in st.session_state:
@@ -315,23 +636,6 @@ else:
                 max_val = float(df_limpo['VALOR_CALCULADO'].max()) if not df_limpo.empty else 1000.0
                 st.session_state.valor_range = (min_val, max_val)
             
-            # ==============================================================================
-            # 4.1. SIDEBAR E FILTROS
-            # ==============================================================================
-            st.sidebar.header('Filtros')
-            
-            # Botões de Logout e Resetar Filtros
-            col_logout, col_reset = st.sidebar.columns(2)
-            with col_logout:
-                if st.button('🚪 Sair', use_container_width=True):
-                    st.session_state.autenticado = False
-                    st.session_state.usuario_atual = None
-                    st.rerun()
-            with col_reset:
-                if st.button('Resetar Filtros', use_container_width=True):
-                    st.session_state.clear()
-                    st.rerun()
-            
             # Filtro por Classificação
             todas_classificacoes = df_limpo['CLASSIFICACAO'].unique().tolist()
             classificacao_selecionada = st.sidebar.multiselect('Filtrar por Classificação:', options=todas_classificacoes, default=st.session_state.classificacao_selecionada, key='classificacao_multiselect')
@@ -348,24 +652,36 @@ else:
             valor_range = st.sidebar.slider('Filtrar por Faixa de Valor (R$):', min_value=min_valor_df, max_value=max_valor_df, value=st.session_state.valor_range, step=50.0, format='R$ %.2f', key='valor_slider')
             st.session_state.valor_range = valor_range
             
-            # Aplica os filtros ao DataFrame
-            df_filtrado = df_limpo[df_limpo['CLASSIFICACAO'].isin(classificacao_selecionada)]
-            if responsavel_selecionado != 'Todos':
-                df_filtrado = df_filtrado[df_filtrado['NOME'] == responsavel_selecionado]
-            df_filtrado = df_filtrado[(df_filtrado['VALOR_CALCULADO'] >= valor_range[0]) & (df_filtrado['VALOR_CALCULADO'] <= valor_range[1])]
-            
-            # Recalcula métricas com base nos filtros
-            total_recebido_filtrado = df_filtrado[df_filtrado['VALOR_CALCULADO'] > 0]['VALOR_CALCULADO'].sum()
-            total_patrocinios_filtrado = len(df_filtrado[df_filtrado['CLASSIFICACAO'] == 'PATROCÍNIO'])
-            previsao_filtrada = (len(df_filtrado) * 600) + (total_patrocinios_filtrado * 400)
-            saldo_a_receber_filtrado = previsao_filtrada - total_recebido_filtrado
-            percentual_recebido_filtrado = (total_recebido_filtrado / previsao_filtrada * 100) if previsao_filtrada > 0 else 0
+            # Aplica os filtros ao DataFrame usando os índices pré-construídos (resultado memorizado por filtro)
+            motor_filtros = obter_motor_filtros(versao_dados, df_limpo)
+            with COLETOR.medir('filtragem'):
+                df_filtrado = motor_filtros.filtrar(classificacao_selecionada, responsavel_selecionado, valor_range)
+                posicoes_filtradas = motor_filtros.posicoes_filtradas(classificacao_selecionada, responsavel_selecionado, valor_range)
+                
+                # Recalcula métricas com base nos filtros, a partir do cubo de agregados (O(grupos))
+                chave_filtro = chave_filtros(versao_dados, classificacao_selecionada, responsavel_selecionado, valor_range)
+                cubo_filtrado = obter_cubo(versao_dados, df_limpo).filtrar(classificacao_selecionada, responsavel_selecionado, valor_range)
+                metricas_filtradas = cubo_filtrado.metricas()
+            total_recebido_filtrado = metricas_filtradas['recebido']
+            total_patrocinios_filtrado = metricas_filtradas['patrocinios']
+            previsao_filtrada = metricas_filtradas['previsao']
+            saldo_a_receber_filtrado = metricas_filtradas['saldo']
+            percentual_recebido_filtrado = metricas_filtradas['percentual']
             
             # ==============================================================================
-            # 4.2. CABEÇALHO DO DASHBOARD
+            # 5.2. CABEÇALHO DO DASHBOARD
             # ==============================================================================
-            st.title('📊 Dashboard Baile 2025')
-            st.markdown(f'👤 Logado como: **{st.session_state.usuario_atual}** | Última atualização: {datetime.now().strftime("%d/%m/%Y %H:%M:%S")}')
+            st.title('📊 Dashboard Baile 2025' if len(snapshots) == 1 else f'📊 Dashboard Baile 2025 - {evento}')
+            st.markdown(f'👤 Logado como: **{st.session_state.usuario_atual}** | Última alteração da planilha: {snapshot.publicado_em.strftime("%d/%m/%Y %H:%M:%S")}')
+            observar_versao(((evento, snapshot.versao),))
+            if carregador.ultimo_erro is not None:
+                st.warning(f'⚠️ Exibindo os últimos dados válidos. Falha ao atualizar a planilha: {carregador.ultimo_erro}')
+            
+            # Registro das alterações linha a linha entre as versões da planilha (mais recentes primeiro)
+            if not snapshot.alteracoes.empty:
+                with st.expander(f'📝 Últimas alterações na planilha ({len(snapshot.alteracoes)})'):
+                    st.dataframe(snapshot.alteracoes.iloc[::-1][['Versao', 'Quando', 'Descricao']], use_container_width=True, hide_index=True,
+                                 column_config={'Quando': st.column_config.DatetimeColumn('Quando', format='DD/MM/YYYY HH:mm:ss'), 'Descricao': 'Alteração'})
             
             # Métricas principais
             col1, col2, col3, col4 = st.columns(4)
@@ -381,167 +697,33 @@ else:
             st.markdown('---')
             
             # ==============================================================================
-            # 4.3. ABAS DO DASHBOARD
+            # 5.3. ABAS DO DASHBOARD
             # ==============================================================================
-            tab1, tab2, tab3, tab4 = st.tabs(['🎯 Visão Geral', '👤 Responsáveis', '🏆 Patrocínios', '📋 Dados Brutos'])
+
+            nomes_abas = ['🎯 Visão Geral', '👤 Responsáveis', '🏆 Patrocínios', '📋 Dados Brutos', '📈 Evolução', '🔍 Consulta']
+            if st.session_state.usuario_atual in USUARIOS_ADMIN:
+                nomes_abas.append('⚙️ Desempenho')
+            tab1, tab2, tab3, tab4, tab5, tab6, *tab_desempenho = st.tabs(nomes_abas)
             
             with tab1:
-                st.header('Visão Geral')
-                col_chart1, col_chart2 = st.columns(2)
-                
-                # Gráfico de Distribuição por Classificação (Pie Chart)
-                with col_chart1:
-                    classificacao_counts = df_filtrado['CLASSIFICACAO'].value_counts().reset_index()
-                    classificacao_counts.columns = ['Classificacao', 'Contagem']
-                    fig = px.pie(classificacao_counts, values='Contagem', names='Classificacao', title='Distribuição por Classificação', hole=0.3)
-                    st.plotly_chart(fig, use_container_width=True)
-                
-                # Gráfico de Valor por Classificação (Bar Chart Horizontal)
-                with col_chart2:
-                    valor_por_classificacao = df_filtrado.groupby('CLASSIFICACAO')['VALOR_CALCULADO'].sum().reset_index()
-                    valor_por_classificacao.columns = ['Classificacao', 'Valor']
-                    valor_por_classificacao_sorted = valor_por_classificacao.sort_values('Valor', ascending=True)
-
-                    fig = px.bar(
-                        valor_por_classificacao_sorted,
-                        x='Valor',
-                        y='Classificacao',
-                        orientation='h',
-                        title='Valor por Classificação'
-                    )
-                    fig.update_traces(
-                        text=valor_por_classificacao_sorted['Valor'].apply(formatar_moeda_br),
-                        textposition='outside',
-                        textfont=dict(color='black', size=11),
-                        marker_color='#28a745'
-                    )
-                    fig.update_layout(
-                        xaxis_title='Valor (R$)',
-                        yaxis_title='Classificação',
-                        showlegend=False,
-                        height=500,
-                        margin=dict(r=150, l=100) # Ajuste de margem para evitar corte de texto
-                    )
-                    st.plotly_chart(fig, use_container_width=True)
-                
-                # Gráfico Top 10 Responsáveis por Valor Recebido
-                top_responsaveis = df_filtrado.groupby('NOME')['VALOR_CALCULADO'].sum().nlargest(10).reset_index()
-                top_responsaveis.columns = ['Responsavel', 'Valor']
-                top_responsaveis_sorted = top_responsaveis.sort_values('Valor', ascending=True)
-                
-                fig = px.bar(
-                    top_responsaveis_sorted, 
-                    x='Valor', 
-                    y='Responsavel', 
-                    orientation='h', 
-                    title='Top 10 Responsáveis por Valor Recebido'
-                )
-                
-                fig.update_traces(
-                    text=top_responsaveis_sorted['Valor'].apply(formatar_moeda_br),
-                    textposition='outside',
-                    textfont=dict(color='black', size=11),
-                    marker_color='#3498db'
-                )
-                
-                fig.update_layout(
-                    xaxis_title='Valor (R$)',
-                    yaxis_title='Responsável',
-                    showlegend=False,
-                    height=500,
-                    margin=dict(r=150, l=120) # Ajuste de margem para evitar corte de texto
-                )
-                
-                st.plotly_chart(fig, use_container_width=True)
-            
+                renderizar_visao_geral(cubo_filtrado)
             with tab2:
-                st.header('Detalhes por Responsável')
-                # Tabela de responsáveis
-                resumo_filtrado = df_filtrado.groupby('NOME').agg(Mesas=('ORD', 'count'), Recebido=('VALOR_CALCULADO', 'sum')).reset_index()
-                patrocinios_filtrado = df_filtrado[df_filtrado['CLASSIFICACAO'] == 'PATROCÍNIO'].groupby('NOME').size().reset_index(name='Patrocinios')
-                resumo_filtrado = pd.merge(resumo_filtrado, patrocinios_filtrado, on='NOME', how='left').fillna(0)
-                resumo_filtrado['Patrocinios'] = resumo_filtrado['Patrocinios'].astype(int)
-                resumo_filtrado['Previsao'] = (resumo_filtrado['Mesas'] * 600) + (resumo_filtrado['Patrocinios'] * 400)
-                resumo_filtrado['A_Receber'] = resumo_filtrado['Previsao'] - resumo_filtrado['Recebido']
-                resumo_filtrado = resumo_filtrado.sort_values('Mesas', ascending=False)
-                resumo_display = resumo_filtrado.copy()
-                resumo_display['Recebido'] = resumo_display['Recebido'].apply(formatar_moeda_br)
-                resumo_display['Previsao'] = resumo_display['Previsao'].apply(formatar_moeda_br)
-                resumo_display['A_Receber'] = resumo_display['A_Receber'].apply(formatar_moeda_br)
-                st.dataframe(
-                    resumo_display.rename(columns={'NOME': 'Responsável', 'Mesas': 'Mesas Dist.', 'Recebido': 'Total Recebido'}), 
-                    use_container_width=True, 
-                    hide_index=True
-                )
-            
+                renderizar_responsaveis(chave_filtro, cubo_filtrado)
             with tab3:
-                st.header('Análise de Patrocínios')
-                
-                df_patron = df_filtrado[df_filtrado['VALOR_CALCULADO'] >= 1000].copy()
-                
-                st.write(f'**Total de Patrocínios (VALOR >= 1000):** {len(df_patron)}')
-                
-                if len(df_patron) > 0:
-                    st.write(f'**Valor Total em Patrocínios:** {formatar_moeda_br(df_patron["VALOR_CALCULADO"].sum())}')
-                    
-                    # Tabela de Patrocínios
-                    patron_display = df_patron.copy()
-                    patron_display['MESA'] = patron_display['MESA'].apply(lambda x: str(int(x)) if x != -1 else '-')
-                    patron_display['VALOR_CALCULADO'] = patron_display['VALOR_CALCULADO'].apply(formatar_moeda_br)
-                    
-                    st.subheader('📋 Lista de Patrocínios')
-                    st.dataframe(
-                        patron_display[['ORD', 'MESA', 'NOME', 'Cliente', 'VALOR_CALCULADO']].rename(columns={'VALOR_CALCULADO': 'Valor Patrocínio'}),
-                        use_container_width=True,
-                        hide_index=True
-                    )
-                    
-                    # Seção de Patrocínios com Valor Extra
-                    patron_extra = df_patron[df_patron['VALOR_CALCULADO'] > 1000]
-                    if len(patron_extra) > 0:
-                        st.subheader('🎁 Patrocínios com Valor Extra (Acima de R$ 1.000)')
-                        patron_extra_display = patron_extra.copy()
-                        patron_extra_display['Valor Extra'] = patron_extra_display['VALOR_CALCULADO'] - 1000
-                        patron_extra_display['MESA'] = patron_extra_display['MESA'].apply(lambda x: str(int(x)) if x != -1 else '-')
-                        patron_extra_display['VALOR_CALCULADO'] = patron_extra_display['VALOR_CALCULADO'].apply(formatar_moeda_br)
-                        patron_extra_display['Valor Extra'] = patron_extra_display['Valor Extra'].apply(formatar_moeda_br)
-                        
-                        st.dataframe(
-                            patron_extra_display[['ORD', 'MESA', 'NOME', 'Cliente', 'VALOR_CALCULADO', 'Valor Extra']].rename(columns={'VALOR_CALCULADO': 'Valor Total'}),
-                            use_container_width=True,
-                            hide_index=True
-                        )
-                else:
-                    st.info('❌ Nenhum patrocínio encontrado com os filtros aplicados.')
-            
+                renderizar_patrocinios(chave_filtro, df_filtrado)
             with tab4:
-                st.header('Dados Brutos')
-                # Tabela de Dados Brutos com colunas específicas e renomeadas
-                df_display = df_filtrado[['ORD', 'NOME', 'Cliente', 'MESA', 'VALOR_CALCULADO', 'CLASSIFICACAO', 'DATA_REC']].copy()
-                df_display = df_display.reset_index(drop=True)
-                df_display['MESA'] = df_display['MESA'].apply(lambda x: str(int(x)) if x != -1 else '-')
-                df_display['VALOR_CALCULADO'] = df_display['VALOR_CALCULADO'].apply(formatar_moeda_br)
-                df_display = df_display.rename(columns={
-                    'VALOR_CALCULADO': 'VALOR',
-                    'CLASSIFICACAO': 'CLASSE',
-                    'DATA_REC': 'DATA'
-                })
-                
-                # Exibe o DataFrame sem o índice padrão
-                st.dataframe(df_display[['ORD', 'NOME', 'Cliente', 'MESA', 'VALOR', 'CLASSE', 'DATA']], use_container_width=True, hide_index=True)
-                
-                st.markdown('---')
-                st.subheader('Opções de Download')
-                
-                # Botão para download CSV
-                csv_data = df_filtrado.to_csv(index=False, encoding='utf-8-sig')
-                st.download_button(label='📥 Baixar CSV', data=csv_data, file_name=f'baile_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv', mime='text/csv')
-                
-                # Botão para download PDF
-                resumo_pdf = pd.DataFrame({'Métrica': ['Mesas', 'Pagas', 'Patrocínios', 'Total Recebido', 'Previsão', 'Saldo', 'Percentual'], 'Valor': [f'{len(df_filtrado)}', f'{len(df_filtrado[df_filtrado["CLASSIFICACAO"] == "MESA PAGA"])}', f'{total_patrocinios_filtrado}', formatar_moeda_br(total_recebido_filtrado), formatar_moeda_br(previsao_filtrada), formatar_moeda_br(saldo_a_receber_filtrado), f'{percentual_recebido_filtrado:.1f}%']})
-                pdf_buffer = gerar_pdf_relatorio(df_filtrado, resumo_pdf)
-                st.download_button(label='📄 Baixar PDF', data=pdf_buffer, file_name=f'baile_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf', mime='application/pdf')
+                renderizar_dados_brutos(chave_filtro, versao_dados, df_limpo, posicoes_filtradas, df_filtrado, metricas_filtradas)
+            with tab5:
+                renderizar_evolucao(evento, carregador.historico, responsavel_selecionado)
+            with tab6:
+                renderizar_consulta(versao_dados, snapshot.resultado)
+            if tab_desempenho:
+                with tab_desempenho[0]:
+                    renderizar_desempenho(motor_filtros)
 
     # Rodapé do sidebar
     st.sidebar.markdown('---')
+    segundos_execucao = time.perf_counter() - inicio_execucao
+    COLETOR.registrar('execucao_completa', segundos_execucao)
+    st.sidebar.caption(f'⏱️ Execução completa: {segundos_execucao * 1000:.0f} ms')
     st.sidebar.info(f'Dashboard Baile 2025 v4.3\n\n👤 Usuário: {st.session_state.usuario_atual}')
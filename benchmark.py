@@ -0,0 +1,646 @@
+"""
+Benchmark do dashboard com planilhas sintéticas no mesmo layout da aba 'Mesas'.
+
+Uso:
+    python benchmark.py --linhas 1000 10000
+    python benchmark.py --suite --json resultados.json
+    python benchmark.py --suite --linhas 100 10000 --referencia resultados.json --tolerancia 1.5
+    python benchmark.py --verificar
+"""
+import argparse
+import json
+import os
+import pickle
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from fontes import COLUNAS_PLANILHA, COLUNAS_NUMERICAS, COLUNAS_TEXTO, LINHA_CABECALHO, FonteArquivoLocal
+from dados import classificar_mesa, classificar_mesas, classificar_mesas_categorico, limpar_planilha, calcular_metricas, processar_dados, processar_incremental, COLUNAS_COMPARADAS, PRECOS
+from dados import totais_por_classificacao, ords_faltantes, calcular_resumo_responsavel, finalizar_resumo_responsavel
+from dados import CarregadorDados, GrupoCarregadores, ativar_copy_on_write
+from cubo import CuboAgregado
+from filtros import MotorFiltros, IndiceTexto, IndiceConsultas
+from exportacao import gerar_exportacao
+from exibicao import montar_resumo_display, montar_dados_brutos_display
+from relatorio import gerar_pdf_relatorio, montar_resumo_exec
+from historico import HistoricoSnapshots
+
+# ==============================================================================
+# 1. GERADOR DE PLANILHAS SINTÉTICAS
+# ==============================================================================
+
+VALORES_POSSIVEIS = [np.nan, 0, 600, 300, 1000, 1500, 450]
+
+def gerar_planilha_sintetica(n_linhas, semente=0):
+    """
+    Gera um DataFrame no layout da aba 'Mesas': coluna vazia à esquerda, colunas extras,
+    linhas em branco intercaladas e ORDs faltantes.
+    """
+    rng = np.random.default_rng(semente)
+    ords = np.arange(1, n_linhas + 1, dtype=float)
+    ords[rng.random(n_linhas) < 0.02] = np.nan # ~2% de ORDs faltantes
+    valores = np.array(VALORES_POSSIVEIS, dtype=float)[rng.integers(len(VALORES_POSSIVEIS), size=n_linhas)]
+    n_responsaveis = max(5, n_linhas // 20)
+    nomes = np.array([f'Responsável {i:04d}' for i in range(n_responsaveis)], dtype=object)[rng.integers(n_responsaveis, size=n_linhas)]
+    mesas = rng.integers(1, max(2, n_linhas // 2), size=n_linhas).astype(float)
+    mesas[rng.random(n_linhas) < 0.1] = np.nan
+    datas = np.where(np.isnan(valores) | (valores == 0), None, '01/10/2025')
+    df = pd.DataFrame({
+        '': None,
+        'ORD': ords,
+        'NOME ': nomes, # Espaço extra no cabeçalho, como na planilha real
+        'Cliente': [f'Cliente {i}' for i in range(n_linhas)],
+        'MESA': mesas,
+        'VALOR': valores,
+        'DATA_REC': datas,
+        'OBS': 'observação',
+        ' ': None
+    })
+    df.loc[rng.random(n_linhas) < 0.02, :] = None # Linhas em branco
+    return df
+
+def salvar_planilha(df, pasta, sheet_name='Mesas', xlsx=True):
+    """
+    Salva a planilha sintética em XLSX e CSV (cabeçalho na 4ª linha). Retorna os dois caminhos
+    (o do XLSX é None com xlsx=False, já que gravá-lo é lento em planilhas grandes).
+    """
+    caminho_xlsx = os.path.join(pasta, f'mesas_{len(df)}.xlsx') if xlsx else None
+    caminho_csv = os.path.join(pasta, f'mesas_{len(df)}.csv')
+    if xlsx:
+        with pd.ExcelWriter(caminho_xlsx) as writer:
+            df.to_excel(writer, sheet_name=sheet_name, startrow=LINHA_CABECALHO, index=False)
+    with open(caminho_csv, 'w', encoding='utf-8') as f:
+        f.write('\n' * LINHA_CABECALHO)
+        df.to_csv(f, index=False)
+    return caminho_xlsx, caminho_csv
+
+# ==============================================================================
+# 2. MEDIÇÕES
+# ==============================================================================
+
+def medir(funcao, repeticoes=3):
+    """Executa a função `repeticoes` vezes e retorna o menor tempo em segundos."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+def ler_excel_completo(caminho, sheet_name='Mesas'):
+    """Leitura original do dashboard: planilha inteira com pd.read_excel e seleção das colunas depois."""
+    df = pd.read_excel(caminho, sheet_name=sheet_name, header=LINHA_CABECALHO)
+    df = df.dropna(axis=1, how='all')
+    df = df.dropna(how='all')
+    df.columns = df.columns.str.strip()
+    return df[COLUNAS_PLANILHA]
+
+def benchmark_fontes(n_linhas, pasta, repeticoes=3):
+    """Compara o tempo de leitura da planilha em cada fonte de dados."""
+    caminho_xlsx, caminho_csv = salvar_planilha(gerar_planilha_sintetica(n_linhas), pasta)
+    fonte_xlsx = FonteArquivoLocal(caminho_xlsx, 'Mesas')
+    fonte_csv = FonteArquivoLocal(caminho_csv, 'Mesas')
+    return {
+        'pd.read_excel (original)': medir(lambda: ler_excel_completo(caminho_xlsx), repeticoes),
+        'FonteXLSX (streaming)': medir(fonte_xlsx.carregar, repeticoes),
+        'FonteCSV': medir(fonte_csv.carregar, repeticoes)
+    }
+
+def gerar_valores_aleatorios(n_linhas, semente=0):
+    """Gera valores aleatórios que exercitam todas as regras: vazios, zero, preços exatos e valores quaisquer."""
+    rng = np.random.default_rng(semente)
+    especiais = np.array([np.nan, 0.0, *PRECOS.values()], dtype=float)
+    quaisquer = rng.uniform(-100, 3 * max(PRECOS.values()), size=n_linhas).round(rng.integers(0, 3))
+    return np.where(rng.random(n_linhas) < 0.6, especiais[rng.integers(len(especiais), size=n_linhas)], quaisquer)
+
+def verificar_classificacao(n_linhas, semente=0):
+    """
+    Garante que classificar_mesas e classificar_mesas_categorico produzem exatamente os mesmos rótulos
+    que classificar_mesa em valores aleatórios. Retorna o DataFrame verificado.
+    """
+    df = pd.DataFrame({'VALOR': gerar_valores_aleatorios(n_linhas, semente)})
+    esperado = df.apply(classificar_mesa, axis=1).to_numpy()
+    for funcao in (classificar_mesas, classificar_mesas_categorico):
+        obtido = np.asarray(funcao(df['VALOR'].to_numpy()), dtype=object)
+        divergencias = np.flatnonzero(esperado != obtido)
+        if len(divergencias):
+            i = divergencias[0]
+            raise AssertionError(f'{funcao.__name__}: {len(divergencias)} classificações divergentes (ex.: VALOR={df["VALOR"].iat[i]}: {esperado[i]} != {obtido[i]})')
+    return df
+
+def benchmark_classificacao(n_linhas, repeticoes=3):
+    """Verifica a classificação vetorizada (verificar_classificacao) e compara o tempo com o apply linha a linha."""
+    df = verificar_classificacao(n_linhas)
+    return {
+        'apply(classificar_mesa)': medir(lambda: df.apply(classificar_mesa, axis=1), repeticoes),
+        'classificar_mesas': medir(lambda: classificar_mesas(df['VALOR'].to_numpy()), repeticoes)
+    }
+
+def planilha_lida(n_linhas, semente=0):
+    """Planilha sintética já no formato entregue pelas fontes de dados (somente as colunas usadas, como texto)."""
+    df = gerar_planilha_sintetica(n_linhas, semente).rename(columns=str.strip)
+    df = df.dropna(how='all')[COLUNAS_PLANILHA].reset_index(drop=True)
+    return df.astype({**{c: 'float64' for c in COLUNAS_NUMERICAS}, **{c: 'object' for c in COLUNAS_TEXTO}})
+
+def alterar_planilha(df, rng, n_alteracoes):
+    """Simula uma atualização da planilha: pagamentos, troca de responsável, linhas removidas e incluídas."""
+    df = df.copy()
+    linhas = rng.choice(len(df), size=min(n_alteracoes, len(df)), replace=False)
+    pagamentos, trocas, removidas = np.array_split(linhas, 3)
+    df.loc[pagamentos, 'VALOR'] = np.array(VALORES_POSSIVEIS, dtype=float)[rng.integers(len(VALORES_POSSIVEIS), size=len(pagamentos))]
+    df.loc[pagamentos, 'DATA_REC'] = '02/10/2025'
+    df.loc[trocas, 'NOME'] = [f'Responsável novo {i}' for i in rng.integers(3, size=len(trocas))]
+    df = df.drop(index=removidas)
+    proximo_ord = int(pd.to_numeric(df['ORD'], errors='coerce').max()) + 1
+    n_inseridas = max(1, len(removidas))
+    inseridas = pd.DataFrame({
+        'ORD': np.arange(proximo_ord, proximo_ord + n_inseridas, dtype=float),
+        'NOME': 'Responsável novo 0',
+        'Cliente': 'Cliente novo',
+        'MESA': np.nan,
+        'VALOR': np.array(VALORES_POSSIVEIS, dtype=float)[rng.integers(len(VALORES_POSSIVEIS), size=n_inseridas)],
+        'DATA_REC': None
+    }).astype({c: 'object' for c in COLUNAS_TEXTO})
+    return pd.concat([df, inseridas], ignore_index=True)
+
+def alteracoes_por_merge(anterior, novo):
+    """ORDs inseridos, alterados e removidos calculados com um merge do pandas (referência para o registro de alterações)."""
+    colunas = ['ORD'] + COLUNAS_COMPARADAS
+    juntos = anterior[colunas].astype(object).merge(novo[colunas].astype(object), on='ORD', how='outer', suffixes=('_a', '_n'), indicator=True)
+    em_ambos = juntos[juntos['_merge'] == 'both']
+    diferente = np.zeros(len(em_ambos), dtype=bool)
+    for coluna in COLUNAS_COMPARADAS:
+        a, n = em_ambos[f'{coluna}_a'], em_ambos[f'{coluna}_n']
+        diferente |= ~((a == n) | (a.isna() & n.isna())).to_numpy()
+    return {
+        'inserida': set(juntos.loc[juntos['_merge'] == 'right_only', 'ORD']),
+        'alterada': set(em_ambos.loc[diferente, 'ORD']),
+        'removida': set(juntos.loc[juntos['_merge'] == 'left_only', 'ORD'])
+    }
+
+def verificar_registro_alteracoes(n_linhas, rodadas=10, semente=0):
+    """
+    Aplica `rodadas` atualizações sucessivas à planilha sintética e verifica, a cada uma, que o registro
+    de alterações de processar_incremental lista exatamente os ORDs que o merge do pandas aponta como
+    alterados. Retorna o resultado anterior e a planilha da última atualização.
+    """
+    rng = np.random.default_rng(semente)
+    df = planilha_lida(n_linhas, semente)
+    resultado = processar_dados(df)
+    n_alteracoes = max(3, n_linhas // 200)
+    for _ in range(rodadas):
+        anterior, df = resultado, alterar_planilha(df, rng, n_alteracoes)
+        resultado, alteracoes = processar_incremental(df, anterior)
+        if alteracoes is None:
+            raise AssertionError('processar_incremental recalculou tudo em uma atualização pequena')
+        for tipo, esperados in alteracoes_por_merge(anterior.df_limpo, resultado.df_limpo).items():
+            obtidos = set(alteracoes.loc[alteracoes['Tipo'] == tipo, 'ORD'])
+            if obtidos != esperados:
+                raise AssertionError(f'ORDs de tipo {tipo} divergentes: {sorted(obtidos ^ esperados)[:10]}')
+    return anterior, df
+
+def benchmark_incremental(n_linhas, rodadas=10, repeticoes=3, semente=0):
+    """
+    Verifica o registro de alterações (verificar_registro_alteracoes) e compara o tempo de
+    processar_incremental com o de processar_dados. A igualdade dos resultados é testada em test_dados.py.
+    """
+    anterior, df = verificar_registro_alteracoes(n_linhas, rodadas, semente)
+    return {
+        'processar_dados': medir(lambda: processar_dados(df), repeticoes),
+        'processar_incremental': medir(lambda: processar_incremental(df, anterior), repeticoes)
+    }
+
+def metricas_por_filtros(df_limpo):
+    """
+    Métricas calculadas como antes: um filtro (varredura + cópia) do DataFrame por métrica, ORDs
+    faltantes com conjuntos e resumo por responsável com groupby + merge.
+    """
+    total_esperado = int(df_limpo['ORD'].max()) if not df_limpo.empty else 0
+    resumo_responsavel = df_limpo.groupby('NOME', observed=True).agg(Mesas_Distribuidas=('ORD', 'count'), Total_Recebido=('VALOR_CALCULADO', 'sum')).reset_index()
+    patrocinios_por_responsavel = df_limpo[df_limpo['CLASSIFICACAO'] == 'PATROCÍNIO'].groupby('NOME', observed=True).size().reset_index(name='Patrocinios')
+    resumo_responsavel = pd.merge(resumo_responsavel, patrocinios_por_responsavel, on='NOME', how='left').fillna(0)
+    ord_faltantes = sorted(set(range(1, total_esperado + 1)) - set(df_limpo['ORD'].astype(int).unique()))
+    df_patrocinios = df_limpo[df_limpo['CLASSIFICACAO'] == 'PATROCÍNIO']
+    return {
+        'total_esperado': total_esperado,
+        'ord_faltantes': ord_faltantes,
+        'total_patrocinios': len(df_patrocinios),
+        'valor_patrocinios_total': df_patrocinios['VALOR_CALCULADO'].sum(),
+        'mesas_pagas': len(df_limpo[df_limpo['CLASSIFICACAO'] == 'MESA PAGA']),
+        'total_mesas_pagas': df_limpo[df_limpo['CLASSIFICACAO'] == 'MESA PAGA']['VALOR_CALCULADO'].sum(),
+        'meia_entrada': len(df_limpo[df_limpo['CLASSIFICACAO'] == 'MEIA ENTRADA']),
+        'total_meia_entrada': df_limpo[df_limpo['CLASSIFICACAO'] == 'MEIA ENTRADA']['VALOR_CALCULADO'].sum(),
+        'mesas_pendentes_com_dados': len(df_limpo[df_limpo['CLASSIFICACAO'] == 'PENDENTE']),
+        'total_recebido': df_limpo[df_limpo['VALOR_CALCULADO'] > 0]['VALOR_CALCULADO'].sum(),
+        'resumo_responsavel': finalizar_resumo_responsavel(resumo_responsavel)
+    }
+
+def metricas_em_uma_passada(df_limpo):
+    """As mesmas métricas pelas funções de calcular_metricas (contagens pelos códigos categóricos)."""
+    total_esperado = int(df_limpo['ORD'].max()) if not df_limpo.empty else 0
+    return (
+        totais_por_classificacao(df_limpo),
+        ords_faltantes(df_limpo['ORD'], total_esperado),
+        finalizar_resumo_responsavel(calcular_resumo_responsavel(df_limpo))
+    )
+
+def benchmark_metricas(n_linhas, repeticoes=3, semente=0):
+    """
+    Verifica que calcular_metricas (uma passada pelos códigos das classificações e dos responsáveis)
+    chega às mesmas métricas que os filtros por métrica e compara o tempo das duas versões.
+    """
+    df = planilha_lida(n_linhas, semente)
+    df = df[df.index % 50 != 7] # Alguns ORDs faltantes
+    df_limpo = processar_dados(df).df_limpo
+    esperado, resultado = metricas_por_filtros(df_limpo), calcular_metricas(df_limpo)
+    for campo, valor in esperado.items():
+        obtido = getattr(resultado, campo)
+        if campo == 'resumo_responsavel':
+            pd.testing.assert_frame_equal(valor, obtido, check_exact=False, obj=campo)
+        elif not (np.array_equal(valor, obtido) if campo == 'ord_faltantes' else np.isclose(valor, obtido)):
+            raise AssertionError(f'{campo} divergente: {valor} != {obtido}')
+    return {
+        'filtros por métrica': medir(lambda: metricas_por_filtros(df_limpo), repeticoes),
+        'uma passada': medir(lambda: metricas_em_uma_passada(df_limpo), repeticoes)
+    }
+
+def esquema_anterior(df_limpo):
+    """Reconstrói df_limpo nos tipos antigos: textos como object, ORD/MESA float (-1 = sem mesa), DATA_REC texto com '-'."""
+    return pd.DataFrame({
+        'ORD': df_limpo['ORD'].astype('float64'),
+        'NOME': df_limpo['NOME'].astype(object),
+        'Cliente': df_limpo['Cliente'].astype(object),
+        'MESA': df_limpo['MESA'].astype('float64').fillna(-1),
+        'VALOR': df_limpo['VALOR'],
+        'DATA_REC': df_limpo['DATA_REC'].dt.strftime('%d/%m/%Y').fillna('-').astype(object),
+        'VALOR_CALCULADO': df_limpo['VALOR_CALCULADO'],
+        'CLASSIFICACAO': df_limpo['CLASSIFICACAO'].astype(object)
+    }, index=df_limpo.index)
+
+def benchmark_memoria(n_linhas, semente=0):
+    """Compara a memória (MB, incluindo os textos) de df_limpo nos tipos antigos e no esquema compacto."""
+    df_limpo = processar_dados(planilha_lida(n_linhas, semente)).df_limpo
+    return {
+        'tipos antigos': esquema_anterior(df_limpo).memory_usage(deep=True).sum() / 2**20,
+        'esquema compacto': df_limpo.memory_usage(deep=True).sum() / 2**20
+    }
+
+def consultar_snapshots_em_pickle(caminhos, nome):
+    """Sem o histórico: carrega cada snapshot salvo e calcula no pandas o recebido do responsável por versão e por dia."""
+    recebido_por_versao = []
+    for caminho in caminhos:
+        with open(caminho, 'rb') as f:
+            df_limpo = pickle.load(f).df_limpo
+        do_responsavel = df_limpo[(df_limpo['NOME'] == nome) & (df_limpo['VALOR'] > 0)]
+        recebido_por_versao.append(do_responsavel['VALOR'].sum())
+    return recebido_por_versao, do_responsavel.groupby('DATA_REC')['VALOR'].sum().cumsum()
+
+def benchmark_historico(n_linhas, pasta, versoes=5, repeticoes=3, semente=0):
+    """
+    Registra `versoes` atualizações sucessivas da planilha sintética no histórico SQLite, verifica que
+    as consultas do histórico batem com o pandas e compara com guardar e reler cada snapshot em pickle.
+    Retorna (tempos, espaço em disco em MB).
+    """
+    rng = np.random.default_rng(semente)
+    df = planilha_lida(n_linhas, semente)
+    historico = HistoricoSnapshots(os.path.join(pasta, f'historico_{n_linhas}.sqlite3'))
+    resultado = processar_dados(df)
+    caminhos, tempos_registro = [], []
+    for versao in range(versoes):
+        if versao:
+            df = alterar_planilha(df, rng, max(3, n_linhas // 200))
+            resultado, _ = processar_incremental(df, resultado)
+        caminhos.append(os.path.join(pasta, f'snapshot_{n_linhas}_{versao}.pkl'))
+        with open(caminhos[-1], 'wb') as f:
+            pickle.dump(resultado, f, protocol=pickle.HIGHEST_PROTOCOL)
+        inicio = time.perf_counter()
+        historico.registrar(f'{n_linhas}-{versao}', resultado, datetime(2025, 9, 1 + versao))
+        tempos_registro.append(time.perf_counter() - inicio)
+
+    nome = resultado.resumo_responsavel['NOME'].iat[0]
+    recebido_por_versao, acumulado_por_dia = consultar_snapshots_em_pickle(caminhos, nome)
+    if not np.allclose(historico.evolucao_totais(nome)['Total_Recebido'], recebido_por_versao):
+        raise AssertionError('evolucao_totais diverge do recebido por versão calculado no pandas')
+    if not np.allclose(historico.recebimentos_por_dia(nome)['Recebido_Acumulado'], acumulado_por_dia.to_numpy()):
+        raise AssertionError('recebimentos_por_dia diverge do acumulado por dia calculado no pandas')
+    print(f'\nRegistro de uma versão no histórico ({n_linhas} linhas): {np.mean(tempos_registro[1:] or tempos_registro) * 1000:.1f} ms em média')
+    tempos = {
+        'snapshots em pickle': medir(lambda: consultar_snapshots_em_pickle(caminhos, nome), repeticoes),
+        'histórico SQLite': medir(lambda: (historico.evolucao_totais(nome), historico.recebimentos_por_dia(nome)), repeticoes)
+    }
+    espaco = {
+        'snapshots em pickle': sum(os.path.getsize(caminho) for caminho in caminhos) / 2**20,
+        'histórico SQLite': historico.estatisticas()['bytes'] / 2**20
+    }
+    return tempos, espaco
+
+def benchmark_dados_brutos(n_linhas, repeticoes=3, semente=0, tamanho_pagina=100):
+    """
+    Custo por rerun da aba Dados Brutos: antes, a tabela inteira formatada mais o CSV completo montado
+    para o botão de download; agora, a busca no índice de palavras e só a página visível formatada.
+    Também mede a construção do índice (uma vez por versão) e a geração dos arquivos (só no clique).
+    """
+    df_limpo = processar_dados(planilha_lida(n_linhas, semente)).df_limpo
+    todas = np.arange(len(df_limpo))
+    termo = str(df_limpo['NOME'].iat[0])
+    inicio = time.perf_counter()
+    indice = IndiceTexto(df_limpo)
+    print(f'\nÍndice de busca ({n_linhas} linhas): construído em {(time.perf_counter() - inicio) * 1000:.1f} ms')
+    for formato in ['csv', 'parquet']:
+        print(f'Exportação {formato} ({n_linhas} linhas): {medir(lambda: gerar_exportacao(df_limpo, formato).close(), 1) * 1000:.1f} ms')
+
+    def pagina(posicoes):
+        return montar_dados_brutos_display(df_limpo.iloc[posicoes[:tamanho_pagina]])
+
+    return {
+        'tabela + CSV a cada rerun': medir(lambda: (montar_dados_brutos_display(df_limpo), df_limpo.to_csv(index=False, encoding='utf-8-sig')), repeticoes),
+        'página sem busca': medir(lambda: pagina(todas), repeticoes),
+        'página com busca': medir(lambda: pagina(np.intersect1d(todas, indice.buscar(termo), assume_unique=True)), repeticoes)
+    }
+
+def consultar_por_filtro(df_limpo, nome, mesa):
+    """Consulta original: filtra o responsável pela máscara e refaz o resumo dele; idem para a mesa."""
+    df_responsavel = df_limpo[df_limpo['NOME'] == nome]
+    resumo = finalizar_resumo_responsavel(df_responsavel.groupby('NOME', observed=True).agg(
+        Mesas_Distribuidas=('ORD', 'count'),
+        Total_Recebido=('VALOR_CALCULADO', 'sum'),
+        Patrocinios=('CLASSIFICACAO', lambda x: (x == 'PATROCÍNIO').sum())
+    ).reset_index())
+    return resumo, df_responsavel, df_limpo[df_limpo['MESA'] == mesa]
+
+def benchmark_consultas(n_linhas, repeticoes=3, semente=0, n_consultas=100):
+    """
+    Tempo médio de uma consulta "saldo do responsável + linhas dele + quem está com a mesa": pela
+    máscara e groupby sobre a planilha inteira e pelo IndiceConsultas (construído uma vez por versão).
+    Verifica que os dois caminhos dão o mesmo resultado.
+    """
+    resultado = processar_dados(planilha_lida(n_linhas, semente))
+    df_limpo = resultado.df_limpo
+    inicio = time.perf_counter()
+    indice = IndiceConsultas(df_limpo, resultado.resumo_responsavel)
+    print(f'\nÍndices de consulta ({n_linhas} linhas): construídos em {(time.perf_counter() - inicio) * 1000:.1f} ms')
+    rng = np.random.default_rng(semente)
+    nomes = rng.choice(indice.nomes, n_consultas)
+    mesas = rng.choice(df_limpo['MESA'].dropna().to_numpy(), n_consultas)
+
+    for nome, mesa in zip(nomes[:10], mesas[:10]):
+        resumo, df_responsavel, df_mesa = consultar_por_filtro(df_limpo, nome, mesa)
+        saldo = indice.saldo_responsavel(nome)
+        if not (np.isclose(saldo['saldo'], resumo['A_Receber'].iat[0]) and df_responsavel.index.equals(df_limpo.index[indice.posicoes_responsavel(nome)])
+                and df_mesa.index.equals(df_limpo.index[indice.posicoes_mesa(mesa)])):
+            raise AssertionError(f'IndiceConsultas diverge da consulta por filtro ({nome}, mesa {mesa})')
+
+    def por_indice():
+        for nome, mesa in zip(nomes, mesas):
+            indice.saldo_responsavel(nome), df_limpo.iloc[indice.posicoes_responsavel(nome)], df_limpo.iloc[indice.posicoes_mesa(mesa)]
+
+    return {
+        'máscara + groupby': medir(lambda: [consultar_por_filtro(df_limpo, nome, mesa) for nome, mesa in zip(nomes, mesas)], repeticoes) / n_consultas,
+        'IndiceConsultas': medir(por_indice, repeticoes) / n_consultas
+    }
+
+class FonteComLatencia(FonteArquivoLocal):
+    """Arquivo local com um atraso fixo antes de cada leitura, simulando o download de uma planilha."""
+
+    def __init__(self, caminho, sheet_name, latencia):
+        super().__init__(caminho, sheet_name)
+        self.latencia = latencia
+
+    def obter_conteudo(self, timeout=15, tentativas=3):
+        time.sleep(self.latencia)
+        return super().obter_conteudo(timeout=timeout, tentativas=tentativas)
+
+def benchmark_varias_fontes(n_linhas, pasta, n_fontes=4, latencia=0.5, repeticoes=3):
+    """
+    Primeira carga de `n_fontes` eventos com `latencia` segundos de download cada (mais uma fonte
+    inexistente), consultados um após o outro e pelo GrupoCarregadores em paralelo. Verifica que a
+    fonte com erro não impede a publicação das demais.
+    """
+    caminho_xlsx, _ = salvar_planilha(gerar_planilha_sintetica(n_linhas), pasta)
+
+    def criar_carregadores():
+        carregadores = {}
+        for i in range(n_fontes):
+            caminho_snapshot = os.path.join(pasta, f'fontes_{n_linhas}_{i}.pkl')
+            if os.path.exists(caminho_snapshot): # Sempre a primeira carga: sem snapshot salvo
+                os.remove(caminho_snapshot)
+            carregadores[f'evento_{i}'] = CarregadorDados(FonteComLatencia(caminho_xlsx, 'Mesas', latencia), caminho_snapshot)
+        carregadores['quebrado'] = CarregadorDados(FonteComLatencia(os.path.join(pasta, 'nao_existe.xlsx'), 'Mesas', latencia), os.path.join(pasta, 'quebrado.pkl'))
+        return carregadores
+
+    def sequencial():
+        for carregador in criar_carregadores().values():
+            carregador.revalidar()
+
+    def em_paralelo():
+        grupo = GrupoCarregadores(criar_carregadores(), max_simultaneas=n_fontes + 1)
+        publicados = grupo.revalidar()
+        if len(publicados) != n_fontes or grupo.carregadores['quebrado'].ultimo_erro is None:
+            raise AssertionError('A fonte com erro afetou a publicação das demais')
+
+    return {
+        'fontes em sequência': medir(sequencial, repeticoes),
+        'GrupoCarregadores': medir(em_paralelo, repeticoes)
+    }
+
+def imprimir_memoria(titulo, resultados):
+    """Imprime a memória de cada variante comparada à primeira (referência)."""
+    print(f'\n=== {titulo} ===')
+    base = next(iter(resultados.values()))
+    for nome, megabytes in resultados.items():
+        print(f'{nome:<28} {megabytes:10.2f} MB  ({base / megabytes:5.1f}x menor)')
+
+def imprimir_resultados(titulo, resultados):
+    """Imprime os tempos de cada variante comparados à primeira (referência)."""
+    print(f'\n=== {titulo} ===')
+    base = next(iter(resultados.values()))
+    for nome, tempo in resultados.items():
+        print(f'{nome:<28} {tempo * 1000:10.1f} ms  ({base / tempo:5.1f}x)')
+
+# ==============================================================================
+# 3. SUÍTE POR ETAPAS DO PIPELINE
+# ==============================================================================
+
+TAMANHOS_SUITE = [100, 10000, 1000000]
+
+# Diferenças abaixo deste tempo (em segundos) são ruído e nunca contam como regressão
+TEMPO_MINIMO_REGRESSAO = 0.005
+
+def medir_memoria(funcao):
+    """Executa a função uma vez com o tracemalloc ligado e retorna o pico de memória alocada em bytes."""
+    tracemalloc.start()
+    try:
+        funcao()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def filtrar_estados_aleatorios(motor, df_limpo, n_estados=20, semente=0):
+    """Aplica `n_estados` combinações aleatórias de filtros da sidebar (sem memorização)."""
+    rng = np.random.default_rng(semente)
+    classificacoes = df_limpo['CLASSIFICACAO'].unique()
+    responsaveis = ['Todos', *df_limpo['NOME'].unique()[:20]]
+    for _ in range(n_estados):
+        selecionadas = classificacoes[rng.random(len(classificacoes)) < 0.7]
+        minimo, maximo = np.sort(rng.choice([0.0, 300.0, 600.0, 1000.0, 1500.0], size=2))
+        motor.posicoes(selecionadas, responsaveis[rng.integers(len(responsaveis))], (minimo, maximo))
+
+def etapas_pipeline(caminho_xlsx, caminho_csv):
+    """
+    Retorna a lista (nome, função) das etapas do pipeline, na ordem em que o dashboard as executa.
+    Cada etapa recebe as saídas das anteriores, calculadas uma vez fora da medição.
+    """
+    df = FonteArquivoLocal(caminho_csv, 'Mesas').carregar()
+    df_limpo = processar_dados(df).df_limpo # Mesmo DataFrame (e tipos) que o dashboard usa
+    cubo = CuboAgregado(df_limpo)
+    motor = MotorFiltros(df_limpo)
+    resumo_exec = montar_resumo_exec(cubo.metricas())
+    return [
+        ('leitura_xlsx', lambda: FonteArquivoLocal(caminho_xlsx, 'Mesas').carregar()),
+        ('leitura_csv', lambda: FonteArquivoLocal(caminho_csv, 'Mesas').carregar()),
+        ('limpeza', lambda: limpar_planilha(df)),
+        ('classificacao', lambda: classificar_mesas_categorico(df_limpo['VALOR'].to_numpy())),
+        ('metricas', lambda: calcular_metricas(df_limpo)),
+        ('agrupamentos', lambda: CuboAgregado(df_limpo).resumo_por_responsavel()),
+        ('indices_filtros', lambda: MotorFiltros(df_limpo)),
+        ('filtragem', lambda: filtrar_estados_aleatorios(motor, df_limpo)),
+        ('formatacao', lambda: (montar_dados_brutos_display(df_limpo), montar_resumo_display(cubo.resumo_por_responsavel()))),
+        # Mesmo caminho dos botões de download do dashboard
+        ('exportacao_csv', lambda: gerar_exportacao(df_limpo, 'csv').close()),
+        ('exportacao_parquet', lambda: gerar_exportacao(df_limpo, 'parquet').close()),
+        ('exportacao_xlsx', lambda: gerar_exportacao(df_limpo, 'xlsx').close()),
+        ('pdf', lambda: gerar_pdf_relatorio(df_limpo, resumo_exec)),
+    ]
+
+def executar_suite(tamanhos, pasta, repeticoes=3, etapas=None):
+    """
+    Mede tempo (menor de `repeticoes`) e pico de memória de cada etapa para cada tamanho de planilha.
+    Com 1 milhão de linhas, gravar o XLSX e gerar o PDF levam alguns minutos cada.
+    """
+    resultados = []
+    for n_linhas in tamanhos:
+        print(f'\n=== Pipeline: {n_linhas} linhas ===')
+        caminho_xlsx, caminho_csv = salvar_planilha(gerar_planilha_sintetica(n_linhas), pasta, xlsx=not etapas or 'leitura_xlsx' in etapas)
+        for nome, funcao in etapas_pipeline(caminho_xlsx, caminho_csv):
+            if etapas and nome not in etapas:
+                continue
+            segundos = medir(funcao, repeticoes)
+            pico_mb = medir_memoria(funcao) / 2**20
+            resultados.append({'linhas': n_linhas, 'etapa': nome, 'segundos': segundos, 'pico_memoria_mb': pico_mb})
+            print(f'{nome:<20} {segundos * 1000:10.1f} ms  {pico_mb:9.1f} MB')
+    return resultados
+
+def salvar_resultados(resultados, caminho):
+    """Grava os resultados da suíte em JSON, junto com a identificação do ambiente."""
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump({
+            'gerado_em': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'plataforma': platform.platform(),
+            'resultados': resultados
+        }, f, indent=2, ensure_ascii=False)
+
+def verificar_regressoes(resultados, caminho_referencia, tolerancia=1.5):
+    """
+    Compara os resultados com os de um JSON de referência (mesmo tamanho e etapa) e retorna a lista
+    de regressões: etapas que ficaram mais de `tolerancia` vezes mais lentas ou maiores em memória.
+    """
+    with open(caminho_referencia, encoding='utf-8') as f:
+        referencia = {(r['linhas'], r['etapa']): r for r in json.load(f)['resultados']}
+    regressoes = []
+    for r in resultados:
+        base = referencia.get((r['linhas'], r['etapa']))
+        if base is None:
+            continue
+        if r['segundos'] > base['segundos'] * tolerancia and r['segundos'] - base['segundos'] > TEMPO_MINIMO_REGRESSAO:
+            regressoes.append(f'{r["etapa"]} ({r["linhas"]} linhas): {base["segundos"] * 1000:.1f} ms -> {r["segundos"] * 1000:.1f} ms')
+        if r['pico_memoria_mb'] > base['pico_memoria_mb'] * tolerancia and r['pico_memoria_mb'] - base['pico_memoria_mb'] > 1:
+            regressoes.append(f'{r["etapa"]} ({r["linhas"]} linhas): {base["pico_memoria_mb"]:.1f} MB -> {r["pico_memoria_mb"]:.1f} MB')
+    return regressoes
+
+# ==============================================================================
+# 4. VERIFICAÇÕES DE EQUIVALÊNCIA
+# ==============================================================================
+# As mesmas verificações que os benchmarks fazem antes de medir, em tamanhos pequenos: rodam em
+# segundos (python benchmark.py --verificar) e saem com código 1 se alguma falhar.
+
+TAMANHOS_VERIFICACAO = [100, 2000]
+
+VERIFICACOES = {
+    'classificação vetorizada = classificar_mesa': verificar_classificacao,
+    'registro de alterações = merge do pandas': verificar_registro_alteracoes
+}
+
+def executar_verificacoes(tamanhos):
+    """Executa cada verificação em cada tamanho, imprimindo o resultado. Retorna a lista de falhas."""
+    falhas = []
+    for n_linhas in tamanhos:
+        for descricao, verificacao in VERIFICACOES.items():
+            inicio = time.perf_counter()
+            try:
+                verificacao(n_linhas)
+            except AssertionError as e:
+                falhas.append(f'FALHOU {descricao} ({n_linhas} linhas): {e}')
+                continue
+            print(f'ok {descricao} ({n_linhas} linhas, {time.perf_counter() - inicio:.2f} s)')
+    return falhas
+
+# ==============================================================================
+# 5. EXECUÇÃO
+# ==============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do Dashboard Baile 2025 com dados sintéticos.')
+    parser.add_argument('--linhas', type=int, nargs='+', help='Tamanhos de planilha a testar (padrão: 1000 10000; na suíte: 100 10000 1000000)')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--suite', action='store_true', help='Mede cada etapa do pipeline (tempo e pico de memória)')
+    parser.add_argument('--etapas', nargs='+', help='Executa apenas estas etapas da suíte (ex.: limpeza metricas pdf)')
+    parser.add_argument('--json', help='Arquivo onde gravar os resultados da suíte')
+    parser.add_argument('--referencia', help='JSON de uma execução anterior da suíte para detectar regressões')
+    parser.add_argument('--tolerancia', type=float, default=1.5, help='Razão máxima aceita em relação à referência')
+    parser.add_argument('--verificar', action='store_true', help='Só executa as verificações de equivalência (em segundos, sem medir tempos)')
+    args = parser.parse_args()
+    ativar_copy_on_write()
+
+    if args.verificar:
+        falhas = executar_verificacoes(args.linhas or TAMANHOS_VERIFICACAO)
+        if falhas:
+            print('\n'.join(falhas))
+            sys.exit(1)
+        return
+
+    with tempfile.TemporaryDirectory() as pasta:
+        if args.suite:
+            resultados = executar_suite(args.linhas or TAMANHOS_SUITE, pasta, args.repeticoes, args.etapas)
+            if args.json:
+                salvar_resultados(resultados, args.json)
+            if args.referencia:
+                regressoes = verificar_regressoes(resultados, args.referencia, args.tolerancia)
+                if regressoes:
+                    print(f'\n=== Regressões (tolerância {args.tolerancia}x) ===')
+                    print('\n'.join(regressoes))
+                    sys.exit(1)
+                print(f'\nSem regressões em relação a {args.referencia}')
+            return
+        for n_linhas in args.linhas or [1000, 10000]:
+            imprimir_resultados(f'Leitura da planilha: {n_linhas} linhas', benchmark_fontes(n_linhas, pasta, args.repeticoes))
+            imprimir_resultados(f'Classificação: {n_linhas} linhas', benchmark_classificacao(n_linhas, args.repeticoes))
+            imprimir_resultados(f'Métricas: {n_linhas} linhas', benchmark_metricas(n_linhas, args.repeticoes))
+            imprimir_resultados(f'Atualização incremental: {n_linhas} linhas', benchmark_incremental(n_linhas, repeticoes=args.repeticoes))
+            imprimir_memoria(f'Memória de df_limpo: {n_linhas} linhas', benchmark_memoria(n_linhas))
+            tempos, espaco = benchmark_historico(n_linhas, pasta, repeticoes=args.repeticoes)
+            imprimir_resultados(f'Evolução de um responsável ({n_linhas} linhas, 5 versões)', tempos)
+            imprimir_memoria(f'Espaço em disco do histórico: {n_linhas} linhas, 5 versões', espaco)
+            imprimir_resultados(f'Aba Dados Brutos: {n_linhas} linhas', benchmark_dados_brutos(n_linhas, args.repeticoes))
+            imprimir_resultados(f'Consulta de um responsável e uma mesa: {n_linhas} linhas', benchmark_consultas(n_linhas, args.repeticoes))
+            imprimir_resultados(f'Primeira carga de 4 eventos + 1 fonte com erro ({n_linhas} linhas, 0,5 s de download cada)', benchmark_varias_fontes(n_linhas, pasta, repeticoes=args.repeticoes))
+
+if __name__ == '__main__':
+    main()
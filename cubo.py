@@ -0,0 +1,88 @@
+import pandas as pd
+from dados import calcular_previsao
+
+# ==============================================================================
+# 1. CUBO DE AGREGADOS
+# ==============================================================================
+
+# Chave do cubo: cada filtro da sidebar corresponde a uma dessas colunas. O "bucket" de valor é o
+# próprio VALOR_CALCULADO, que tem poucos valores distintos, então o filtro de faixa continua exato.
+CHAVES_CUBO = ['NOME', 'CLASSIFICACAO', 'VALOR_CALCULADO']
+
+class CuboAgregado:
+    """
+    Contagem e soma de valores pré-agregadas por (NOME, CLASSIFICACAO, VALOR_CALCULADO).
+    É construído uma vez por carga de dados; os filtros e as métricas passam a custar O(grupos)
+    em vez de O(linhas).
+    """
+
+    def __init__(self, df_limpo=None, grupos=None):
+        if grupos is None:
+            grupos = df_limpo.groupby(CHAVES_CUBO, sort=False, observed=True).agg(Mesas=('ORD', 'size'), Valor=('VALOR_CALCULADO', 'sum')).reset_index()
+        self.grupos = grupos
+
+    def __len__(self):
+        return len(self.grupos)
+
+    def filtrar(self, classificacoes, responsavel, valor_range):
+        """Aplica os filtros da sidebar aos grupos (mesma semântica do filtro por linhas)."""
+        g = self.grupos
+        mascara = g['CLASSIFICACAO'].isin(classificacoes) & g['VALOR_CALCULADO'].between(valor_range[0], valor_range[1])
+        if responsavel != 'Todos':
+            mascara &= g['NOME'] == responsavel
+        return CuboAgregado(grupos=g[mascara])
+
+    # ==========================================================================
+    # Métricas e resumos
+    # ==========================================================================
+
+    def total_mesas(self):
+        return int(self.grupos['Mesas'].sum())
+
+    def total_recebido(self):
+        return float(self.grupos.loc[self.grupos['VALOR_CALCULADO'] > 0, 'Valor'].sum())
+
+    def total_por_classificacao(self, classificacao):
+        return int(self.grupos.loc[self.grupos['CLASSIFICACAO'] == classificacao, 'Mesas'].sum())
+
+    def metricas(self):
+        """Retorna as métricas do cabeçalho: mesas, patrocínios, recebido, previsão, saldo e percentual."""
+        mesas = self.total_mesas()
+        patrocinios = self.total_por_classificacao('PATROCÍNIO')
+        recebido = self.total_recebido()
+        previsao = calcular_previsao(mesas, patrocinios)
+        return {
+            'mesas': mesas,
+            'mesas_pagas': self.total_por_classificacao('MESA PAGA'),
+            'patrocinios': patrocinios,
+            'recebido': recebido,
+            'previsao': previsao,
+            'saldo': previsao - recebido,
+            'percentual': (recebido / previsao * 100) if previsao > 0 else 0
+        }
+
+    def contagem_por_classificacao(self):
+        """Equivalente a df['CLASSIFICACAO'].value_counts() (colunas Classificacao, Contagem)."""
+        contagem = self.grupos.groupby('CLASSIFICACAO', observed=True)['Mesas'].sum()
+        contagem = contagem[contagem > 0].sort_values(ascending=False, kind='stable')
+        return pd.DataFrame({'Classificacao': contagem.index, 'Contagem': contagem.to_numpy()})
+
+    def valor_por_classificacao(self):
+        """Soma de valores por classificação (colunas Classificacao, Valor)."""
+        valor = self.grupos.groupby('CLASSIFICACAO', observed=True)['Valor'].sum()
+        return pd.DataFrame({'Classificacao': valor.index, 'Valor': valor.to_numpy()})
+
+    def top_responsaveis(self, n=10):
+        """Os `n` responsáveis com maior valor recebido (colunas Responsavel, Valor)."""
+        valor = self.grupos.groupby('NOME', observed=True)['Valor'].sum().nlargest(n)
+        return pd.DataFrame({'Responsavel': valor.index, 'Valor': valor.to_numpy()})
+
+    def resumo_por_responsavel(self):
+        """Mesas, valor recebido, patrocínios, previsão e saldo por responsável, ordenado por mesas."""
+        g = self.grupos
+        resumo = g.groupby('NOME', observed=True).agg(Mesas=('Mesas', 'sum'), Recebido=('Valor', 'sum'))
+        patrocinios = g[g['CLASSIFICACAO'] == 'PATROCÍNIO'].groupby('NOME', observed=True)['Mesas'].sum()
+        resumo['Patrocinios'] = patrocinios.reindex(resumo.index, fill_value=0).astype(int)
+        resumo['Previsao'] = calcular_previsao(resumo['Mesas'], resumo['Patrocinios'])
+        resumo['A_Receber'] = resumo['Previsao'] - resumo['Recebido']
+        return resumo.reset_index().sort_values('Mesas', ascending=False)
@@ -0,0 +1,818 @@
+import pandas as pd
+import numpy as np
+from datetime import datetime
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from desempenho import COLETOR
+
+# ==============================================================================
+# 1. PREÇOS E REGRAS DE CLASSIFICAÇÃO
+# ==============================================================================
+
+# Preços do evento. Para o próximo baile, basta apontar a variável BAILE_PRECOS para um
+# arquivo JSON com as mesmas chaves (ex.: {"MESA": 650, "MEIA_ENTRADA": 325, "PATROCINIO": 1200}).
+PRECOS_PADRAO = {'MESA': 600, 'MEIA_ENTRADA': 300, 'PATROCINIO': 1000}
+
+def carregar_precos(caminho=None):
+    """Retorna a tabela de preços padrão, sobrescrita pelas chaves do arquivo JSON informado (se houver)."""
+    precos = dict(PRECOS_PADRAO)
+    if caminho:
+        with open(caminho, encoding='utf-8') as f:
+            precos.update(json.load(f))
+    return precos
+
+PRECOS = carregar_precos(os.environ.get('BAILE_PRECOS'))
+PRECO_MESA = PRECOS['MESA']
+PRECO_MEIA_ENTRADA = PRECOS['MEIA_ENTRADA']
+VALOR_PATROCINIO = PRECOS['PATROCINIO']
+
+# Regras de classificação por valor, avaliadas em ordem: vence a primeira regra satisfeita.
+# Valores vazios são tratados como 0.
+REGRAS_CLASSIFICACAO = [
+    ('PENDENTE', '==', 0),
+    ('MESA PAGA', '==', PRECO_MESA),
+    ('MEIA ENTRADA', '==', PRECO_MEIA_ENTRADA),
+    ('PATROCÍNIO', '>=', VALOR_PATROCINIO),
+]
+CLASSIFICACAO_PADRAO = 'OUTRO'
+
+# Categorias fixas da coluna CLASSIFICACAO (mesma ordem das regras), iguais em todas as versões dos dados
+CLASSIFICACOES = list(dict.fromkeys([classificacao for classificacao, _, _ in REGRAS_CLASSIFICACAO] + [CLASSIFICACAO_PADRAO]))
+
+OPERADORES = {
+    '==': np.equal,
+    '>=': np.greater_equal,
+    '>': np.greater,
+    '<=': np.less_equal,
+    '<': np.less,
+}
+
+def calcular_previsao(mesas, patrocinios):
+    """
+    Previsão de arrecadação: cada linha da planilha é uma mesa vendida a PRECO_MESA e cada patrocínio
+    vale VALOR_PATROCINIO. Definição única usada no cabeçalho, nos resumos por responsável e no consolidado
+    (aceita números ou colunas).
+    """
+    return (mesas * PRECO_MESA) + (patrocinios * (VALOR_PATROCINIO - PRECO_MESA))
+
+# ==============================================================================
+# 2. ESQUEMA DO DATAFRAME PROCESSADO
+# ==============================================================================
+
+# Tipos das colunas de df_limpo. O DataFrame de cada versão é compartilhado (somente leitura) por
+# todas as sessões, então os tipos compactos reduzem a memória do processo inteiro:
+# - NOME e CLASSIFICACAO se repetem muito e viram categorias (Cliente é quase único por linha e fica como texto);
+# - ORD e MESA são inteiros anuláveis (mesa não atribuída = <NA>, sem valor sentinela);
+# - DATA_REC é data de verdade (NaT quando vazia ou não reconhecida);
+# - VALOR continua float64 (NaN = não informado) e VALOR_CALCULADO é VALOR com 0 no lugar de NaN.
+ESQUEMA_DF_LIMPO = {
+    'ORD': 'Int32',
+    'NOME': 'category',
+    'Cliente': 'object',
+    'MESA': 'Int32',
+    'VALOR': 'float64',
+    'DATA_REC': 'datetime64[ns]',
+    'VALOR_CALCULADO': 'float64',
+    'CLASSIFICACAO': 'category',
+}
+
+# Incrementar sempre que a limpeza, a classificação ou os campos de ResultadoProcessamento mudarem
+VERSAO_ESQUEMA = 2
+
+# Identifica as regras em vigor (esquema + preços): snapshots processados com outras regras são recalculados
+ASSINATURA_PROCESSAMENTO = hashlib.sha1(json.dumps([VERSAO_ESQUEMA, PRECOS], sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+def hash_dados(df):
+    """Hash das colunas lidas da planilha, prefixado pela ASSINATURA_PROCESSAMENTO: muda quando os dados ou as regras mudam."""
+    return f'{ASSINATURA_PROCESSAMENTO}-{hashlib.sha1(pd.util.hash_pandas_object(df, index=False).to_numpy()).hexdigest()}'
+
+def ativar_copy_on_write():
+    """
+    Liga o copy-on-write do pandas (padrão a partir do pandas 3): recortes e filtros do DataFrame
+    compartilhado nunca o alteram. Opção global do processo, chamada só nos pontos de entrada.
+    """
+    if int(pd.__version__.split('.')[0]) < 3:
+        pd.set_option('mode.copy_on_write', True)
+
+def converter_inteiro(serie):
+    """Converte para inteiro anulável (Int32), truncando decimais; o que não for número vira <NA>."""
+    numeros = pd.to_numeric(serie, errors='coerce').astype('float64')
+    numeros = numeros.where(np.isfinite(numeros))
+    return np.trunc(numeros).astype('Int32')
+
+def converter_data(serie):
+    """
+    Converte datas no formato dd/mm/aaaa, ISO (aaaa-mm-dd[ hh:mm:ss]) ou já lidas como data para
+    datetime64; o que não for data vira NaT. Cada valor distinto é convertido uma única vez.
+    """
+    codigos, unicos = pd.factorize(serie) # Valores ausentes ficam com código -1
+    unicos = pd.Series(unicos, dtype=object)
+    datas = pd.to_datetime(unicos, format='%d/%m/%Y', errors='coerce')
+    restantes = datas.isna()
+    if restantes.any(): # ISO antes do dayfirst, que trocaria dia e mês em '2025-10-03'
+        datas[restantes] = pd.to_datetime(unicos[restantes], errors='coerce', format='ISO8601')
+        restantes = datas.isna()
+    if restantes.any(): # Datas com hora ou em outro formato
+        datas[restantes] = pd.to_datetime(unicos[restantes], errors='coerce', dayfirst=True, format='mixed')
+    datas = np.append(datas.to_numpy(dtype='datetime64[ns]'), np.datetime64('NaT', 'ns'))
+    return pd.Series(datas[codigos], index=serie.index)
+
+def categorizar_classificacoes(classificacoes):
+    """Converte rótulos de classificação para o tipo categórico com as categorias fixas de CLASSIFICACOES."""
+    return pd.Categorical(classificacoes, categories=CLASSIFICACOES)
+
+# ==============================================================================
+# 3. FUNÇÕES DE FORMATAÇÃO E CLASSIFICAÇÃO
+# ==============================================================================
+
+def formatar_moeda_br(valor):
+    """Formata um valor numérico para o padrão de moeda brasileira (R$ X.XXX,XX)."""
+    if pd.isna(valor):
+        return 'R$ 0,00'
+    return f'R$ {valor:,.2f}'.replace(',', 'X').replace('.', ',').replace('X', '.')
+
+def _formatar_valores_unicos(serie, funcao):
+    """Aplica `funcao` uma única vez por valor distinto da série e espalha o resultado (exato e vetorizado)."""
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=False)
+    formatados = np.array([funcao(valor) for valor in unicos], dtype=object)
+    return pd.Series(formatados[codigos], index=serie.index, dtype=object)
+
+def formatar_coluna_moeda_br(serie):
+    """Versão vetorizada de formatar_moeda_br para uma coluna inteira."""
+    return _formatar_valores_unicos(serie, formatar_moeda_br)
+
+def formatar_mesa(valor):
+    """Formata o número da mesa para exibição: número inteiro ou '-' para mesas não atribuídas."""
+    return '-' if pd.isna(valor) or valor == -1 else str(int(valor))
+
+def formatar_data(valor):
+    """Formata uma data para exibição (dd/mm/aaaa) ou '-' quando vazia."""
+    return '-' if pd.isna(valor) else valor.strftime('%d/%m/%Y')
+
+def formatar_coluna_mesa(serie):
+    """Versão vetorizada de formatar_mesa para uma coluna inteira."""
+    return _formatar_valores_unicos(serie, formatar_mesa)
+
+def formatar_coluna_data(serie):
+    """Versão vetorizada de formatar_data para uma coluna inteira."""
+    return _formatar_valores_unicos(serie, formatar_data)
+
+def classificar_mesa(row):
+    """Classifica uma mesa com base no seu valor (versão linha a linha, mantida como referência)."""
+    valor = row['VALOR']
+    if pd.isna(valor) or valor == 0:
+        return 'PENDENTE'
+    elif valor == PRECO_MESA:
+        return 'MESA PAGA'
+    elif valor == PRECO_MEIA_ENTRADA:
+        return 'MEIA ENTRADA'
+    elif valor >= VALOR_PATROCINIO:
+        return 'PATROCÍNIO'
+    else:
+        return 'OUTRO'
+
+def _condicoes_regras(valores, regras):
+    """Avalia cada regra da tabela sobre todos os valores (vazios tratados como 0)."""
+    valores = np.nan_to_num(np.asarray(valores, dtype='float64'), nan=0.0)
+    return [OPERADORES[operador](valores, limite) for _, operador, limite in regras]
+
+def classificar_mesas(valores, regras=REGRAS_CLASSIFICACAO, padrao=CLASSIFICACAO_PADRAO):
+    """Classifica todas as mesas de uma vez a partir da tabela de regras (equivalente a classificar_mesa)."""
+    return np.select(_condicoes_regras(valores, regras), [classificacao for classificacao, _, _ in regras], default=padrao).astype(object)
+
+def classificar_mesas_categorico(valores):
+    """Mesmo resultado de classificar_mesas, já no tipo categórico (calcula os códigos direto, sem comparar textos)."""
+    codigos = np.select(
+        _condicoes_regras(valores, REGRAS_CLASSIFICACAO),
+        [CLASSIFICACOES.index(classificacao) for classificacao, _, _ in REGRAS_CLASSIFICACAO],
+        default=CLASSIFICACOES.index(CLASSIFICACAO_PADRAO)
+    )
+    return pd.Categorical.from_codes(codigos.astype(np.int8), categories=CLASSIFICACOES)
+
+# ==============================================================================
+# 4. PROCESSAMENTO DA PLANILHA
+# ==============================================================================
+
+def limpar_planilha(df):
+    """
+    Limpa as colunas lidas por uma FonteDados e aplica os tipos de ESQUEMA_DF_LIMPO
+    (sem classificar as mesas).
+    """
+    # Limpeza inicial: remover linhas totalmente vazias (a fonte já entrega só as colunas desejadas)
+    df_limpo = df.dropna(how='all')
+
+    # Converter tipos de dados e tratar valores ausentes
+    df_limpo['ORD'] = converter_inteiro(df_limpo['ORD'])
+    df_limpo = df_limpo[df_limpo['ORD'].notna()].copy() # Remover linhas sem ORD
+    df_limpo['MESA'] = converter_inteiro(df_limpo['MESA']) # <NA> para mesas não atribuídas
+
+    df_limpo['VALOR'] = pd.to_numeric(df_limpo['VALOR'], errors='coerce').astype('float64')
+    df_limpo['VALOR_CALCULADO'] = df_limpo['VALOR'].fillna(0) # Usar 0 para valores nulos de VALOR
+
+    # Preencher valores ausentes em colunas de texto/identificação
+    df_limpo['NOME'] = df_limpo['NOME'].fillna('-').astype('category')
+    df_limpo['Cliente'] = df_limpo['Cliente'].fillna('-').astype('object')
+    df_limpo['DATA_REC'] = converter_data(df_limpo['DATA_REC'])
+    return df_limpo
+
+def processar_dados(df):
+    """
+    Limpa e processa as colunas lidas da planilha por uma FonteDados.
+    Retorna um ResultadoProcessamento com o DataFrame processado e as métricas.
+    """
+    df_limpo = limpar_planilha(df)
+
+    # Aplicar classificação das mesas
+    df_limpo['CLASSIFICACAO'] = classificar_mesas_categorico(df_limpo['VALOR'].to_numpy())
+    return calcular_metricas(df_limpo)
+
+def totais_por_classificacao(linhas):
+    """
+    Quantidade de linhas e soma de VALOR_CALCULADO de cada classificação (em uma única passada, pelos
+    códigos categóricos) mais o total recebido. Retorna {classificacao: (quantidade, soma), 'recebido': soma}.
+    """
+    codigos = categorizar_classificacoes(linhas['CLASSIFICACAO']).codes
+    valores = linhas['VALOR_CALCULADO'].to_numpy(dtype='float64')
+    validos = codigos >= 0
+    quantidades = np.bincount(codigos[validos], minlength=len(CLASSIFICACOES))
+    somas = np.bincount(codigos[validos], weights=valores[validos], minlength=len(CLASSIFICACOES))
+    totais = {classificacao: (int(quantidades[i]), float(somas[i])) for i, classificacao in enumerate(CLASSIFICACOES)}
+    totais['recebido'] = float(valores[valores > 0].sum())
+    return totais
+
+def ords_faltantes(ords, total_esperado):
+    """ORDs entre 1 e `total_esperado` que não aparecem na planilha (array ordenado e somente leitura)."""
+    ords = np.asarray(ords, dtype=np.int64)
+    presentes = np.zeros(total_esperado + 1, dtype=bool)
+    presentes[ords[(ords >= 1) & (ords <= total_esperado)]] = True
+    faltantes = np.flatnonzero(~presentes[1:]) + 1
+    faltantes.flags.writeable = False
+    return faltantes
+
+def calcular_resumo_responsavel(df_limpo):
+    """Mesas, valor recebido e patrocínios por responsável (ordenado por NOME), contados pelos códigos de NOME."""
+    nomes = df_limpo['NOME'].astype('category').cat
+    codigos = nomes.codes.to_numpy()
+    validos = codigos >= 0
+    patrocinio = categorizar_classificacoes(df_limpo['CLASSIFICACAO']).codes == CLASSIFICACOES.index('PATROCÍNIO')
+    n = len(nomes.categories)
+    mesas = np.bincount(codigos[validos], minlength=n)
+    recebido = np.bincount(codigos[validos], weights=df_limpo['VALOR_CALCULADO'].to_numpy(dtype='float64')[validos], minlength=n)
+    patrocinios = np.bincount(codigos[validos], weights=patrocinio[validos], minlength=n)
+    usados = mesas > 0
+    return pd.DataFrame({
+        'NOME': nomes.categories[usados],
+        'Mesas_Distribuidas': mesas[usados],
+        'Total_Recebido': recebido[usados],
+        'Patrocinios': patrocinios[usados]
+    })
+
+def calcular_metricas(df_limpo):
+    """Calcula as métricas gerais e o resumo por responsável a partir do DataFrame já classificado."""
+    total_esperado = int(df_limpo['ORD'].max()) if not df_limpo.empty else 0
+    totais = totais_por_classificacao(df_limpo)
+    resumo_responsavel = finalizar_resumo_responsavel(calcular_resumo_responsavel(df_limpo))
+    return montar_resultado(df_limpo, total_esperado, ords_faltantes(df_limpo['ORD'], total_esperado), totais, resumo_responsavel)
+
+def finalizar_resumo_responsavel(resumo_responsavel):
+    """
+    Acrescenta previsão e saldo ao resumo por responsável (ordenado por NOME, com índice 0..n-1) e
+    ordena por mesas distribuídas. O índice continua o da ordem por NOME.
+    """
+    resumo_responsavel = resumo_responsavel.astype({'NOME': object, 'Mesas_Distribuidas': 'int64', 'Patrocinios': 'int64'}) # Tabela pequena: tipos simples
+    resumo_responsavel['Previsao_por_Responsavel'] = calcular_previsao(resumo_responsavel['Mesas_Distribuidas'], resumo_responsavel['Patrocinios'])
+    resumo_responsavel['A_Receber'] = resumo_responsavel['Previsao_por_Responsavel'] - resumo_responsavel['Total_Recebido']
+    return resumo_responsavel.sort_values('Mesas_Distribuidas', ascending=False)
+
+# Campos escalares de ResultadoProcessamento, devolvidos por totais()
+CAMPOS_TOTAIS = [
+    'total_esperado', 'total_patrocinios', 'valor_patrocinios_total', 'valor_patrocinios_extra', 'mesas_pagas', 'total_mesas_pagas',
+    'meia_entrada', 'total_meia_entrada', 'mesas_pendentes_com_dados', 'total_mesas_pendentes', 'total_recebido', 'previsao', 'saldo_a_receber'
+]
+
+@dataclass(frozen=True, slots=True, eq=False)
+class ResultadoProcessamento:
+    """
+    Resultado do processamento de uma versão da planilha. É imutável e compartilhado por todas as
+    sessões: os DataFrames devem ser tratados como somente leitura. Para comparar ou serializar
+    duas versões sem tocar nos DataFrames, use totais().
+    """
+    df_limpo: pd.DataFrame
+    total_esperado: int # Maior ORD da planilha
+    ord_faltantes: np.ndarray
+    df_patrocinios: pd.DataFrame
+    total_patrocinios: int
+    valor_patrocinios_total: float
+    valor_patrocinios_extra: float
+    mesas_pagas: int
+    total_mesas_pagas: float
+    meia_entrada: int
+    total_meia_entrada: float
+    mesas_pendentes_com_dados: int
+    total_mesas_pendentes: int
+    total_recebido: float
+    previsao: float # calcular_previsao(linhas, patrocínios)
+    saldo_a_receber: float
+    resumo_responsavel: pd.DataFrame
+    resumo_responsavel_display: pd.DataFrame
+
+    def totais(self):
+        """Métricas escalares (tipos nativos do Python) mais a quantidade de linhas e de ORDs faltantes."""
+        totais = {campo: getattr(self, campo) for campo in CAMPOS_TOTAIS}
+        totais['linhas'] = len(self.df_limpo)
+        totais['ords_faltantes'] = len(self.ord_faltantes)
+        return totais
+
+def montar_resultado(df_limpo, total_esperado, ord_faltantes, totais, resumo_responsavel):
+    """Completa as métricas derivadas e monta o ResultadoProcessamento a partir dos totais por classificação."""
+    total_patrocinios, valor_patrocinios_total = totais['PATROCÍNIO']
+    mesas_pagas, total_mesas_pagas = totais['MESA PAGA']
+    meia_entrada, total_meia_entrada = totais['MEIA ENTRADA']
+    mesas_pendentes_com_dados = totais['PENDENTE'][0]
+    previsao = float(calcular_previsao(len(df_limpo), total_patrocinios))
+
+    # Versão formatada para exibição
+    resumo_responsavel_display = resumo_responsavel.copy()
+    resumo_responsavel_display['Total_Recebido'] = formatar_coluna_moeda_br(resumo_responsavel_display['Total_Recebido'])
+    resumo_responsavel_display['A_Receber'] = formatar_coluna_moeda_br(resumo_responsavel_display['A_Receber'])
+    resumo_responsavel_display['Previsao_por_Responsavel'] = formatar_coluna_moeda_br(resumo_responsavel_display['Previsao_por_Responsavel'])
+
+    return ResultadoProcessamento(
+        df_limpo=df_limpo,
+        total_esperado=total_esperado,
+        ord_faltantes=ord_faltantes,
+        df_patrocinios=df_limpo[df_limpo['CLASSIFICACAO'] == 'PATROCÍNIO'],
+        total_patrocinios=total_patrocinios,
+        valor_patrocinios_total=valor_patrocinios_total,
+        valor_patrocinios_extra=valor_patrocinios_total - (total_patrocinios * VALOR_PATROCINIO),
+        mesas_pagas=mesas_pagas,
+        total_mesas_pagas=total_mesas_pagas,
+        meia_entrada=meia_entrada,
+        total_meia_entrada=total_meia_entrada,
+        mesas_pendentes_com_dados=mesas_pendentes_com_dados,
+        total_mesas_pendentes=mesas_pendentes_com_dados + len(ord_faltantes),
+        total_recebido=totais['recebido'],
+        previsao=previsao,
+        saldo_a_receber=previsao - totais['recebido'],
+        resumo_responsavel=resumo_responsavel,
+        resumo_responsavel_display=resumo_responsavel_display
+    )
+
+def consolidar_resultados(resultados):
+    """
+    Visão consolidada de vários eventos, a partir dos totais e dos resumos por responsável já
+    calculados em cada ResultadoProcessamento (sem tocar nos df_limpo). `resultados` é um dict
+    evento -> ResultadoProcessamento. Retorna os totais somados, uma linha por evento (Mesas = linhas da
+    planilha, como no cabeçalho de cada evento) e o resumo por responsável somado entre os eventos
+    (coluna Eventos = em quantos eventos o responsável aparece).
+    """
+    por_evento = pd.DataFrame([
+        (evento, len(resultado.df_limpo), resultado.total_patrocinios, resultado.total_recebido, resultado.previsao, resultado.saldo_a_receber)
+        for evento, resultado in resultados.items()
+    ], columns=['Evento', 'Mesas', 'Patrocinios', 'Total_Recebido', 'Previsao', 'Saldo_a_Receber'])
+    por_evento['Percentual'] = (por_evento['Total_Recebido'] / por_evento['Previsao'] * 100).where(por_evento['Previsao'] > 0, 0.0)
+    totais = {
+        'mesas': int(por_evento['Mesas'].sum()),
+        'patrocinios': int(por_evento['Patrocinios'].sum()),
+        'recebido': float(por_evento['Total_Recebido'].sum()),
+        'previsao': float(por_evento['Previsao'].sum()),
+        'saldo': float(por_evento['Saldo_a_Receber'].sum())
+    }
+    totais['percentual'] = (totais['recebido'] / totais['previsao'] * 100) if totais['previsao'] > 0 else 0
+
+    colunas = ['Mesas_Distribuidas', 'Total_Recebido', 'Patrocinios', 'Previsao_por_Responsavel', 'A_Receber']
+    resumos = [resultado.resumo_responsavel[['NOME'] + colunas] for resultado in resultados.values()]
+    if resumos:
+        resumo_responsavel = pd.concat(resumos, ignore_index=True).groupby('NOME', sort=True).agg(
+            **{coluna: (coluna, 'sum') for coluna in colunas}, Eventos=('NOME', 'size')
+        ).reset_index().sort_values('Mesas_Distribuidas', ascending=False, kind='stable')
+    else:
+        resumo_responsavel = pd.DataFrame(columns=['NOME'] + colunas + ['Eventos'])
+    return {'totais': totais, 'por_evento': por_evento, 'resumo_responsavel': resumo_responsavel}
+
+# ==============================================================================
+# 5. PROCESSAMENTO INCREMENTAL
+# ==============================================================================
+
+# Colunas comparadas entre a planilha nova e o snapshot anterior (a chave é a coluna ORD)
+COLUNAS_COMPARADAS = ['NOME', 'Cliente', 'MESA', 'VALOR', 'DATA_REC']
+
+# Acima desta fração de linhas alteradas, recalcular tudo é mais barato que aplicar as diferenças
+LIMITE_ALTERACOES_INCREMENTAL = 0.3
+
+# Quantidade de alterações mantidas no histórico exibido no dashboard
+MAX_ALTERACOES = 200
+
+COLUNAS_ALTERACOES = ['Versao', 'Quando', 'ORD', 'Tipo', 'Descricao']
+
+def _ords_validos(ords):
+    """ORDs únicos (e inteiros, como garante limpar_planilha) permitem usar ORD como chave das diferenças."""
+    return ords.is_unique and ords.dtype == ESQUEMA_DF_LIMPO['ORD']
+
+def _iguais(novos, antigos):
+    """Compara duas colunas (alinhadas por posição) elemento a elemento, considerando iguais dois valores vazios."""
+    if isinstance(novos.dtype, pd.CategoricalDtype) and isinstance(antigos.dtype, pd.CategoricalDtype):
+        # Compara os códigos, traduzindo os antigos para as categorias novas (ausente = -2, vazio = -1)
+        mapa = novos.cat.categories.get_indexer(antigos.cat.categories)
+        mapa = np.append(np.where(mapa >= 0, mapa, -2), -1)
+        return novos.cat.codes.to_numpy() == mapa[antigos.cat.codes.to_numpy()]
+    novos, antigos = novos.array, antigos.array
+    iguais = np.asarray(pd.array(novos == antigos, dtype='boolean').fillna(False), dtype=bool)
+    # Só as posições diferentes podem ser dois vazios (NaN/NA/NaT nunca são iguais entre si)
+    diferentes = ~iguais
+    iguais[diferentes] = pd.isna(novos[diferentes]) & pd.isna(antigos[diferentes])
+    return iguais
+
+def _formatar_campo(coluna, valor):
+    """Formata o valor de uma coluna para o registro de alterações."""
+    if coluna == 'VALOR':
+        return '-' if pd.isna(valor) else formatar_moeda_br(valor)
+    if coluna == 'MESA':
+        return formatar_mesa(valor)
+    if coluna == 'DATA_REC':
+        return formatar_data(valor)
+    return str(valor)
+
+def descrever_alteracao(tipo, antiga=None, nova=None):
+    """Descreve a alteração de uma linha (ex.: 'ORD 42 (Fulano): PENDENTE → MESA PAGA | VALOR: - → R$ 600,00')."""
+    linha = nova if nova is not None else antiga
+    descricao = f'ORD {int(linha["ORD"])} ({linha["NOME"]} / {linha["Cliente"]})'
+    if tipo == 'inserida':
+        return f'{descricao}: incluída como {nova["CLASSIFICACAO"]} ({_formatar_campo("VALOR", nova["VALOR"])})'
+    if tipo == 'removida':
+        return f'{descricao}: removida (era {antiga["CLASSIFICACAO"]})'
+    if antiga['CLASSIFICACAO'] != nova['CLASSIFICACAO']:
+        descricao += f': {antiga["CLASSIFICACAO"]} → {nova["CLASSIFICACAO"]}'
+    campos = [
+        f'{coluna}: {_formatar_campo(coluna, antiga[coluna])} → {_formatar_campo(coluna, nova[coluna])}'
+        for coluna in COLUNAS_COMPARADAS
+        if _formatar_campo(coluna, antiga[coluna]) != _formatar_campo(coluna, nova[coluna])
+    ]
+    return f'{descricao} | {"; ".join(campos)}' if campos else descricao
+
+def registrar_alteracoes(removidas, antigas, novas, inseridas):
+    """Monta o registro de alterações (colunas ORD, Tipo, Descricao) a partir das linhas que mudaram."""
+    registros = [(linha['ORD'], 'inserida', descrever_alteracao('inserida', nova=linha)) for linha in inseridas.to_dict('records')]
+    registros += [(nova['ORD'], 'alterada', descrever_alteracao('alterada', antiga, nova)) for antiga, nova in zip(antigas.to_dict('records'), novas.to_dict('records'))]
+    registros += [(linha['ORD'], 'removida', descrever_alteracao('removida', antiga=linha)) for linha in removidas.to_dict('records')]
+    return pd.DataFrame(registros, columns=['ORD', 'Tipo', 'Descricao'])
+
+def _totais_resultado(resultado):
+    """Totais por classificação guardados em um ResultadoProcessamento (no formato de totais_por_classificacao)."""
+    return {
+        'PATROCÍNIO': (resultado.total_patrocinios, resultado.valor_patrocinios_total),
+        'MESA PAGA': (resultado.mesas_pagas, resultado.total_mesas_pagas),
+        'MEIA ENTRADA': (resultado.meia_entrada, resultado.total_meia_entrada),
+        'PENDENTE': (resultado.mesas_pendentes_com_dados, 0.0), # Pendentes valem 0
+        'recebido': resultado.total_recebido
+    }
+
+def atualizar_resumo_responsavel(resumo_anterior, saida, entrada):
+    """
+    Resumo por responsável no formato de calcular_resumo_responsavel (ordenado por NOME), obtido do
+    resumo anterior menos as linhas que saíram e mais as que entraram. Só os responsáveis dessas
+    linhas são tocados; os que ficam sem mesas saem do resumo.
+    """
+    colunas = ['Mesas_Distribuidas', 'Total_Recebido', 'Patrocinios']
+    posicoes = {nome: i for i, nome in enumerate(resumo_anterior['NOME'].tolist())}
+    deltas = []
+    for linhas, sinal in ((saida, -1), (entrada, 1)):
+        for nome in linhas['NOME'].tolist():
+            posicoes.setdefault(nome, len(posicoes)) # Responsável que ainda não estava no resumo
+        patrocinio = categorizar_classificacoes(linhas['CLASSIFICACAO']).codes == CLASSIFICACOES.index('PATROCÍNIO')
+        deltas.append((
+            [posicoes[nome] for nome in linhas['NOME'].tolist()],
+            sinal * np.column_stack([np.ones(len(linhas)), linhas['VALOR_CALCULADO'].to_numpy(dtype='float64'), patrocinio])
+        ))
+    valores = np.zeros((len(posicoes), len(colunas)))
+    valores[:len(resumo_anterior)] = resumo_anterior[colunas].to_numpy(dtype='float64')
+    for indices, delta in deltas:
+        np.add.at(valores, indices, delta) # Soma também as linhas repetidas de um mesmo responsável
+    nomes = np.array(list(posicoes), dtype=object)
+    if len(nomes) > len(resumo_anterior):
+        ordem = np.argsort(nomes, kind='stable')
+    else: # Mesmos responsáveis: o índice do resumo anterior guarda a ordem por NOME (ver finalizar_resumo_responsavel)
+        ordem = np.argsort(resumo_anterior.index.to_numpy(), kind='stable')
+    ordem = ordem[valores[ordem, 0] > 0]
+    return pd.DataFrame({'NOME': nomes[ordem], **{coluna: valores[ordem, i] for i, coluna in enumerate(colunas)}})
+
+def atualizar_ords_faltantes(faltantes_anteriores, total_anterior, total_esperado, removidos, inseridos):
+    """Mesmo resultado de ords_faltantes a partir dos faltantes anteriores e dos ORDs removidos e inseridos."""
+    candidatos = np.concatenate([faltantes_anteriores, removidos, np.arange(total_anterior + 1, total_esperado + 1)])
+    candidatos = np.setdiff1d(candidatos, inseridos) # Ordenado e sem repetições
+    faltantes = candidatos[(candidatos >= 1) & (candidatos <= total_esperado)].astype(np.int64)
+    faltantes.flags.writeable = False
+    return faltantes
+
+def processar_incremental(df, resultado_anterior):
+    """
+    Processa a planilha nova aproveitando o resultado anterior: as linhas são comparadas por ORD e
+    apenas as inseridas, alteradas ou removidas são classificadas e aplicadas aos totais por
+    classificação, ao resumo por responsável e aos ORDs faltantes. O resultado é igual ao de
+    processar_dados(df) (ver test_dados.py). Retorna (resultado, alteracoes). Quando as diferenças
+    não podem ser aplicadas com segurança (ORDs repetidos, muitas alterações), recalcula tudo e
+    `alteracoes` é None.
+    """
+    anterior = resultado_anterior.df_limpo
+    df_limpo = limpar_planilha(df)
+    if not (_ords_validos(anterior['ORD']) and _ords_validos(df_limpo['ORD'])):
+        return processar_dados(df), None
+
+    # Diferenças por ORD
+    posicao_anterior = pd.Index(anterior['ORD']).get_indexer(df_limpo['ORD'])
+    existia = posicao_anterior >= 0
+    iguais = existia.copy()
+    for coluna in COLUNAS_COMPARADAS:
+        iguais[existia] &= _iguais(df_limpo[coluna][existia], anterior[coluna].iloc[posicao_anterior[existia]])
+    removida = np.ones(len(anterior), dtype=bool)
+    removida[posicao_anterior[existia]] = False
+    if (~iguais).sum() + removida.sum() > LIMITE_ALTERACOES_INCREMENTAL * max(len(df_limpo), 1):
+        df_limpo['CLASSIFICACAO'] = classificar_mesas_categorico(df_limpo['VALOR'].to_numpy())
+        return calcular_metricas(df_limpo), None
+
+    # Classificação: reaproveitada nas linhas iguais, calculada só nas demais
+    codigos = np.empty(len(df_limpo), dtype=np.int8)
+    codigos[iguais] = categorizar_classificacoes(anterior['CLASSIFICACAO']).codes[posicao_anterior[iguais]]
+    codigos[~iguais] = classificar_mesas_categorico(df_limpo['VALOR'].to_numpy()[~iguais]).codes
+    df_limpo['CLASSIFICACAO'] = pd.Categorical.from_codes(codigos, categories=CLASSIFICACOES)
+
+    alterada = existia & ~iguais
+    linhas_removidas = anterior[removida]
+    linhas_antigas = anterior.iloc[posicao_anterior[alterada]]
+    linhas_novas = df_limpo[alterada]
+    linhas_inseridas = df_limpo[~existia]
+    saida = pd.concat([linhas_removidas, linhas_antigas])
+    entrada = pd.concat([linhas_inseridas, linhas_novas])
+
+    # Totais gerais: anterior - linhas que saíram + linhas que entraram
+    menos, mais = totais_por_classificacao(saida), totais_por_classificacao(entrada)
+    totais = {}
+    for chave, valor in _totais_resultado(resultado_anterior).items():
+        if chave == 'recebido':
+            totais[chave] = valor + mais[chave] - menos[chave]
+        else:
+            totais[chave] = tuple(a + b - c for a, b, c in zip(valor, mais[chave], menos[chave]))
+
+    total_esperado = int(df_limpo['ORD'].max()) if not df_limpo.empty else 0
+    faltantes = atualizar_ords_faltantes(
+        resultado_anterior.ord_faltantes, resultado_anterior.total_esperado, total_esperado,
+        linhas_removidas['ORD'].to_numpy(dtype=np.int64), linhas_inseridas['ORD'].to_numpy(dtype=np.int64)
+    )
+    resumo_responsavel = finalizar_resumo_responsavel(atualizar_resumo_responsavel(resultado_anterior.resumo_responsavel, saida, entrada))
+    resultado = montar_resultado(df_limpo, total_esperado, faltantes, totais, resumo_responsavel)
+    return resultado, registrar_alteracoes(linhas_removidas, linhas_antigas, linhas_novas, linhas_inseridas)
+
+# ==============================================================================
+# 6. AGENDADOR DE ATUALIZAÇÕES E SNAPSHOTS VERSIONADOS
+# ==============================================================================
+
+# Resultado publicado pelo agendador. É imutável: uma nova versão é um novo Snapshot, então a sessão
+# que leu um snapshot continua usando dados coerentes mesmo se outra versão for publicada no meio do rerun.
+# `alteracoes` guarda as últimas MAX_ALTERACOES alterações linha a linha (colunas COLUNAS_ALTERACOES).
+Snapshot = namedtuple('Snapshot', ['versao', 'hash_conteudo', 'resultado', 'publicado_em', 'alteracoes'])
+
+def acumular_alteracoes(anteriores, alteracoes, versao, quando):
+    """Acrescenta as alterações de uma versão ao histórico, mantendo as MAX_ALTERACOES mais recentes."""
+    if alteracoes is None: # Reprocessamento completo: não há diferenças linha a linha
+        alteracoes = pd.DataFrame([(None, 'recalculo', 'Muitas alterações (ou ORDs repetidos): planilha reprocessada por completo')], columns=['ORD', 'Tipo', 'Descricao'])
+    alteracoes = alteracoes.assign(Versao=versao, Quando=quando)[COLUNAS_ALTERACOES]
+    if anteriores is None or anteriores.empty:
+        return alteracoes.tail(MAX_ALTERACOES).reset_index(drop=True)
+    return pd.concat([anteriores, alteracoes], ignore_index=True).tail(MAX_ALTERACOES).reset_index(drop=True)
+
+class CarregadorDados:
+    """
+    Uma única thread em segundo plano consulta a fonte a cada `intervalo` segundos. Um download
+    idêntico ao anterior é descartado sem leitura; nos demais, o hash das colunas lidas (com os
+    preços e a versão do esquema, ver hash_dados) é comparado com o do snapshot atual. Só quando
+    ele muda a planilha é processada (de forma incremental em relação ao snapshot anterior) e um
+    novo snapshot é publicado, com a versão incrementada e o registro das linhas alteradas. As
+    sessões apenas leem o snapshot atual, então o custo de download e processamento não depende do
+    número de usuários. O último snapshot fica salvo em disco (descartado se foi processado com
+    outros preços ou esquema); se a consulta falhar, o snapshot anterior continua valendo.
+    Com um `historico` (HistoricoSnapshots), cada versão publicada também é gravada no histórico local.
+    """
+
+    def __init__(self, fonte, caminho_snapshot, intervalo=60, timeout=15, tentativas=3, historico=None):
+        self.fonte = fonte
+        self.caminho_snapshot = caminho_snapshot
+        self.historico = historico
+        self.intervalo = intervalo
+        self.timeout = timeout
+        self.tentativas = tentativas
+        self.snapshot = None
+        self._hash_bruto = None # Hash dos bytes da última planilha lida, para não reler um download idêntico
+        self.verificado_em = None # Última consulta bem-sucedida à fonte (com ou sem mudança)
+        self.ultimo_erro = None
+        self.verificacoes = 0
+        self.publicacoes = 0
+        self._lock_download = threading.Lock() # Garante uma única consulta simultânea
+        self._lock_thread = threading.Lock()
+        self._primeira_consulta = threading.Event()
+        self._parar = threading.Event()
+        self._thread = None
+        self._carregar_snapshot()
+
+    def _carregar_snapshot(self):
+        """Lê o último snapshot salvo em disco, se existir."""
+        try:
+            with open(self.caminho_snapshot, 'rb') as f:
+                snapshot = pickle.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            self.ultimo_erro = e
+            return
+        if not (isinstance(snapshot, Snapshot) and isinstance(snapshot.resultado, ResultadoProcessamento)):
+            return # Ignora arquivos em formatos antigos
+        if str(snapshot.hash_conteudo).startswith(f'{ASSINATURA_PROCESSAMENTO}-'): # Processado com os preços e o esquema atuais
+            self.snapshot = snapshot
+
+    def _salvar_snapshot(self, snapshot):
+        """Grava o snapshot em disco de forma atômica (arquivo temporário + os.replace)."""
+        pasta = os.path.dirname(self.caminho_snapshot)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        temporario = f'{self.caminho_snapshot}.tmp'
+        with open(temporario, 'wb') as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporario, self.caminho_snapshot)
+
+    def _registrar_historico(self, snapshot):
+        """Grava o snapshot no histórico local, se houver. Uma falha aqui não impede a publicação."""
+        if self.historico is None or snapshot is None:
+            return
+        try:
+            with COLETOR.medir('historico'):
+                self.historico.registrar(snapshot.hash_conteudo, snapshot.resultado, snapshot.publicado_em)
+        except Exception: # O histórico é complementar: o dashboard continua com o snapshot atual
+            COLETOR.incrementar('falhas_historico')
+
+    def _verificar_fonte(self):
+        """
+        Baixa a planilha e publica um novo snapshot se o conteúdo mudou.
+        Retorna True se uma nova versão foi publicada.
+        """
+        try:
+            with COLETOR.medir('download'):
+                conteudo = self.fonte.obter_conteudo(timeout=self.timeout, tentativas=self.tentativas)
+            COLETOR.incrementar('bytes_baixados', len(conteudo))
+            hash_bruto = hashlib.sha1(conteudo).hexdigest()
+            atual = self.snapshot
+            publicado = False
+            if atual is None or hash_bruto != self._hash_bruto:
+                with COLETOR.medir('leitura_planilha'):
+                    df = self.fonte.ler(conteudo)
+                hash_conteudo = hash_dados(df) # Arquivo salvo de novo com os mesmos dados não gera versão nova
+                if atual is None or atual.hash_conteudo != hash_conteudo:
+                    agora = datetime.now()
+                    with COLETOR.medir('processamento'):
+                        if atual is None:
+                            self.snapshot = Snapshot(1, hash_conteudo, processar_dados(df), agora, pd.DataFrame(columns=COLUNAS_ALTERACOES))
+                        else:
+                            resultado, alteracoes = processar_incremental(df, atual.resultado)
+                            versao = atual.versao + 1
+                            self.snapshot = Snapshot(versao, hash_conteudo, resultado, agora, acumular_alteracoes(atual.alteracoes, alteracoes, versao, agora))
+                    COLETOR.incrementar('versoes_publicadas')
+                    self.publicacoes += 1
+                    publicado = True
+                self._hash_bruto = hash_bruto
+            if not publicado:
+                COLETOR.incrementar('verificacoes_sem_mudanca')
+        except Exception as e:
+            COLETOR.incrementar('falhas_atualizacao')
+            self.ultimo_erro = e
+            return False
+        self.verificado_em = datetime.now()
+        self.verificacoes += 1
+        self.ultimo_erro = None
+        if publicado:
+            try:
+                self._salvar_snapshot(self.snapshot)
+            except OSError:
+                pass # O snapshot em disco é apenas uma otimização
+            self._registrar_historico(self.snapshot)
+        return publicado
+
+    def revalidar(self):
+        """Consulta a fonte de forma síncrona. Retorna True se uma nova versão foi publicada."""
+        with self._lock_download:
+            return self._verificar_fonte()
+
+    def _executar(self):
+        """Laço da thread agendadora: consulta a fonte imediatamente e depois a cada `intervalo` segundos."""
+        self._registrar_historico(self.snapshot) # Snapshot lido do disco (ignorado se já estiver no histórico)
+        while True:
+            self.revalidar()
+            self._primeira_consulta.set()
+            if self._parar.wait(self.intervalo):
+                return
+
+    def iniciar(self):
+        """Inicia a thread agendadora (uma única vez)."""
+        with self._lock_thread:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._executar, name='agendador-planilha', daemon=True)
+                self._thread.start()
+
+    def parar(self):
+        """Encerra a thread agendadora ao fim da espera atual."""
+        self._parar.set()
+
+    @property
+    def versao(self):
+        """Versão do snapshot atual (None se ainda não houver dados)."""
+        snapshot = self.snapshot
+        return snapshot.versao if snapshot is not None else None
+
+    def idade_segundos(self):
+        """Tempo desde a última confirmação dos dados junto à fonte (None se ainda não houver dados)."""
+        referencia = self.verificado_em or (self.snapshot.publicado_em if self.snapshot is not None else None)
+        if referencia is None:
+            return None
+        return (datetime.now() - referencia).total_seconds()
+
+    def obter(self):
+        """
+        Retorna o snapshot atual sem esperar pela rede. Só bloqueia quando não há nenhum snapshot
+        em memória nem em disco, aguardando a primeira consulta da thread agendadora.
+        """
+        self.iniciar()
+        if self.snapshot is None:
+            self._primeira_consulta.wait()
+        return self.snapshot
+
+# Limite padrão de consultas simultâneas às fontes (o trabalho é quase todo espera de rede)
+MAX_CONSULTAS_SIMULTANEAS = 4
+
+class GrupoCarregadores:
+    """
+    Vários CarregadorDados (um por evento ou aba) atualizados por uma única thread agendadora: a cada
+    `intervalo` segundos, todas as fontes são consultadas ao mesmo tempo em um pool limitado a
+    `max_simultaneas` threads, então o tempo de uma atualização é o da fonte mais lenta, e não a soma
+    de todas. Cada carregador guarda o seu próprio snapshot e erro: a falha (ou o timeout) de uma fonte
+    não impede nem atrasa a publicação das demais.
+    """
+
+    def __init__(self, carregadores, intervalo=60, max_simultaneas=MAX_CONSULTAS_SIMULTANEAS):
+        self.carregadores = dict(carregadores) # evento -> CarregadorDados, na ordem de exibição
+        self.intervalo = intervalo
+        self._executor = ThreadPoolExecutor(max_workers=max(1, min(max_simultaneas, len(self.carregadores))), thread_name_prefix='consulta-planilha')
+        self._lock_thread = threading.Lock()
+        self._primeira_consulta = threading.Event()
+        self._parar = threading.Event()
+        self._thread = None
+
+    def revalidar(self, registrar_historico=False):
+        """
+        Consulta todas as fontes em paralelo e espera por todas. Retorna os eventos que publicaram uma
+        nova versão. Com `registrar_historico`, grava antes no histórico o snapshot lido do disco.
+        """
+        def atualizar(carregador):
+            if registrar_historico:
+                carregador._registrar_historico(carregador.snapshot) # Ignorado se já estiver no histórico
+            return carregador.revalidar() # Não levanta exceções: a falha fica em carregador.ultimo_erro
+        publicados = self._executor.map(atualizar, self.carregadores.values())
+        return [evento for evento, publicado in zip(self.carregadores, publicados) if publicado]
+
+    def _executar(self):
+        """Laço da thread agendadora: consulta as fontes imediatamente e depois a cada `intervalo` segundos."""
+        primeira = True
+        while True:
+            self.revalidar(registrar_historico=primeira)
+            primeira = False
+            self._primeira_consulta.set()
+            if self._parar.wait(self.intervalo):
+                return
+
+    def iniciar(self):
+        """Inicia a thread agendadora (uma única vez)."""
+        with self._lock_thread:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._executar, name='agendador-planilhas', daemon=True)
+                self._thread.start()
+
+    def parar(self):
+        """Encerra a thread agendadora ao fim da espera atual."""
+        self._parar.set()
+
+    def versoes(self):
+        """Versão atual de cada evento (None para os que ainda não têm dados)."""
+        return {evento: carregador.versao for evento, carregador in self.carregadores.items()}
+
+    def obter(self):
+        """
+        Retorna os snapshots atuais (evento -> Snapshot, ou None para o evento sem dados) sem esperar
+        pela rede. Só bloqueia quando algum evento não tem snapshot em memória nem em disco, aguardando
+        a primeira rodada de consultas.
+        """
+        self.iniciar()
+        if any(carregador.snapshot is None for carregador in self.carregadores.values()):
+            self._primeira_consulta.wait()
+        return {evento: carregador.snapshot for evento, carregador in self.carregadores.items()}
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from datetime import datetime
+
+# ==============================================================================
+# 1. COLETOR DE DESEMPENHO
+# ==============================================================================
+
+# Quantidade de medições mantidas por etapa para o cálculo dos percentis
+AMOSTRAS_POR_ETAPA = 1000
+
+class ColetorDesempenho:
+    """
+    Tempos por etapa e contadores agregados de todas as sessões do processo (downloads, leitura
+    da planilha, processamento, filtros, gráficos, PDF, reruns...). Guarda apenas as últimas
+    AMOSTRAS_POR_ETAPA medições de cada etapa, então o custo de memória é fixo.
+    """
+
+    def __init__(self, amostras_por_etapa=AMOSTRAS_POR_ETAPA):
+        self.iniciado_em = datetime.now()
+        self._amostras = defaultdict(lambda: deque(maxlen=amostras_por_etapa))
+        self._totais = defaultdict(int) # Quantidade total de medições, inclusive as já descartadas
+        self._contadores = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def registrar(self, etapa, segundos):
+        """Registra uma medição de tempo (em segundos) da etapa."""
+        with self._lock:
+            self._amostras[etapa].append(segundos)
+            self._totais[etapa] += 1
+
+    def incrementar(self, contador, quantidade=1):
+        """Soma `quantidade` a um contador (ex.: 'reruns', 'bytes_baixados')."""
+        with self._lock:
+            self._contadores[contador] += quantidade
+
+    @contextmanager
+    def medir(self, etapa):
+        """Mede o tempo de execução de um trecho e o registra na etapa."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(etapa, time.perf_counter() - inicio)
+
+    def resumo_etapas(self):
+        """Retorna um DataFrame com a quantidade de medições e os tempos p50/p95/máximo (ms) de cada etapa."""
+        with self._lock:
+            amostras = {etapa: np.array(valores) * 1000 for etapa, valores in self._amostras.items()}
+            totais = dict(self._totais)
+        linhas = [
+            (etapa, totais[etapa], np.percentile(valores, 50), np.percentile(valores, 95), valores.max())
+            for etapa, valores in sorted(amostras.items())
+        ]
+        return pd.DataFrame(linhas, columns=['Etapa', 'Medições', 'p50 (ms)', 'p95 (ms)', 'Máximo (ms)'])
+
+    def contadores(self):
+        """Retorna uma cópia dos contadores."""
+        with self._lock:
+            return dict(self._contadores)
+
+    def exportar(self, caminho):
+        """Acrescenta o estado atual (etapas e contadores) como uma linha JSON ao arquivo de métricas."""
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        registro = {
+            'exportado_em': datetime.now().isoformat(timespec='seconds'),
+            'iniciado_em': self.iniciado_em.isoformat(timespec='seconds'),
+            'etapas': self.resumo_etapas().to_dict('records'),
+            'contadores': self.contadores()
+        }
+        with open(caminho, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+
+# Coletor único do processo, compartilhado pelo app, pelas sessões e pela thread agendadora
+COLETOR = ColetorDesempenho()
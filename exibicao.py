@@ -0,0 +1,82 @@
+import pandas as pd
+from dados import VALOR_PATROCINIO, formatar_coluna_moeda_br, formatar_coluna_mesa, formatar_coluna_data
+
+# ==============================================================================
+# 1. TABELAS FORMATADAS PARA EXIBIÇÃO
+# ==============================================================================
+# Cada função monta um DataFrame novo só com as colunas exibidas, sem copiar o DataFrame filtrado.
+
+def montar_resumo_display(resumo_filtrado):
+    """Tabela da aba Responsáveis com os valores em R$."""
+    return pd.DataFrame({
+        'Responsável': resumo_filtrado['NOME'],
+        'Mesas Dist.': resumo_filtrado['Mesas'],
+        'Total Recebido': formatar_coluna_moeda_br(resumo_filtrado['Recebido']),
+        'Patrocinios': resumo_filtrado['Patrocinios'],
+        'Previsao': formatar_coluna_moeda_br(resumo_filtrado['Previsao']),
+        'A_Receber': formatar_coluna_moeda_br(resumo_filtrado['A_Receber'])
+    })
+
+def montar_eventos_display(por_evento):
+    """Tabela da visão consolidada com uma linha por evento e os valores em R$."""
+    return pd.DataFrame({
+        'Evento': por_evento['Evento'],
+        'Mesas': por_evento['Mesas'],
+        'Patrocinios': por_evento['Patrocinios'],
+        'Total Recebido': formatar_coluna_moeda_br(por_evento['Total_Recebido']),
+        'Previsao': formatar_coluna_moeda_br(por_evento['Previsao']),
+        'Saldo a Receber': formatar_coluna_moeda_br(por_evento['Saldo_a_Receber']),
+        'Percentual': por_evento['Percentual'].map('{:.1f}%'.format)
+    })
+
+def montar_resumo_consolidado_display(resumo_consolidado):
+    """Tabela da visão consolidada com o resumo por responsável somado entre os eventos."""
+    return pd.DataFrame({
+        'Responsável': resumo_consolidado['NOME'],
+        'Eventos': resumo_consolidado['Eventos'],
+        'Mesas Dist.': resumo_consolidado['Mesas_Distribuidas'],
+        'Total Recebido': formatar_coluna_moeda_br(resumo_consolidado['Total_Recebido']),
+        'Patrocinios': resumo_consolidado['Patrocinios'],
+        'Previsao': formatar_coluna_moeda_br(resumo_consolidado['Previsao_por_Responsavel']),
+        'A_Receber': formatar_coluna_moeda_br(resumo_consolidado['A_Receber'])
+    })
+
+def montar_patrocinios_display(df_filtrado):
+    """
+    Dados da aba Patrocínios: quantidade, valor total, lista de patrocínios e patrocínios
+    com valor extra (acima de VALOR_PATROCINIO).
+    """
+    df_patron = df_filtrado[df_filtrado['VALOR_CALCULADO'] >= VALOR_PATROCINIO]
+    patron_extra = df_patron[df_patron['VALOR_CALCULADO'] > VALOR_PATROCINIO]
+    return {
+        'quantidade': len(df_patron),
+        'valor_total': df_patron['VALOR_CALCULADO'].sum(),
+        'lista': pd.DataFrame({
+            'ORD': df_patron['ORD'],
+            'MESA': formatar_coluna_mesa(df_patron['MESA']),
+            'NOME': df_patron['NOME'],
+            'Cliente': df_patron['Cliente'],
+            'Valor Patrocínio': formatar_coluna_moeda_br(df_patron['VALOR_CALCULADO'])
+        }),
+        'extra': pd.DataFrame({
+            'ORD': patron_extra['ORD'],
+            'MESA': formatar_coluna_mesa(patron_extra['MESA']),
+            'NOME': patron_extra['NOME'],
+            'Cliente': patron_extra['Cliente'],
+            'Valor Total': formatar_coluna_moeda_br(patron_extra['VALOR_CALCULADO']),
+            'Valor Extra': formatar_coluna_moeda_br(patron_extra['VALOR_CALCULADO'] - VALOR_PATROCINIO)
+        })
+    }
+
+def montar_dados_brutos_display(df_filtrado):
+    """Página da tabela da aba Dados Brutos com colunas específicas e renomeadas."""
+    # Colunas sem transformação entram como estão (.array não copia os dados nem materializa as categorias)
+    return pd.DataFrame({
+        'ORD': df_filtrado['ORD'].array,
+        'NOME': df_filtrado['NOME'].array,
+        'Cliente': df_filtrado['Cliente'].array,
+        'MESA': formatar_coluna_mesa(df_filtrado['MESA']).array,
+        'VALOR': formatar_coluna_moeda_br(df_filtrado['VALOR_CALCULADO']).array,
+        'CLASSE': df_filtrado['CLASSIFICACAO'].array,
+        'DATA': formatar_coluna_data(df_filtrado['DATA_REC']).array
+    })
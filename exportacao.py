@@ -0,0 +1,63 @@
+import codecs
+import tempfile
+import openpyxl
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# ==============================================================================
+# 1. EXPORTAÇÃO EM BLOCOS
+# ==============================================================================
+# Os arquivos de download são gerados só quando pedidos, bloco a bloco, em um arquivo temporário
+# que fica em memória enquanto é pequeno e vai para o disco quando cresce: a memória usada na
+# geração não depende do número de linhas exportadas.
+
+# Linhas convertidas por vez
+TAMANHO_BLOCO_EXPORTACAO = 20000
+
+# Acima deste tamanho (em bytes) o arquivo gerado sai da memória para o disco
+LIMITE_MEMORIA_EXPORTACAO = 8 * 2**20
+
+# Formatos disponíveis: rótulo do botão, extensão e tipo MIME
+FORMATOS_EXPORTACAO = {
+    'csv': ('CSV', 'csv', 'text/csv'),
+    'parquet': ('Parquet', 'parquet', 'application/vnd.apache.parquet'),
+    'xlsx': ('Excel', 'xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+}
+
+def blocos(df, tamanho_bloco=TAMANHO_BLOCO_EXPORTACAO):
+    """Recortes consecutivos de até `tamanho_bloco` linhas (sem cópia, pelo copy-on-write)."""
+    for inicio in range(0, len(df), tamanho_bloco):
+        yield df.iloc[inicio:inicio + tamanho_bloco]
+
+def escrever_csv(df, destino, tamanho_bloco=TAMANHO_BLOCO_EXPORTACAO):
+    """Mesmo conteúdo de df.to_csv(index=False, encoding='utf-8-sig'), escrito bloco a bloco."""
+    destino.write(codecs.BOM_UTF8 + df.iloc[:0].to_csv(index=False).encode('utf-8'))
+    for bloco in blocos(df, tamanho_bloco):
+        destino.write(bloco.to_csv(index=False, header=False).encode('utf-8')) # Só o texto de um bloco fica em memória
+
+def escrever_parquet(df, destino, tamanho_bloco=TAMANHO_BLOCO_EXPORTACAO):
+    """Parquet com um row group por bloco (tipos preservados, inclusive as categorias)."""
+    esquema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(destino, esquema) as escritor:
+        for bloco in blocos(df, tamanho_bloco):
+            escritor.write_table(pa.Table.from_pandas(bloco, schema=esquema, preserve_index=False))
+
+def escrever_xlsx(df, destino, tamanho_bloco=TAMANHO_BLOCO_EXPORTACAO):
+    """XLSX em modo write_only do openpyxl (as linhas vão direto para o arquivo, sem montar a planilha em memória)."""
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet('Dados')
+    ws.append([str(coluna) for coluna in df.columns])
+    for bloco in blocos(df, tamanho_bloco):
+        valores = bloco.astype(object).where(bloco.notna(), None) # <NA>/NaT/NaN viram células vazias
+        for linha in valores.itertuples(index=False, name=None):
+            ws.append(linha)
+    wb.save(destino)
+
+ESCRITORES = {'csv': escrever_csv, 'parquet': escrever_parquet, 'xlsx': escrever_xlsx}
+
+def gerar_exportacao(df, formato, tamanho_bloco=TAMANHO_BLOCO_EXPORTACAO):
+    """Gera o arquivo de `formato` e o retorna aberto e posicionado no início, pronto para ser lido."""
+    destino = tempfile.SpooledTemporaryFile(max_size=LIMITE_MEMORIA_EXPORTACAO)
+    ESCRITORES[formato](df, destino, tamanho_bloco)
+    destino.seek(0)
+    return destino
@@ -0,0 +1,250 @@
+import numpy as np
+import pandas as pd
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+
+# ==============================================================================
+# 1. MOTOR DE FILTROS INDEXADO
+# ==============================================================================
+
+def chave_filtros(versao, classificacoes, responsavel, valor_range):
+    """Hash do estado dos filtros mais a versão dos dados, usado como chave dos caches derivados do filtro."""
+    estado = repr((versao, sorted(classificacoes), responsavel, (float(valor_range[0]), float(valor_range[1]))))
+    return hashlib.sha1(estado.encode('utf-8')).hexdigest()
+
+class MotorFiltros:
+    """
+    Índices construídos uma vez por versão dos dados para os filtros da sidebar:
+    - um bitmap (array booleano) por CLASSIFICACAO, que tem poucas categorias;
+    - um array de posições por NOME (um bitmap por responsável ocuparia memória demais);
+    - um índice ordenado de VALOR_CALCULADO, consultado por busca binária.
+    Cada combinação de filtros vira uma interseção desses índices, sem DataFrames intermediários,
+    e o resultado fica memorizado para que voltar a um filtro anterior não custe nada.
+    """
+
+    def __init__(self, df_limpo, max_memorizados=32):
+        self.df = df_limpo
+        self.max_memorizados = max_memorizados
+        classificacoes = pd.Categorical(df_limpo['CLASSIFICACAO']) # Compara os códigos, não os textos
+        bitmaps = {c: classificacoes.codes == i for i, c in enumerate(classificacoes.categories)}
+        self._bitmaps_classificacao = {c: bitmap for c, bitmap in bitmaps.items() if bitmap.any()}
+        self._posicoes_responsavel = {nome: np.asarray(posicoes, dtype=np.intp) for nome, posicoes in df_limpo.groupby('NOME', sort=False, observed=True).indices.items()}
+        self._valores = df_limpo['VALOR_CALCULADO'].to_numpy(dtype='float64')
+        self._ordem_valor = np.argsort(self._valores, kind='stable')
+        self._valores_ordenados = self._valores[self._ordem_valor]
+        self.acertos = 0
+        self.falhas = 0
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _bitmap_classificacoes(self, classificacoes):
+        """União dos bitmaps das classificações selecionadas."""
+        bitmap = np.zeros(len(self._valores), dtype=bool)
+        for classificacao in classificacoes:
+            if classificacao in self._bitmaps_classificacao:
+                bitmap |= self._bitmaps_classificacao[classificacao]
+        return bitmap
+
+    def posicoes(self, classificacoes, responsavel, valor_range):
+        """Retorna as posições (em ordem crescente) das linhas que atendem aos filtros."""
+        bitmap = self._bitmap_classificacoes(classificacoes)
+        if responsavel != 'Todos':
+            # Com um responsável selecionado, basta verificar as poucas linhas dele
+            candidatas = self._posicoes_responsavel.get(responsavel, np.empty(0, dtype=np.intp))
+            valores = self._valores[candidatas]
+            return candidatas[bitmap[candidatas] & (valores >= valor_range[0]) & (valores <= valor_range[1])]
+        inicio = np.searchsorted(self._valores_ordenados, valor_range[0], side='left')
+        fim = np.searchsorted(self._valores_ordenados, valor_range[1], side='right')
+        na_faixa = self._ordem_valor[inicio:fim]
+        return np.sort(na_faixa[bitmap[na_faixa]])
+
+    def _memorizado(self, classificacoes, responsavel, valor_range):
+        """Posições e DataFrame filtrado (somente leitura), memorizados por combinação de filtros."""
+        chave = (frozenset(classificacoes), responsavel, (float(valor_range[0]), float(valor_range[1])))
+        with self._lock:
+            if chave in self._memo:
+                self._memo.move_to_end(chave)
+                self.acertos += 1
+                return self._memo[chave]
+            self.falhas += 1
+        posicoes = self.posicoes(classificacoes, responsavel, valor_range)
+        posicoes.flags.writeable = False
+        filtrado = (posicoes, self.df.iloc[posicoes])
+        with self._lock:
+            self._memo[chave] = filtrado
+            while len(self._memo) > self.max_memorizados:
+                self._memo.popitem(last=False)
+        return filtrado
+
+    def filtrar(self, classificacoes, responsavel, valor_range):
+        """Retorna o DataFrame filtrado (somente leitura), memorizado por combinação de filtros."""
+        return self._memorizado(classificacoes, responsavel, valor_range)[1]
+
+    def posicoes_filtradas(self, classificacoes, responsavel, valor_range):
+        """Retorna as posições das linhas filtradas em df_limpo (somente leitura), da mesma memória de filtrar()."""
+        return self._memorizado(classificacoes, responsavel, valor_range)[0]
+
+    def estatisticas(self):
+        """Retorna os contadores de acertos e falhas da memorização e a quantidade de filtros guardados."""
+        with self._lock:
+            return {'acertos': self.acertos, 'falhas': self.falhas, 'memorizados': len(self._memo)}
+
+# ==============================================================================
+# 2. BUSCA TEXTUAL
+# ==============================================================================
+
+def normalizar_texto(texto):
+    """Texto em minúsculas e sem acentos, para buscas que ignoram acentuação e maiúsculas."""
+    return unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode('ascii').lower()
+
+def normalizar_serie(serie):
+    """Mesma normalização de normalizar_texto, aplicada de forma vetorizada a uma Series de textos."""
+    return serie.astype(str).str.normalize('NFKD').str.replace(r'[^\x00-\x7f]', '', regex=True).str.lower()
+
+class IndiceTexto:
+    """
+    Índice invertido das palavras de NOME e Cliente, construído uma vez por versão dos dados. As palavras
+    (normalizadas) ficam ordenadas com as posições das linhas em que aparecem, então cada termo da busca
+    é um prefixo localizado por busca binária: a busca não percorre as linhas da planilha.
+    Uma linha é encontrada quando todos os termos aparecem como início de alguma palavra dela.
+    """
+
+    def __init__(self, df_limpo, colunas=('NOME', 'Cliente')):
+        todas_palavras, todas_posicoes = [], []
+        for coluna in colunas:
+            valores = df_limpo[coluna].astype('category').cat
+            codigos = valores.codes.to_numpy()
+            # Palavras distintas de cada texto distinto: cada texto é normalizado uma única vez
+            palavras = normalizar_serie(pd.Series(valores.categories)).str.split().explode().dropna()
+            palavras = palavras[~pd.DataFrame({'codigo': palavras.index, 'palavra': palavras.to_numpy()}).duplicated().to_numpy()]
+            # Linhas agrupadas por código: o código c ocupa linhas_por_codigo[inicio[c]:inicio[c] + quantidade[c]]
+            linhas_por_codigo = np.argsort(codigos, kind='stable')
+            inicio = np.searchsorted(codigos[linhas_por_codigo], np.arange(len(valores.categories)))
+            quantidade = np.bincount(codigos[codigos >= 0], minlength=len(valores.categories))
+            # Um par (palavra, posição) para cada linha de cada palavra, sem laço por linha
+            codigos_palavras = palavras.index.to_numpy()
+            repeticoes = quantidade[codigos_palavras]
+            deslocamento = inicio[codigos_palavras] - (np.cumsum(repeticoes) - repeticoes)
+            todas_posicoes.append(linhas_por_codigo[np.arange(repeticoes.sum()) + np.repeat(deslocamento, repeticoes)])
+            todas_palavras.append(np.repeat(palavras.to_numpy(), repeticoes))
+        codigos, self._palavras = pd.factorize(np.concatenate(todas_palavras) if todas_palavras else np.empty(0, dtype=object), sort=True)
+        posicoes = np.concatenate(todas_posicoes).astype(np.intp) if todas_posicoes else np.empty(0, dtype=np.intp)
+        ordem = np.lexsort((posicoes, codigos))
+        codigos, posicoes = codigos[ordem], posicoes[ordem]
+        unicos = np.ones(len(posicoes), dtype=bool) # A mesma palavra em NOME e Cliente conta uma vez por linha
+        unicos[1:] = (codigos[1:] != codigos[:-1]) | (posicoes[1:] != posicoes[:-1])
+        codigos, self._posicoes = codigos[unicos], posicoes[unicos]
+        self._palavras = np.asarray(self._palavras, dtype=object)
+        self._inicio = np.searchsorted(codigos, np.arange(len(self._palavras) + 1)) # Posições da palavra i: _posicoes[_inicio[i]:_inicio[i + 1]]
+        self.linhas = len(df_limpo)
+
+    def _posicoes_prefixo(self, prefixo):
+        """Posições (ordenadas, sem repetição) das linhas com alguma palavra que começa por `prefixo`."""
+        inicio = np.searchsorted(self._palavras, prefixo, side='left')
+        fim = np.searchsorted(self._palavras, prefixo + '\U0010ffff', side='left')
+        posicoes = self._posicoes[self._inicio[inicio]:self._inicio[fim]]
+        return posicoes if fim - inicio <= 1 else np.unique(posicoes) # Uma única palavra já está ordenada
+
+    def buscar(self, texto):
+        """Posições (ordenadas) das linhas que contêm todos os termos de `texto`; None se não houver termos."""
+        termos = normalizar_texto(texto).split()
+        if not termos:
+            return None
+        posicoes = self._posicoes_prefixo(termos[0])
+        for termo in termos[1:]:
+            posicoes = np.intersect1d(posicoes, self._posicoes_prefixo(termo), assume_unique=True)
+        return posicoes
+
+# ==============================================================================
+# 3. CONSULTAS DIRETAS POR RESPONSÁVEL, MESA E ORD
+# ==============================================================================
+
+def agrupar_posicoes(chaves, validas):
+    """
+    Agrupa as posições das linhas `validas` pelo valor inteiro de `chaves`. Retorna as posições
+    ordenadas por chave (somente leitura) e um dict chave -> (início, fim) nesse array: as linhas da
+    chave k são posicoes[início:fim], em ordem crescente.
+    """
+    candidatas = np.flatnonzero(validas)
+    if len(candidatas) == 0: # Ex.: nenhuma mesa atribuída ainda, ou planilha vazia
+        return np.empty(0, dtype=np.intp), {}
+    posicoes = candidatas[np.argsort(chaves[candidatas], kind='stable')]
+    posicoes.flags.writeable = False
+    chaves_ordenadas = chaves[posicoes]
+    limites = np.flatnonzero(chaves_ordenadas[1:] != chaves_ordenadas[:-1]) + 1
+    inicios = np.concatenate([[0], limites]).astype(np.intp)
+    fins = np.concatenate([limites, [len(posicoes)]]).astype(np.intp)
+    return posicoes, dict(zip(chaves_ordenadas[inicios].tolist(), zip(inicios.tolist(), fins.tolist())))
+
+class IndiceConsultas:
+    """
+    Índices de uma versão dos dados para as consultas pontuais dos organizadores ("quanto o
+    responsável X ainda deve", "quem está com a mesa 57"): dicionários de NOME, MESA e ORD para as
+    posições das linhas, mais o saldo de cada responsável já calculado em resumo_responsavel.
+    Cada consulta é uma busca em dicionário, sem máscaras nem groupby sobre a planilha inteira.
+    """
+
+    def __init__(self, df_limpo, resumo_responsavel):
+        self.df = df_limpo
+        nomes = df_limpo['NOME'].astype('category').cat
+        codigos = nomes.codes.to_numpy()
+        self._posicoes_nome, por_codigo = agrupar_posicoes(codigos, codigos >= 0)
+        self._por_nome = {nomes.categories[codigo]: intervalo for codigo, intervalo in por_codigo.items()}
+        self._posicoes_mesa, self._por_mesa = agrupar_posicoes(df_limpo['MESA'].to_numpy(dtype='int64', na_value=0), df_limpo['MESA'].notna().to_numpy())
+        self._posicoes_ord, self._por_ord = agrupar_posicoes(df_limpo['ORD'].to_numpy(dtype='int64', na_value=0), df_limpo['ORD'].notna().to_numpy())
+        self._nomes = {normalizar_texto(nome).strip(): nome for nome in self._por_nome} # Nome digitado sem acentos/maiúsculas -> NOME
+        self.nomes = sorted(self._por_nome) # Opções da lista de responsáveis
+        # Saldo por responsável (mesma regra de finalizar_resumo_responsavel, lida do resumo já calculado)
+        self._saldos = {
+            linha.NOME: {
+                'mesas': int(linha.Mesas_Distribuidas),
+                'patrocinios': int(linha.Patrocinios),
+                'recebido': float(linha.Total_Recebido),
+                'previsao': float(linha.Previsao_por_Responsavel),
+                'saldo': float(linha.A_Receber)
+            }
+            for linha in resumo_responsavel.itertuples(index=False)
+        }
+
+    @staticmethod
+    def _posicoes(posicoes, intervalos, chave):
+        """Recorte (sem cópia) das posições da chave, ou vazio se a chave não existir."""
+        inicio, fim = intervalos.get(chave, (0, 0))
+        return posicoes[inicio:fim]
+
+    def responsavel(self, nome):
+        """NOME exato correspondente ao texto digitado (ignorando acentos e maiúsculas), ou None."""
+        return nome if nome in self._por_nome else self._nomes.get(normalizar_texto(nome).strip())
+
+    def saldo_responsavel(self, nome):
+        """Mesas, patrocínios, recebido, previsão e saldo a receber do responsável (None se não existir)."""
+        return self._saldos.get(self.responsavel(nome))
+
+    def posicoes_responsavel(self, nome):
+        """Posições das linhas do responsável em df_limpo (vazio se não existir)."""
+        return self._posicoes(self._posicoes_nome, self._por_nome, self.responsavel(nome))
+
+    def posicoes_mesa(self, mesa):
+        """Posições das linhas com a mesa informada (uma mesa pode ter mais de uma linha)."""
+        return self._posicoes(self._posicoes_mesa, self._por_mesa, int(mesa))
+
+    def posicoes_ord(self, ord_):
+        """Posições das linhas com o ORD informado."""
+        return self._posicoes(self._posicoes_ord, self._por_ord, int(ord_))
+
+    def consultar(self, texto):
+        """
+        Interpreta o texto digitado: um número é procurado como MESA e como ORD; qualquer outro texto,
+        como nome de responsável. Retorna um dict com 'responsavel', 'saldo' e as posições encontradas
+        ('linhas_responsavel', 'linhas_mesa', 'linhas_ord'), sem percorrer a planilha.
+        """
+        texto = str(texto).strip()
+        vazio = np.empty(0, dtype=np.intp)
+        if texto.isascii() and texto.isdigit(): # isdigit() sozinho aceita '²', que int() rejeita
+            return {'responsavel': None, 'saldo': None, 'linhas_responsavel': vazio,
+                    'linhas_mesa': self.posicoes_mesa(texto), 'linhas_ord': self.posicoes_ord(texto)}
+        nome = self.responsavel(texto) if texto else None
+        return {'responsavel': nome, 'saldo': self._saldos.get(nome), 'linhas_responsavel': self._posicoes(self._posicoes_nome, self._por_nome, nome),
+                'linhas_mesa': vazio, 'linhas_ord': vazio}
@@ -0,0 +1,246 @@
+import pandas as pd
+import io
+from abc import ABC, abstractmethod
+import json
+import mmap
+import os
+import re
+import time
+import unicodedata
+import urllib.request
+import openpyxl
+
+# ==============================================================================
+# 1. LAYOUT DA PLANILHA
+# ==============================================================================
+
+# Colunas usadas pelo dashboard e tipo de cada uma (o restante da planilha é ignorado)
+COLUNAS_PLANILHA = ['ORD', 'NOME', 'Cliente', 'MESA', 'VALOR', 'DATA_REC']
+COLUNAS_NUMERICAS = ['ORD', 'MESA', 'VALOR']
+COLUNAS_TEXTO = ['NOME', 'Cliente', 'DATA_REC']
+
+# O cabeçalho da aba fica na 4ª linha (índice 3)
+LINHA_CABECALHO = 3
+
+# Tamanho máximo de cada leitura do download (o prazo total é conferido entre uma e outra)
+TAMANHO_BLOCO_DOWNLOAD = 64 * 1024
+
+def url_exportacao_google(sheet_id, formato='xlsx', gid=None):
+    """Monta a URL de exportação do Google Sheets (a exportação CSV exige o gid da aba)."""
+    url = f'https://docs.google.com/spreadsheets/d/{sheet_id}/export?format={formato}'
+    if gid is not None:
+        url += f'&gid={gid}'
+    return url
+
+def ler_com_prazo(resposta, prazo):
+    """
+    Lê a resposta inteira em blocos, levantando TimeoutError se `prazo` (time.monotonic) passar.
+    read1 devolve o que já chegou, então um servidor que manda poucos bytes de cada vez não prende a leitura.
+    """
+    blocos = []
+    while True:
+        if time.monotonic() > prazo:
+            raise TimeoutError('Download excedeu o tempo limite')
+        bloco = resposta.read1(TAMANHO_BLOCO_DOWNLOAD)
+        if not bloco:
+            return b''.join(blocos)
+        blocos.append(bloco)
+
+def baixar_conteudo(url, timeout=15, tentativas=3, espera=1.0):
+    """
+    Baixa o conteúdo bruto de uma URL com número limitado de tentativas. Cada tentativa inteira
+    (conexão + download) tem no máximo `timeout` segundos, não só cada operação do socket.
+    Aceita URLs http(s) e file://. Levanta a última exceção se todas as tentativas falharem.
+    """
+    ultimo_erro = None
+    for tentativa in range(tentativas):
+        prazo = time.monotonic() + timeout
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as resposta:
+                return ler_com_prazo(resposta, prazo)
+        except Exception as e:
+            ultimo_erro = e
+            if tentativa < tentativas - 1:
+                time.sleep(espera * (2 ** tentativa)) # Espera exponencial entre tentativas
+    raise ultimo_erro
+
+def converter_numero_br(serie):
+    """Converte textos como '1.500', '600,00' ou 'R$ 1.000,00' para float (valores inválidos viram NaN)."""
+    texto = serie.astype('string').str.replace('R$', '', regex=False).str.strip()
+    formato_br = texto.str.contains(',', regex=False, na=False) | texto.str.fullmatch(r'\d{1,3}(\.\d{3})+', na=False)
+    texto = texto.where(~formato_br, texto.str.replace('.', '', regex=False).str.replace(',', '.', regex=False))
+    return pd.to_numeric(texto, errors='coerce')
+
+def _normalizar_colunas(df):
+    """Aplica os tipos explícitos às seis colunas lidas por qualquer fonte."""
+    for coluna in COLUNAS_NUMERICAS:
+        df[coluna] = pd.to_numeric(df[coluna], errors='coerce').astype('float64')
+    for coluna in COLUNAS_TEXTO:
+        df[coluna] = df[coluna].astype('object')
+    return df[COLUNAS_PLANILHA]
+
+# ==============================================================================
+# 2. FONTES DE DADOS
+# ==============================================================================
+
+class FonteDados(ABC):
+    """
+    Interface de uma fonte de dados da planilha.
+    `obter_conteudo` busca os bytes brutos (rede ou disco) e `ler` transforma esses bytes em um
+    DataFrame com apenas as colunas de COLUNAS_PLANILHA, já com os tipos explícitos.
+    Uma fonte que não implementa os dois métodos falha ao ser criada, não no meio de uma atualização.
+    """
+
+    @abstractmethod
+    def obter_conteudo(self, timeout=15, tentativas=3):
+        """Bytes brutos da planilha (ou um objeto com interface de arquivo)."""
+
+    @abstractmethod
+    def ler(self, conteudo):
+        """DataFrame com as colunas de COLUNAS_PLANILHA a partir do conteúdo de obter_conteudo."""
+
+    def carregar(self, timeout=15, tentativas=3):
+        """Atalho para obter o conteúdo e lê-lo de uma só vez."""
+        return self.ler(self.obter_conteudo(timeout=timeout, tentativas=tentativas))
+
+class FonteCSV(FonteDados):
+    """Exportação CSV (bem mais leve de interpretar que o XLSX), lendo só as colunas necessárias."""
+
+    def __init__(self, url):
+        self.url = url
+        self.descricao = f'CSV: {url}'
+
+    def obter_conteudo(self, timeout=15, tentativas=3):
+        return baixar_conteudo(self.url, timeout=timeout, tentativas=tentativas)
+
+    def ler(self, conteudo):
+        df = pd.read_csv(
+            io.BytesIO(conteudo) if isinstance(conteudo, (bytes, bytearray)) else conteudo,
+            header=LINHA_CABECALHO,
+            skip_blank_lines=False, # Mantém a contagem de linhas igual à da planilha
+            usecols=lambda coluna: str(coluna).strip() in COLUNAS_PLANILHA,
+            dtype=str, # Sem inferência de tipos: a conversão é feita coluna a coluna abaixo
+            encoding='utf-8-sig'
+        )
+        df.columns = df.columns.str.strip()
+        for coluna in COLUNAS_NUMERICAS:
+            df[coluna] = converter_numero_br(df[coluna]) # A exportação CSV traz os valores formatados
+        return _normalizar_colunas(df)
+
+class FonteXLSX(FonteDados):
+    """Exportação XLSX lida em modo streaming (openpyxl read_only), extraindo só as colunas necessárias."""
+
+    def __init__(self, url, sheet_name):
+        self.url = url
+        self.sheet_name = sheet_name
+        self.descricao = f'XLSX: {url} [{sheet_name}]'
+
+    def obter_conteudo(self, timeout=15, tentativas=3):
+        return baixar_conteudo(self.url, timeout=timeout, tentativas=tentativas)
+
+    def ler(self, conteudo):
+        arquivo = io.BytesIO(conteudo) if isinstance(conteudo, (bytes, bytearray)) else conteudo
+        wb = openpyxl.load_workbook(arquivo, read_only=True, data_only=True, keep_links=False)
+        try:
+            ws = wb[self.sheet_name]
+            ws.reset_dimensions() # Não confia na tag <dimension> do arquivo, que pode estar errada (como faz o pd.read_excel)
+            linha_cabecalho = next(ws.iter_rows(min_row=LINHA_CABECALHO + 1, max_row=LINHA_CABECALHO + 1, values_only=True), ())
+            cabecalho = [str(c).strip() if c is not None else '' for c in linha_cabecalho]
+            faltantes = [c for c in COLUNAS_PLANILHA if c not in cabecalho]
+            if faltantes:
+                raise KeyError(f'Colunas ausentes na planilha: {faltantes}')
+            indices = [cabecalho.index(c) for c in COLUNAS_PLANILHA]
+            # Só até a última coluna usada: as colunas extras à direita nem são lidas
+            linhas = ws.iter_rows(min_row=LINHA_CABECALHO + 2, max_col=max(indices) + 1, values_only=True)
+            valores = {coluna: [] for coluna in COLUNAS_PLANILHA}
+            for linha in linhas:
+                for coluna, indice in zip(COLUNAS_PLANILHA, indices):
+                    valores[coluna].append(linha[indice] if indice < len(linha) else None)
+        finally:
+            wb.close()
+        return _normalizar_colunas(pd.DataFrame(valores, columns=COLUNAS_PLANILHA))
+
+class _ArquivoMapeado(mmap.mmap):
+    """mmap somente leitura com a interface de arquivo esperada por zipfile/pandas."""
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+class FonteArquivoLocal(FonteDados):
+    """Arquivo XLSX ou CSV local (uso offline e testes), mapeado em memória com mmap."""
+
+    def __init__(self, caminho, sheet_name):
+        self.caminho = caminho
+        self.sheet_name = sheet_name
+        self.descricao = f'Arquivo: {caminho}'
+        if caminho.lower().endswith('.csv'):
+            self._leitor = FonteCSV(caminho)
+        else:
+            self._leitor = FonteXLSX(caminho, sheet_name)
+
+    def obter_conteudo(self, timeout=15, tentativas=3):
+        with open(self.caminho, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return b''
+            return _ArquivoMapeado(f.fileno(), 0, access=mmap.ACCESS_READ) # Continua válido após fechar o arquivo
+
+    def ler(self, conteudo):
+        return self._leitor.ler(conteudo)
+
+def criar_fonte(origem, sheet_name, tipo='xlsx'):
+    """
+    Cria a fonte adequada para a origem informada: caminhos locais (ou file://) usam FonteArquivoLocal,
+    URLs usam FonteCSV ou FonteXLSX conforme `tipo`.
+    """
+    if origem.startswith('file://'):
+        origem = urllib.request.url2pathname(origem[len('file://'):])
+    if '://' not in origem:
+        return FonteArquivoLocal(origem, sheet_name)
+    if tipo == 'csv':
+        return FonteCSV(origem)
+    return FonteXLSX(origem, sheet_name)
+
+# ==============================================================================
+# 3. VÁRIAS FONTES (EVENTOS E ABAS)
+# ==============================================================================
+
+def nome_seguro(texto, padrao):
+    """Converte um nome (de evento, responsável...) em um nome seguro para arquivos (sem acentos e espaços)."""
+    texto = unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^A-Za-z0-9]+', '_', texto).strip('_').lower() or padrao
+
+def nome_seguro_unico(texto, usados, padrao):
+    """nome_seguro(texto) que ainda não está em `usados` (acrescenta '_' até ser único), já registrado em `usados`."""
+    nome = nome_seguro(texto, padrao)
+    while nome in usados: # Nomes que diferem só por acento/maiúsculas
+        nome += '_'
+    usados.add(nome)
+    return nome
+
+def carregar_config_fontes(caminho, padrao):
+    """
+    Lista de fontes acompanhadas pelo dashboard, lida do arquivo JSON informado (uma lista de objetos
+    com "nome" e "origem", e opcionalmente "aba" e "tipo"; "planilha" + "gid" no lugar de "origem" montam
+    a URL de exportação do Google Sheets). Sem arquivo, retorna só a fonte `padrao`.
+    Cada fonte recebe um "id" único, derivado do nome, para os arquivos locais.
+    """
+    if not caminho:
+        configs = [padrao]
+    else:
+        with open(caminho, encoding='utf-8') as f:
+            configs = json.load(f)
+    fontes = []
+    ids_usados = set()
+    for config in configs:
+        tipo = config.get('tipo', 'xlsx')
+        origem = config.get('origem') or url_exportacao_google(config['planilha'], tipo, config.get('gid'))
+        nome = config.get('nome') or config.get('aba') or origem
+        if any(fonte['nome'] == nome for fonte in fontes):
+            raise ValueError(f'Nome de fonte repetido: {nome}')
+        fontes.append({'nome': nome, 'id': nome_seguro_unico(nome, ids_usados, 'fonte'), 'origem': origem, 'aba': config.get('aba', 'Mesas'), 'tipo': tipo})
+    if not fontes:
+        raise ValueError('A lista de fontes está vazia')
+    return fontes
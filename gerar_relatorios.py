@@ -0,0 +1,102 @@
+"""
+Geração em lote dos relatórios em PDF, sem o Streamlit.
+
+Carrega a planilha uma única vez e gera, em paralelo (um processo por núcleo), o relatório geral
+e um relatório por responsável (coluna NOME).
+
+Uso:
+    python gerar_relatorios.py --origem mesas.xlsx --saida relatorios/
+    python gerar_relatorios.py --origem https://.../export?format=csv&gid=0 --tipo csv
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from cubo import CuboAgregado
+from dados import processar_dados, ativar_copy_on_write
+from fontes import criar_fonte, nome_seguro_unico
+from relatorio import gerar_pdf_relatorio, montar_resumo_exec
+
+# ==============================================================================
+# 1. FUNÇÕES AUXILIARES
+# ==============================================================================
+
+def metricas_responsavel(linha_resumo, df_responsavel):
+    """Monta as métricas do responsável a partir da sua linha em resumo_responsavel."""
+    previsao = linha_resumo['Previsao_por_Responsavel']
+    recebido = linha_resumo['Total_Recebido']
+    return {
+        'mesas': int(linha_resumo['Mesas_Distribuidas']),
+        'mesas_pagas': int((df_responsavel['CLASSIFICACAO'] == 'MESA PAGA').sum()),
+        'patrocinios': int(linha_resumo['Patrocinios']),
+        'recebido': recebido,
+        'previsao': previsao,
+        'saldo': linha_resumo['A_Receber'],
+        'percentual': (recebido / previsao * 100) if previsao > 0 else 0
+    }
+
+def gerar_um_relatorio(titulo, df, resumo_exec, caminho):
+    """Gera e grava um PDF. Executado nos processos do pool; retorna (caminho, linhas, segundos)."""
+    inicio = time.perf_counter()
+    with open(caminho, 'wb') as f:
+        f.write(gerar_pdf_relatorio(df, resumo_exec, titulo=titulo).getvalue())
+    return caminho, len(df), time.perf_counter() - inicio
+
+# ==============================================================================
+# 2. EXECUÇÃO
+# ==============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Gera o relatório geral e um relatório por responsável em PDF.')
+    parser.add_argument('--origem', required=True, help='Arquivo XLSX/CSV local ou URL de exportação da planilha')
+    parser.add_argument('--aba', default='Mesas', help='Nome da aba (apenas para XLSX)')
+    parser.add_argument('--tipo', choices=['xlsx', 'csv'], default='xlsx', help='Formato da URL de exportação')
+    parser.add_argument('--saida', default='relatorios', help='Pasta de destino dos PDFs')
+    parser.add_argument('--processos', type=int, default=os.cpu_count(), help='Número de processos em paralelo')
+    args = parser.parse_args()
+    ativar_copy_on_write()
+
+    inicio_total = time.perf_counter()
+    inicio = time.perf_counter()
+    resultado = processar_dados(criar_fonte(args.origem, args.aba, args.tipo).carregar())
+    df_limpo, resumo_responsavel = resultado.df_limpo, resultado.resumo_responsavel
+    tempo_carga = time.perf_counter() - inicio
+    os.makedirs(args.saida, exist_ok=True)
+
+    # Relatório geral + um relatório por responsável (na ordem de resumo_responsavel)
+    tarefas = [(
+        'BAILE 2025 - RELATÓRIO GERAL',
+        df_limpo,
+        montar_resumo_exec(CuboAgregado(df_limpo).metricas()),
+        os.path.join(args.saida, 'relatorio_geral.pdf')
+    )]
+    linhas_por_responsavel = df_limpo.groupby('NOME', sort=False, observed=True).indices
+    arquivos_usados = {'geral'} # Um responsável chamado "Geral" não sobrescreve relatorio_geral.pdf
+    for _, linha in resumo_responsavel.iterrows():
+        df_responsavel = df_limpo.iloc[linhas_por_responsavel[linha['NOME']]]
+        arquivo = nome_seguro_unico(linha['NOME'], arquivos_usados, 'sem_responsavel')
+        tarefas.append((
+            f'BAILE 2025 - {linha["NOME"]}',
+            df_responsavel,
+            montar_resumo_exec(metricas_responsavel(linha, df_responsavel)),
+            os.path.join(args.saida, f'relatorio_{arquivo}.pdf')
+        ))
+
+    inicio = time.perf_counter()
+    tempos = []
+    with ProcessPoolExecutor(max_workers=args.processos) as executor:
+        futuros = [executor.submit(gerar_um_relatorio, *tarefa) for tarefa in tarefas]
+        for futuro in as_completed(futuros):
+            caminho, linhas, segundos = futuro.result()
+            tempos.append(segundos)
+            print(f'{caminho:<60} {linhas:6d} linhas  {segundos:6.2f} s')
+    tempo_pdfs = time.perf_counter() - inicio
+
+    print('\n=== Resumo ===')
+    print(f'Carga e processamento da planilha: {tempo_carga:.2f} s')
+    print(f'Relatórios gerados: {len(tarefas)} em {tempo_pdfs:.2f} s com {args.processos} processos '
+          f'(soma dos tempos individuais: {sum(tempos):.2f} s)')
+    print(f'Tempo total: {time.perf_counter() - inicio_total:.2f} s')
+
+if __name__ == '__main__':
+    main()
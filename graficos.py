@@ -0,0 +1,131 @@
+import pandas as pd
+import plotly.express as px
+import hashlib
+import threading
+from collections import OrderedDict
+from dados import formatar_coluna_moeda_br
+from desempenho import COLETOR
+
+# ==============================================================================
+# 1. CONSTRUTORES DOS GRÁFICOS
+# ==============================================================================
+
+def figura_distribuicao_classificacao(classificacao_counts):
+    """Gráfico de pizza com a distribuição por classificação (colunas Classificacao, Contagem)."""
+    return px.pie(classificacao_counts, values='Contagem', names='Classificacao', title='Distribuição por Classificação', hole=0.3)
+
+def figura_valor_por_classificacao(valor_por_classificacao):
+    """Gráfico de barras horizontais com o valor por classificação (colunas Classificacao, Valor)."""
+    valor_por_classificacao_sorted = valor_por_classificacao.sort_values('Valor', ascending=True)
+    fig = px.bar(
+        valor_por_classificacao_sorted,
+        x='Valor',
+        y='Classificacao',
+        orientation='h',
+        title='Valor por Classificação'
+    )
+    fig.update_traces(
+        text=formatar_coluna_moeda_br(valor_por_classificacao_sorted['Valor']),
+        textposition='outside',
+        textfont=dict(color='black', size=11),
+        marker_color='#28a745'
+    )
+    fig.update_layout(
+        xaxis_title='Valor (R$)',
+        yaxis_title='Classificação',
+        showlegend=False,
+        height=500,
+        margin=dict(r=150, l=100) # Ajuste de margem para evitar corte de texto
+    )
+    return fig
+
+def figura_top_responsaveis(top_responsaveis):
+    """Gráfico de barras horizontais dos responsáveis com maior valor recebido (colunas Responsavel, Valor)."""
+    top_responsaveis_sorted = top_responsaveis.sort_values('Valor', ascending=True)
+    fig = px.bar(
+        top_responsaveis_sorted,
+        x='Valor',
+        y='Responsavel',
+        orientation='h',
+        title='Top 10 Responsáveis por Valor Recebido'
+    )
+    fig.update_traces(
+        text=formatar_coluna_moeda_br(top_responsaveis_sorted['Valor']),
+        textposition='outside',
+        textfont=dict(color='black', size=11),
+        marker_color='#3498db'
+    )
+    fig.update_layout(
+        xaxis_title='Valor (R$)',
+        yaxis_title='Responsável',
+        showlegend=False,
+        height=500,
+        margin=dict(r=150, l=120) # Ajuste de margem para evitar corte de texto
+    )
+    return fig
+
+def figura_evolucao_totais(evolucao):
+    """Gráfico de linhas do total recebido e do saldo a receber em cada versão (colunas Quando, Total_Recebido, Saldo_a_Receber)."""
+    fig = px.line(
+        evolucao.rename(columns={'Total_Recebido': 'Total Recebido', 'Saldo_a_Receber': 'Saldo a Receber'}),
+        x='Quando',
+        y=['Total Recebido', 'Saldo a Receber'],
+        markers=True,
+        title='Evolução do Recebido e do Saldo a Receber'
+    )
+    fig.update_layout(xaxis_title='Atualização da planilha', yaxis_title='Valor (R$)', legend_title_text='')
+    return fig
+
+def figura_recebimentos_acumulados(recebimentos):
+    """Barras do valor recebido por dia com a linha do acumulado (colunas Data, Recebido_no_Dia, Recebido_Acumulado)."""
+    fig = px.bar(recebimentos, x='Data', y='Recebido_no_Dia', title='Recebimentos por Dia (DATA_REC)')
+    fig.add_scatter(x=recebimentos['Data'], y=recebimentos['Recebido_Acumulado'], mode='lines+markers', name='Acumulado')
+    fig.update_traces(marker_color='#28a745', selector=dict(type='bar'))
+    fig.update_layout(xaxis_title='Data de recebimento', yaxis_title='Valor (R$)', showlegend=False)
+    return fig
+
+# ==============================================================================
+# 2. CACHE DE FIGURAS
+# ==============================================================================
+
+def hash_dataframe(df):
+    """Hash do conteúdo de um DataFrame pequeno (nomes das colunas + valores, ignorando o índice)."""
+    h = hashlib.sha1(repr(list(df.columns)).encode('utf-8'))
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+class CacheFiguras:
+    """
+    Figuras Plotly memorizadas pelo hash do DataFrame de entrada de cada gráfico: se os agregados
+    não mudaram, a mesma figura é reaproveitada sem ser reconstruída. Conta acertos e falhas.
+    As figuras são compartilhadas e não devem ser modificadas por quem as recebe.
+    """
+
+    def __init__(self, max_figuras=64):
+        self.max_figuras = max_figuras
+        self.acertos = 0
+        self.falhas = 0
+        self._figuras = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, nome, df, construtor):
+        """Retorna a figura `nome` para os dados `df`, construindo-a com `construtor(df)` só quando necessário."""
+        chave = (nome, hash_dataframe(df))
+        with self._lock:
+            if chave in self._figuras:
+                self._figuras.move_to_end(chave)
+                self.acertos += 1
+                return self._figuras[chave]
+            self.falhas += 1
+        with COLETOR.medir('graficos'):
+            fig = construtor(df)
+        with self._lock:
+            self._figuras[chave] = fig
+            while len(self._figuras) > self.max_figuras:
+                self._figuras.popitem(last=False)
+        return fig
+
+    def estatisticas(self):
+        """Retorna os contadores de acertos, falhas e figuras guardadas."""
+        with self._lock:
+            return {'acertos': self.acertos, 'falhas': self.falhas, 'figuras': len(self._figuras)}
@@ -0,0 +1,209 @@
+import pandas as pd
+import json
+import os
+import sqlite3
+from contextlib import closing
+from dados import PRECO_MESA, VALOR_PATROCINIO
+
+# ==============================================================================
+# 1. ESQUEMA DO HISTÓRICO
+# ==============================================================================
+
+# Cada versão publicada vira uma linha em `versoes` (com os totais do ResultadoProcessamento).
+# As linhas da planilha ficam em `linhas` como intervalos de validade: uma linha é gravada quando
+# aparece ou muda (valido_de) e fechada quando muda ou some (valido_ate). Uma versão nova grava
+# só o que mudou, e o estado de qualquer versão v é: valido_de <= v e (valido_ate vazio ou > v).
+ESQUEMA_HISTORICO = """
+CREATE TABLE IF NOT EXISTS versoes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    registrado_em TEXT NOT NULL,
+    hash_conteudo TEXT NOT NULL,
+    total_recebido REAL NOT NULL,
+    saldo_a_receber REAL NOT NULL,
+    previsao REAL NOT NULL,
+    totais TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS linhas (
+    ord INTEGER NOT NULL,
+    nome TEXT NOT NULL,
+    cliente TEXT,
+    mesa INTEGER,
+    valor REAL,
+    data_rec TEXT,
+    classificacao TEXT,
+    valido_de INTEGER NOT NULL REFERENCES versoes(id),
+    valido_ate INTEGER REFERENCES versoes(id)
+);
+CREATE INDEX IF NOT EXISTS idx_linhas_atuais_ord ON linhas(ord) WHERE valido_ate IS NULL;
+CREATE INDEX IF NOT EXISTS idx_linhas_nome_data ON linhas(nome, data_rec);
+CREATE INDEX IF NOT EXISTS idx_linhas_data ON linhas(data_rec);
+"""
+
+# Versão do formato do histórico (PRAGMA user_version). A 1 passou a calcular previsão e saldo pela
+# quantidade de linhas (calcular_previsao): versões gravadas antes disso são recalculadas ao abrir o banco.
+VERSAO_HISTORICO = 1
+
+# Previsão de cada versão a partir das linhas válidas nela (mesma regra de calcular_previsao)
+SQL_MIGRAR_PREVISAO = """
+UPDATE versoes SET previsao = (
+    SELECT COUNT(*) * :preco_mesa + COALESCE(SUM(l.classificacao = 'PATROCÍNIO'), 0) * (:valor_patrocinio - :preco_mesa)
+    FROM linhas AS l
+    WHERE l.valido_de <= versoes.id AND (l.valido_ate IS NULL OR l.valido_ate > versoes.id)
+)
+"""
+SQL_MIGRAR_SALDO = """
+UPDATE versoes SET
+    saldo_a_receber = previsao - total_recebido,
+    totais = json_set(totais, '$.previsao', previsao, '$.saldo_a_receber', previsao - total_recebido)
+"""
+
+# Colunas de `linhas` que identificam o conteúdo de uma linha da planilha (a chave é ord)
+COLUNAS_LINHA = ['ord', 'nome', 'cliente', 'mesa', 'valor', 'data_rec', 'classificacao']
+
+# Linhas válidas na versão atual e em uma versão :versao qualquer
+CONDICAO_ATUAIS = 'valido_ate IS NULL'
+CONDICAO_VERSAO = 'valido_de <= :versao AND (valido_ate IS NULL OR valido_ate > :versao)'
+
+def linhas_para_banco(df_limpo):
+    """Converte df_limpo nas tuplas de COLUNAS_LINHA (tipos nativos, vazios como None, datas aaaa-mm-dd)."""
+    colunas = [
+        df_limpo['ORD'].to_numpy(dtype=object, na_value=None),
+        df_limpo['NOME'].astype(object).to_numpy(),
+        df_limpo['Cliente'].to_numpy(dtype=object),
+        df_limpo['MESA'].to_numpy(dtype=object, na_value=None),
+        df_limpo['VALOR'].astype(object).where(df_limpo['VALOR'].notna(), None).to_numpy(),
+        df_limpo['DATA_REC'].dt.strftime('%Y-%m-%d').to_numpy(dtype=object, na_value=None),
+        df_limpo['CLASSIFICACAO'].astype(object).to_numpy()
+    ]
+    return list(zip(*colunas))
+
+# ==============================================================================
+# 2. ARMAZENAMENTO E CONSULTAS
+# ==============================================================================
+
+class HistoricoSnapshots:
+    """
+    Histórico local (SQLite) das versões publicadas da planilha, para acompanhar a evolução dos
+    recebimentos sem baixar nada de novo. Cada versão grava apenas as linhas que mudaram, e as
+    consultas agregam dentro do banco (pelos índices de NOME e DATA_REC), sem carregar as versões
+    no pandas. Cada operação abre a sua conexão, então a mesma instância pode ser usada pela thread
+    agendadora (escrita) e pelas sessões (leitura) ao mesmo tempo.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        with closing(self._conectar()) as con:
+            con.execute('PRAGMA journal_mode=WAL') # Leituras não esperam pela gravação de uma versão
+            con.executescript(ESQUEMA_HISTORICO)
+            self._migrar(con)
+
+    def _migrar(self, con):
+        """Atualiza um histórico gravado por uma versão anterior do dashboard para VERSAO_HISTORICO."""
+        versao, = con.execute('PRAGMA user_version').fetchone()
+        if versao >= VERSAO_HISTORICO:
+            return
+        with con: # Recalcular é idempotente, então dois processos migrando juntos chegam ao mesmo resultado
+            con.execute(SQL_MIGRAR_PREVISAO, {'preco_mesa': PRECO_MESA, 'valor_patrocinio': VALOR_PATROCINIO})
+            con.execute(SQL_MIGRAR_SALDO)
+        con.execute(f'PRAGMA user_version = {VERSAO_HISTORICO}')
+
+    def _conectar(self):
+        return sqlite3.connect(self.caminho, timeout=30)
+
+    def _consultar(self, sql, parametros=()):
+        """Executa uma consulta e retorna o resultado como DataFrame."""
+        with closing(self._conectar()) as con:
+            return pd.read_sql_query(sql, con, params=parametros)
+
+    def registrar(self, hash_conteudo, resultado, quando):
+        """
+        Grava uma versão (totais + linhas alteradas). Não grava nada se o conteúdo for igual ao da
+        última versão registrada. Retorna o id da versão gravada ou None.
+        """
+        totais = resultado.totais()
+        with closing(self._conectar()) as con, con:
+            ultima = con.execute('SELECT hash_conteudo FROM versoes ORDER BY id DESC LIMIT 1').fetchone()
+            if ultima is not None and ultima[0] == hash_conteudo:
+                return None
+            versao = con.execute(
+                'INSERT INTO versoes (registrado_em, hash_conteudo, total_recebido, saldo_a_receber, previsao, totais) VALUES (?, ?, ?, ?, ?, ?)',
+                (quando.isoformat(timespec='seconds'), hash_conteudo, totais['total_recebido'], totais['saldo_a_receber'], totais['previsao'], json.dumps(totais))
+            ).lastrowid
+
+            # A planilha nova vai para uma tabela temporária e a diferença é feita pelo próprio SQLite
+            con.execute(f'CREATE TEMP TABLE novas AS SELECT {", ".join(COLUNAS_LINHA)} FROM linhas WHERE 0') # Mesmos tipos, para usar os índices
+            con.executemany(f'INSERT INTO novas VALUES ({", ".join("?" * len(COLUNAS_LINHA))})', linhas_para_banco(resultado.df_limpo))
+            con.execute('CREATE INDEX temp.idx_novas_ord ON novas(ord)')
+            iguais = ' AND '.join(f'n.{coluna} IS l.{coluna}' for coluna in COLUNAS_LINHA)
+            con.execute(f'UPDATE linhas AS l SET valido_ate = ? WHERE valido_ate IS NULL AND NOT EXISTS (SELECT 1 FROM novas AS n WHERE {iguais})', (versao,))
+            con.execute(
+                f'INSERT INTO linhas ({", ".join(COLUNAS_LINHA)}, valido_de) SELECT {", ".join(COLUNAS_LINHA)}, ? FROM novas AS n '
+                f'WHERE NOT EXISTS (SELECT 1 FROM linhas AS l WHERE l.valido_ate IS NULL AND {iguais})', (versao,)
+            )
+            con.execute('DROP TABLE novas')
+        return versao
+
+    def ultima_versao(self):
+        """Id da última versão registrada (None se o histórico estiver vazio)."""
+        with closing(self._conectar()) as con:
+            return con.execute('SELECT MAX(id) FROM versoes').fetchone()[0]
+
+    def evolucao_totais(self, nome=None):
+        """
+        Total recebido e saldo a receber em cada versão registrada (colunas Versao, Quando,
+        Total_Recebido, Saldo_a_Receber). Com `nome`, os valores são os do responsável (zero nas versões
+        em que ele não tinha mesas).
+        """
+        if nome is None:
+            sql = 'SELECT id AS Versao, registrado_em AS Quando, total_recebido AS Total_Recebido, saldo_a_receber AS Saldo_a_Receber FROM versoes ORDER BY id'
+            parametros = ()
+        else:
+            # Mesma regra de calcular_previsao: previsão = mesas * preço + extra dos patrocínios
+            sql = """
+                SELECT v.id AS Versao, v.registrado_em AS Quando,
+                       COALESCE(SUM(CASE WHEN l.valor > 0 THEN l.valor END), 0) AS Total_Recebido,
+                       COUNT(l.ord) * :preco_mesa + COALESCE(SUM(l.classificacao = 'PATROCÍNIO'), 0) * (:valor_patrocinio - :preco_mesa)
+                           - COALESCE(SUM(CASE WHEN l.valor > 0 THEN l.valor END), 0) AS Saldo_a_Receber
+                FROM versoes AS v
+                LEFT JOIN linhas AS l ON l.nome = :nome AND l.valido_de <= v.id AND (l.valido_ate IS NULL OR l.valido_ate > v.id)
+                GROUP BY v.id
+                ORDER BY v.id
+            """
+            parametros = {'nome': nome, 'preco_mesa': PRECO_MESA, 'valor_patrocinio': VALOR_PATROCINIO}
+        evolucao = self._consultar(sql, parametros)
+        evolucao['Quando'] = pd.to_datetime(evolucao['Quando'])
+        return evolucao
+
+    def recebimentos_por_dia(self, nome=None, por_responsavel=False, versao=None):
+        """
+        Valor recebido por dia (DATA_REC) e acumulado até o dia, calculados no banco (colunas Data,
+        [NOME,] Recebido_no_Dia, Recebido_Acumulado). Por padrão usa as linhas atuais; `versao`
+        consulta o estado de uma versão anterior. Linhas sem data de recebimento ficam de fora.
+        """
+        condicoes = ['valor > 0', 'data_rec IS NOT NULL', CONDICAO_ATUAIS if versao is None else CONDICAO_VERSAO]
+        if nome is not None:
+            condicoes.append('nome = :nome')
+        grupo = 'nome, data_rec' if por_responsavel else 'data_rec'
+        sql = f"""
+            SELECT data_rec AS Data, {'nome AS NOME, ' if por_responsavel else ''}
+                   SUM(valor) AS Recebido_no_Dia,
+                   SUM(SUM(valor)) OVER ({'PARTITION BY nome ' if por_responsavel else ''}ORDER BY data_rec) AS Recebido_Acumulado
+            FROM linhas
+            WHERE {' AND '.join(condicoes)}
+            GROUP BY {grupo}
+            ORDER BY data_rec{', nome' if por_responsavel else ''}
+        """
+        recebimentos = self._consultar(sql, {'versao': versao, 'nome': nome})
+        recebimentos['Data'] = pd.to_datetime(recebimentos['Data'])
+        return recebimentos
+
+    def estatisticas(self):
+        """Quantidade de versões, de linhas gravadas (todas as versões) e tamanho do arquivo em bytes."""
+        with closing(self._conectar()) as con:
+            versoes, = con.execute('SELECT COUNT(*) FROM versoes').fetchone()
+            linhas, = con.execute('SELECT COUNT(*) FROM linhas').fetchone()
+        tamanho = sum(os.path.getsize(c) for c in (self.caminho, f'{self.caminho}-wal') if os.path.exists(c))
+        return {'versoes': versoes, 'linhas': linhas, 'bytes': tamanho}
@@ -0,0 +1,166 @@
+import pandas as pd
+from datetime import datetime
+import io
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Flowable
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from dados import formatar_moeda_br, formatar_coluna_moeda_br, formatar_coluna_mesa, formatar_coluna_data
+
+# ==============================================================================
+# 1. CONFIGURAÇÕES DO RELATÓRIO
+# ==============================================================================
+
+# Quantidade de linhas de dados por tabela (cabe em uma página A4 com fonte 6)
+LINHAS_POR_TABELA = 50
+
+COLUNAS_DADOS_BRUTOS = ['ORD', 'NOME', 'Cliente', 'MESA', 'VALOR_CALCULADO', 'CLASSIFICACAO', 'DATA_REC']
+CABECALHO_DADOS_BRUTOS = ['ORD', 'NOME', 'Cliente', 'MESA', 'VALOR', 'CLASSE', 'DATA']
+LARGURAS_DADOS_BRUTOS = [0.5*inch, 1.5*inch, 1.5*inch, 0.6*inch, 0.8*inch, 1*inch, 0.8*inch]
+
+ESTILO_DADOS_BRUTOS = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c3e50')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('ALIGN', (1, 1), (1, -1), 'LEFT'), # Alinhar NOME à esquerda
+    ('ALIGN', (2, 1), (2, -1), 'LEFT'), # Alinhar Cliente à esquerda
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 8),
+    ('FONTSIZE', (0, 1), (-1, -1), 6),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#ecf0f1')]),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE')
+])
+
+# ==============================================================================
+# 2. GERAÇÃO DO PDF
+# ==============================================================================
+
+def montar_resumo_exec(metricas):
+    """Monta a tabela de resumo executivo do PDF a partir do dicionário de métricas (ver CuboAgregado.metricas)."""
+    return pd.DataFrame({
+        'Métrica': ['Mesas', 'Pagas', 'Patrocínios', 'Total Recebido', 'Previsão', 'Saldo', 'Percentual'],
+        'Valor': [
+            f'{metricas["mesas"]}',
+            f'{metricas["mesas_pagas"]}',
+            f'{metricas["patrocinios"]}',
+            formatar_moeda_br(metricas['recebido']),
+            formatar_moeda_br(metricas['previsao']),
+            formatar_moeda_br(metricas['saldo']),
+            f'{metricas["percentual"]:.1f}%'
+        ]
+    })
+
+def gerar_tabelas_dados_brutos(df_filtrado, linhas_por_tabela=LINHAS_POR_TABELA):
+    """
+    Gera as tabelas de dados brutos em blocos de `linhas_por_tabela` linhas, cada uma com o cabeçalho
+    repetido. Cada bloco só é formatado quando o gerador avança.
+    """
+    colunas = df_filtrado[COLUNAS_DADOS_BRUTOS]
+    for inicio in range(0, len(colunas), linhas_por_tabela):
+        bloco = colunas.iloc[inicio:inicio + linhas_por_tabela]
+        mesas = formatar_coluna_mesa(bloco['MESA'])
+        valores = formatar_coluna_moeda_br(bloco['VALOR_CALCULADO'])
+        datas = formatar_coluna_data(bloco['DATA_REC'])
+        linhas = [
+            [ord_, nome, cliente, mesa, valor, classificacao, data]
+            for ord_, nome, cliente, mesa, valor, classificacao, data in zip(
+                bloco['ORD'], bloco['NOME'], bloco['Cliente'], mesas, valores, bloco['CLASSIFICACAO'], datas
+            )
+        ]
+        tabela = Table([CABECALHO_DADOS_BRUTOS] + linhas, colWidths=LARGURAS_DADOS_BRUTOS, repeatRows=1)
+        tabela.setStyle(ESTILO_DADOS_BRUTOS)
+        yield tabela
+
+class TabelasSobDemanda(Flowable):
+    """
+    Marca, na lista de flowables, o lugar das tabelas de um gerador: DocumentoSobDemanda a troca pela
+    próxima tabela só quando ela vai ser paginada, então apenas um bloco fica em memória por vez.
+    """
+
+    def __init__(self, tabelas):
+        super().__init__()
+        self.tabelas = tabelas
+
+    def wrap(self, largura, altura):
+        return 0, 0
+
+    def draw(self):
+        pass
+
+class DocumentoSobDemanda(SimpleDocTemplate):
+    """SimpleDocTemplate que expande os TabelasSobDemanda durante o build, uma tabela por vez."""
+
+    def filterFlowables(self, flowables):
+        if isinstance(flowables[0], TabelasSobDemanda):
+            tabela = next(flowables[0].tabelas, None)
+            if tabela is None:
+                flowables[0] = None # Gerador esgotado: o build descarta o marcador
+            else:
+                flowables.insert(0, tabela)
+
+def gerar_pdf_relatorio(df_filtrado, resumo_exec, linhas_por_tabela=LINHAS_POR_TABELA, titulo='BAILE 2025 - RELATÓRIO FILTRADO'):
+    """
+    Gera um relatório em PDF com os dados filtrados e um resumo executivo. As tabelas de dados brutos
+    são montadas uma por vez durante o build (ver TabelasSobDemanda); o que continua crescendo com as
+    linhas é o conteúdo das páginas já desenhadas, que o reportlab guarda até gravar o PDF.
+    """
+    buffer = io.BytesIO()
+    doc = DocumentoSobDemanda(buffer, pagesize=A4, topMargin=0.5*inch, bottomMargin=0.5*inch)
+    elements = []
+    styles = getSampleStyleSheet()
+    
+    # Estilos personalizados para o PDF
+    title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=24, textColor=colors.HexColor('#1a1a1a'), spaceAfter=6, alignment=TA_CENTER, fontName='Helvetica-Bold')
+    subtitle_style = ParagraphStyle('CustomSubtitle', parent=styles['Normal'], fontSize=10, textColor=colors.HexColor('#666666'), alignment=TA_CENTER)
+    header2_style = ParagraphStyle('Header2', parent=styles['Heading2'], fontSize=16, textColor=colors.HexColor('#2c3e50'), spaceBefore=12, spaceAfter=6)
+    normal_style = styles['Normal']
+    footer_style = ParagraphStyle('Footer', parent=styles['Normal'], fontSize=9, textColor=colors.HexColor('#999999'), alignment=TA_CENTER)
+
+    # Título e data de geração
+    elements.append(Paragraph(titulo, title_style))
+    elements.append(Spacer(1, 0.2*inch))
+    data_geracao = datetime.now().strftime('%d/%m/%Y às %H:%M:%S')
+    elements.append(Paragraph(f'Gerado em: {data_geracao}', subtitle_style))
+    elements.append(Spacer(1, 0.3*inch))
+
+    # Resumo Executivo
+    elements.append(Paragraph('📊 RESUMO EXECUTIVO', header2_style))
+    elements.append(Spacer(1, 0.1*inch))
+    resumo_data = [['Métrica', 'Valor']]
+    for _, row in resumo_exec.iterrows():
+        resumo_data.append([str(row.get('Métrica', '')), str(row.get('Valor', ''))])
+    resumo_table = Table(resumo_data, colWidths=[3*inch, 2*inch])
+    resumo_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c3e50')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 11),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f0f0f0')])
+    ]))
+    elements.append(resumo_table)
+    elements.append(Spacer(1, 0.3*inch))
+
+    # Dados Brutos Filtrados
+    elements.append(Paragraph('📋 DADOS BRUTOS FILTRADOS', header2_style))
+    elements.append(Spacer(1, 0.1*inch))
+    if not df_filtrado.empty:
+        # Tabelas de tamanho fixo com cabeçalho repetido: o custo de paginação não cresce com a lista,
+        # e cada tabela só é montada quando chega a vez dela (só o PDF gerado cresce com as linhas)
+        elements.append(TabelasSobDemanda(gerar_tabelas_dados_brutos(df_filtrado, linhas_por_tabela)))
+    else:
+        elements.append(Paragraph('Nenhum dado encontrado com os filtros aplicados.', normal_style))
+    elements.append(Spacer(1, 0.3*inch))
+
+    # Rodapé
+    elements.append(Paragraph('Relatório gerado automaticamente - Dashboard Baile 2025 v4.3', footer_style))
+    doc.build(elements)
+    buffer.seek(0)
+    return buffer
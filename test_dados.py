@@ -0,0 +1,83 @@
+"""
+Testes do processamento incremental: processar_incremental deve produzir exatamente o mesmo
+ResultadoProcessamento que processar_dados (recalculando tudo) para a mesma planilha.
+
+Uso:
+    python -m pytest -q
+"""
+from dataclasses import fields
+import numpy as np
+import pandas as pd
+import pytest
+from benchmark import planilha_lida, alterar_planilha
+from dados import processar_dados, processar_incremental
+
+def comparar_resultados(esperado, obtido):
+    """Garante que dois ResultadoProcessamento são iguais (valores em ponto flutuante com tolerância)."""
+    for campo in fields(esperado):
+        a, b = getattr(esperado, campo.name), getattr(obtido, campo.name)
+        if isinstance(a, pd.DataFrame):
+            pd.testing.assert_frame_equal(a, b, check_exact=False, obj=campo.name)
+        elif isinstance(a, np.ndarray):
+            np.testing.assert_array_equal(a, b, err_msg=campo.name)
+        else:
+            assert np.isclose(a, b), f'{campo.name}: {a} != {b}'
+
+def atualizar(df, resultado):
+    """Aplica processar_incremental, confere que não caiu no recálculo completo e compara com processar_dados."""
+    novo, alteracoes = processar_incremental(df, resultado)
+    assert alteracoes is not None, 'processar_incremental recalculou tudo em uma atualização pequena'
+    comparar_resultados(processar_dados(df), novo)
+    return novo, alteracoes
+
+@pytest.mark.parametrize('n_linhas, semente', [(200, 0), (200, 1), (5000, 2)])
+def test_atualizacoes_sucessivas_iguais_ao_recalculo(n_linhas, semente):
+    rng = np.random.default_rng(semente)
+    df = planilha_lida(n_linhas, semente)
+    resultado = processar_dados(df)
+    for _ in range(10):
+        df = alterar_planilha(df, rng, max(3, n_linhas // 200))
+        resultado, _ = atualizar(df, resultado)
+
+def test_remover_ultimos_ords_reduz_total_esperado():
+    df = planilha_lida(500)
+    resultado = processar_dados(df)
+    ords = pd.to_numeric(df['ORD'], errors='coerce')
+    novo, alteracoes = atualizar(df[ords < ords.max() - 5], resultado)
+    assert novo.total_esperado < resultado.total_esperado
+    assert set(alteracoes['Tipo']) == {'removida'}
+
+def test_responsavel_removido_sai_do_resumo():
+    df = planilha_lida(2000)
+    resultado = processar_dados(df)
+    nome = resultado.resumo_responsavel.sort_values('Mesas_Distribuidas')['NOME'].iat[0]
+    novo, _ = atualizar(df[df['NOME'] != nome], resultado)
+    assert nome not in set(novo.resumo_responsavel['NOME'])
+
+def test_responsavel_novo_entra_no_resumo():
+    df = planilha_lida(500)
+    resultado = processar_dados(df)
+    df_novo = df.copy()
+    df_novo.loc[df_novo.index[:3], 'NOME'] = 'Aaa novo responsável' # Entra no início da ordem por NOME
+    novo, alteracoes = atualizar(df_novo, resultado)
+    assert 'Aaa novo responsável' in set(novo.resumo_responsavel['NOME'])
+    assert set(alteracoes['Tipo']) == {'alterada'}
+
+def test_sem_mudancas_registro_vazio():
+    df = planilha_lida(500)
+    resultado = processar_dados(df)
+    _, alteracoes = atualizar(df, resultado)
+    assert alteracoes.empty
+
+@pytest.mark.parametrize('caso', ['muitas_alteracoes', 'ords_repetidos'])
+def test_recalculo_completo_quando_diferencas_nao_se_aplicam(caso):
+    rng = np.random.default_rng(0)
+    df = planilha_lida(1000)
+    resultado = processar_dados(df)
+    if caso == 'muitas_alteracoes':
+        df_novo = alterar_planilha(df, rng, len(df))
+    else:
+        df_novo = pd.concat([df, df.head(1)], ignore_index=True)
+    novo, alteracoes = processar_incremental(df_novo, resultado)
+    assert alteracoes is None
+    comparar_resultados(processar_dados(df_novo), novo)
@@ -0,0 +1,79 @@
+"""
+Testes das fontes de dados da planilha.
+
+Uso:
+    python -m pytest -q
+"""
+import http.server
+import io
+import re
+import threading
+import time
+import zipfile
+import pandas as pd
+import pytest
+from benchmark import gerar_planilha_sintetica, salvar_planilha
+from fontes import FonteDados, FonteXLSX, LINHA_CABECALHO, baixar_conteudo
+
+def trocar_dimensao(caminho, referencia):
+    """Conteúdo do XLSX com a tag <dimension> das abas trocada por `referencia` (como em arquivos gerados por outras ferramentas)."""
+    saida = io.BytesIO()
+    with zipfile.ZipFile(caminho) as origem, zipfile.ZipFile(saida, 'w') as destino:
+        for item in origem.infolist():
+            dados = origem.read(item.filename)
+            if item.filename.startswith('xl/worksheets/'):
+                dados = re.sub(rb'<dimension ref="[^"]*"\s*/>', f'<dimension ref="{referencia}"/>'.encode(), dados)
+            destino.writestr(item, dados)
+    return saida.getvalue()
+
+@pytest.mark.parametrize('referencia', ['A1:B2', 'A1:I10'])
+def test_xlsx_ignora_dimensao_errada(tmp_path, referencia):
+    caminho, _ = salvar_planilha(gerar_planilha_sintetica(50), tmp_path)
+    conteudo = trocar_dimensao(caminho, referencia)
+    esperado = pd.read_excel(io.BytesIO(conteudo), sheet_name='Mesas', header=LINHA_CABECALHO)
+    assert len(FonteXLSX(caminho, 'Mesas').ler(conteudo)) == len(esperado) == 50
+
+def test_fonte_incompleta_falha_ao_ser_criada():
+    class FonteSemLeitura(FonteDados):
+        def obter_conteudo(self, timeout=15, tentativas=3):
+            return b''
+
+    with pytest.raises(TypeError):
+        FonteSemLeitura()
+
+@pytest.fixture
+def servidor_lento():
+    """URL de um servidor HTTP local que manda a resposta um byte a cada 0,1 s."""
+    class Lento(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Length', '100')
+            self.end_headers()
+            try:
+                for _ in range(100):
+                    self.wfile.write(b'x')
+                    self.wfile.flush()
+                    time.sleep(0.1)
+            except OSError: # O cliente desistiu
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    servidor = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Lento)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{servidor.server_address[1]}/'
+    servidor.shutdown()
+    servidor.server_close()
+
+def test_download_lento_respeita_prazo_total(servidor_lento):
+    inicio = time.monotonic()
+    with pytest.raises(TimeoutError):
+        baixar_conteudo(servidor_lento, timeout=0.5, tentativas=1)
+    assert time.monotonic() - inicio < 2
+
+def test_download_local(tmp_path):
+    caminho = tmp_path / 'planilha.csv'
+    caminho.write_bytes(b'a' * 200_000)
+    assert baixar_conteudo(caminho.as_uri(), timeout=5, tentativas=1) == b'a' * 200_000
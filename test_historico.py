@@ -0,0 +1,39 @@
+"""
+Testes do histórico de versões (SQLite).
+
+Uso:
+    python -m pytest -q
+"""
+import json
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+import numpy as np
+import pytest
+from benchmark import planilha_lida, alterar_planilha
+from dados import processar_dados, hash_dados
+from historico import HistoricoSnapshots, VERSAO_HISTORICO
+
+def test_migracao_recalcula_previsao_antiga(tmp_path):
+    caminho = str(tmp_path / 'historico.sqlite3')
+    historico = HistoricoSnapshots(caminho)
+    rng = np.random.default_rng(0)
+    df = planilha_lida(300)
+    for _ in range(3):
+        df = alterar_planilha(df, rng, 5)
+        historico.registrar(hash_dados(df), processar_dados(df), datetime.now())
+    esperado = historico.evolucao_totais()
+
+    # Simula versões gravadas com a definição antiga (pelo maior ORD) antes da migração
+    with closing(sqlite3.connect(caminho)) as con, con:
+        con.execute("UPDATE versoes SET previsao = previsao + 3000, saldo_a_receber = saldo_a_receber + 3000, totais = json_set(totais, '$.previsao', 0)")
+        con.execute('PRAGMA user_version = 0')
+
+    migrado = HistoricoSnapshots(caminho)
+    np.testing.assert_allclose(migrado.evolucao_totais()['Saldo_a_Receber'], esperado['Saldo_a_Receber'])
+    with closing(sqlite3.connect(caminho)) as con:
+        assert con.execute('PRAGMA user_version').fetchone()[0] == VERSAO_HISTORICO
+        for previsao, saldo, totais in con.execute('SELECT previsao, saldo_a_receber, totais FROM versoes'):
+            totais = json.loads(totais)
+            assert totais['previsao'] == pytest.approx(previsao)
+            assert totais['saldo_a_receber'] == pytest.approx(saldo)